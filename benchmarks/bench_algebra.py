@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Plot algebra (ratio, sum, division by a number) on large plots
+together with the per-bin NewNumber loop the ratio used to do
+and the eager and lazy (Plot.lazy) evaluation of a combination of many plots
+Usage: python benchmarks/bench_algebra.py [n_bins]
+"""
+
+import sys
+import time
+import numpy as np
+
+from plotting_device.Plot import Plot
+from plotting_device.NewNumber import NewNumber
+
+def random_plot(n_bins, seed):
+    rng = np.random.default_rng(seed)
+    xmin = np.arange(n_bins, dtype = float)
+    xmax = xmin + 1.0
+    y = rng.uniform(1.0, 2.0, n_bins)
+    return Plot(x_data = [(xmin + xmax)/2.0, xmin, xmax], y_data = [y, 0.9*y, 1.1*y, 0.01*y])
+
+def loop_ratio_errors(p1, p2):
+    """ Error propagation of the ratio as it was done before NewNumberArray """
+    central_y = []
+    central_dy = []
+    for i, j, di, dj in zip(p1.y, p2.y, p1.stat_err, p2.stat_err):
+        if j == 0.0:
+            continue
+        ydy = NewNumber(i, di) / NewNumber(j, dj)
+        central_y.append(ydy.x)
+        central_dy.append(ydy.dx)
+    return np.array(central_y), np.array(central_dy)
+
+def timeit(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    n_bins = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e6)
+    p1 = random_plot(n_bins, 1)
+    p2 = random_plot(n_bins, 2)
+    t_loop, (y_loop, dy_loop) = timeit(loop_ratio_errors, p1, p2)
+    t_ratio, ratio = timeit(lambda: p1/p2)
+    assert np.allclose(ratio.y, y_loop, rtol = 1e-15) and np.allclose(ratio.stat_err, dy_loop, rtol = 1e-15)
+    t_sum, _ = timeit(lambda: p1 + p2)
+    t_div, _ = timeit(lambda: p1/(2.0, 0.1))
+    # Combining many channels, eagerly and with the lazy expression tree
+    channels = [random_plot(n_bins, seed) for seed in range(3, 15)]
+    def combine(first):
+        total = first
+        for channel in channels:
+            total = total + channel
+        return total/p2
+    t_eager, eager = timeit(combine, p1)
+    t_lazy, lazy = timeit(lambda: combine(p1.lazy()).evaluate())
+    assert np.allclose(eager.y, lazy.y) and np.array_equal(eager.ymax, lazy.ymax)
+    print("{0} bins".format(n_bins))
+    print("  per-bin NewNumber ratio loop: {0:.3f} s".format(t_loop))
+    print("  p1/p2:                        {0:.3f} s".format(t_ratio))
+    print("  p1+p2:                        {0:.3f} s".format(t_sum))
+    print("  p1/(2.0, 0.1):                {0:.3f} s".format(t_div))
+    print("  (p1 + 12 channels)/p2, eager: {0:.3f} s".format(t_eager))
+    print("  (p1 + 12 channels)/p2, lazy:  {0:.3f} s".format(t_lazy))
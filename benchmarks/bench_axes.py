@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Time to create large grids of subplots (with a twinx for each one) with draw_canvas,
+using the "gnu" projection (GnuAxes), against plain Axes patched one by one with extend_all as it was done before,
+and whether the resulting figure can be pickled
+Usage: python benchmarks/bench_axes.py [grid size ...]
+"""
+
+import gc
+import sys
+import time
+import pickle
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from plotting_device import extend_class as ec
+
+def patched_canvas(plt, nrows, ncols):
+    """ draw_canvas(multiscales = True) as it was before """
+    fig, axis = plt.subplots(nrows, ncols, sharex = True, gridspec_kw = {"hspace" : 0})
+    axis = [ec.extend_all(i) for i in axis.flat]
+    axis += [ec.extend_all(i.twinx()) for i in axis]
+    return fig, axis
+
+def patching_time(plt, nrows, ncols):
+    """ Time spent in extend_all alone on a grid of plain axes """
+    fig, axis = plt.subplots(nrows, ncols, sharex = True, gridspec_kw = {"hspace" : 0})
+    start = time.perf_counter()
+    for i in axis.flat:
+        ec.extend_all(i)
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+    return elapsed/axis.size
+
+def projection_canvas(plt, nrows, ncols):
+    return pf.draw_canvas(plt, nrows, ncols, gridspec_kw = {"hspace" : 0}, multiscales = True)
+
+def measure(plt, canvas, size):
+    gc.collect()
+    start = time.perf_counter()
+    fig, axis = canvas(plt, size, size)
+    elapsed = time.perf_counter() - start
+    try:
+        pickle.dumps(fig)
+        picklable = "yes"
+    except Exception as e:
+        picklable = "no ({0})".format(type(e).__name__)
+    plt.close(fig)
+    return elapsed, picklable
+
+if __name__ == "__main__":
+    sizes = [int(i) for i in sys.argv[1:]] or [5, 10, 15]
+    plt = pf.default_plt()
+    print("{0:>6} {1:>11} {2:>9}  {3}".format("axes", "method", "time (s)", "picklable"))
+    for size in sizes:
+        for name, canvas in [("extend_all", patched_canvas), ("projection", projection_canvas)]:
+            elapsed, picklable = measure(plt, canvas, size)
+            print("{0:>6} {1:>11} {2:>9.3f}  {3}".format(2*size*size, name, elapsed, picklable))
+    print("extend_all: {0:.1f} us per axis".format(1e6*patching_time(plt, sizes[-1], sizes[-1])))
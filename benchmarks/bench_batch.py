@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Wall time of batch_render.render_all for a batch of plot+ratio figures
+in the current process and in process pools of increasing size
+Usage: python benchmarks/bench_batch.py [n_figures] [n_bins] [workers ...]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import batch_render
+from bench_algebra import random_plot
+
+def figure_specs(n_figures, n_bins, directory):
+    specs = []
+    for i in range(n_figures):
+        p1 = random_plot(n_bins, 2*i)
+        p2 = random_plot(n_bins, 2*i + 1)
+        specs.append({
+            "output" : os.path.join(directory, "figure_{0}.pdf".format(i)),
+            "draw" : [
+                {"plot" : p1, "method" : "gnu_errorbar", "axis" : 0},
+                {"plot" : p2, "method" : "draw_boxxyerrorbar", "axis" : 0, "style" : {"color" : "red"}},
+                {"plot" : p1/p2, "method" : "gnu_errorbar", "axis" : 1, "kwargs" : {"draw_labels" : False}},
+                ],
+            "relimit" : {1 : {"line_one" : True}},
+            })
+    return specs
+
+if __name__ == "__main__":
+    n_figures = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    n_bins = int(float(sys.argv[2])) if len(sys.argv) > 2 else int(1e3)
+    pools = [int(i) for i in sys.argv[3:]] or sorted({1, 2, os.cpu_count()})
+    print("{0} figures of {1} bins, {2} cpus".format(n_figures, n_bins, os.cpu_count()))
+    with tempfile.TemporaryDirectory() as directory:
+        specs = figure_specs(n_figures, n_bins, directory)
+        for workers in pools:
+            start = time.perf_counter()
+            results = batch_render.render_all(specs, workers = workers)
+            elapsed = time.perf_counter() - start
+            errors = [result["error"] for result in results if result["error"]]
+            assert not errors, errors
+            print("  workers = {0:<3} {1:.3f} s".format(workers, elapsed))
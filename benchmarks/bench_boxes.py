@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark of draw_boxxyerrorbar (a single collection of compound paths built from one vertex array)
+against the previous implementation (one Rectangle per bin in a PatchCollection):
+time to build the artists, to draw the figure and to save it to pdf, and the size of the pdf
+Usage: python benchmarks/bench_boxes.py [n_bins ...]
+"""
+
+import io
+import sys
+import time
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from bench_algebra import random_plot
+
+def rectangles_boxxyerrorbar(axis, plot, alpha = 0.25):
+    """ draw_boxxyerrorbar as it was before """
+    from matplotlib.patches import Rectangle
+    from matplotlib.collections import PatchCollection
+    axis.update_limits(plot, padding = 0.05)
+    r = [Rectangle((xm, ym), xp-xm, yp-ym) for xm, xp, ym, yp in zip(plot.xmin, plot.xmax, plot.ymin, plot.ymax)]
+    pc = PatchCollection(r, facecolor = plot.color, edgecolor = 'None', alpha = alpha)
+    axis.add_collection(pc)
+
+def measure(plt, draw, plot):
+    fig, axis = pf.draw_canvas(plt, 1, 1)
+    start = time.perf_counter()
+    draw(axis[0], plot)
+    t_build = time.perf_counter() - start
+    start = time.perf_counter()
+    fig.canvas.draw()
+    t_draw = time.perf_counter() - start
+    output = io.BytesIO()
+    start = time.perf_counter()
+    fig.savefig(output, format = "pdf")
+    t_save = time.perf_counter() - start
+    plt.close(fig)
+    return t_build, t_draw, t_save, len(output.getvalue())
+
+if __name__ == "__main__":
+    sizes = [int(float(i)) for i in sys.argv[1:]] or [int(1e3), int(1e4), int(1e5)]
+    plt = pf.default_plt()
+    print("{0:>8} {1:>12} {2:>9} {3:>9} {4:>9} {5:>10}".format("bins", "method", "build (s)", "draw (s)", "pdf (s)", "pdf (kB)"))
+    for n_bins in sizes:
+        plot = random_plot(n_bins, 1)
+        plot.set_plot_parameters(color = "blue")
+        for name, draw in [("rectangles", rectangles_boxxyerrorbar), ("paths", lambda axis, p: axis.draw_boxxyerrorbar(p))]:
+            t_build, t_draw, t_save, size = measure(plt, draw, plot)
+            print("{0:>8} {1:>12} {2:>9.3f} {3:>9.3f} {4:>9.3f} {5:>10.1f}".format(n_bins, name, t_build, t_draw, t_save, size/1024))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Build time, draw time, pdf save time and pdf size of gnu_line and gnu_errorbar on dense scans
+with and without the per-pixel min/max decimation (decimate = True)
+Usage: python benchmarks/bench_decimate.py [n_points ...]
+"""
+
+import sys
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from plotting_device.Plot import Plot
+from bench_boxes import measure
+
+def dense_scan(n_points, seed):
+    rng = np.random.default_rng(seed)
+    edges = np.linspace(0.0, 10.0, n_points + 1)
+    x = (edges[1:] + edges[:-1])/2.0
+    y = np.sin(x) + 0.1*rng.normal(size = n_points)
+    # A few narrow peaks, that need to survive the decimation
+    y[rng.integers(0, n_points, 5)] += 3.0
+    return Plot(x_data = [x, edges[:-1], edges[1:]], y_data = [y, y, y, 0.05*np.abs(y)])
+
+if __name__ == "__main__":
+    sizes = [int(float(i)) for i in sys.argv[1:]] or [int(1e4), int(1e5), int(1e6)]
+    plt = pf.default_plt()
+    print("{0:>8} {1:>8} {2:>8} {3:>9} {4:>9} {5:>9} {6:>10}".format(
+        "points", "method", "decimate", "build (s)", "draw (s)", "pdf (s)", "pdf (kB)"))
+    for n_points in sizes:
+        plot = dense_scan(n_points, 1)
+        plot.set_plot_parameters(color = "blue")
+        for method in ["gnu_line", "gnu_errorbar"]:
+            for decimate in [False, True]:
+                draw = lambda axis, p: getattr(axis, method)(p, draw_labels = False, decimate = decimate)
+                t_build, t_draw, t_save, size = measure(plt, draw, plot)
+                print("{0:>8} {1:>8} {2:>8} {3:>9.3f} {4:>9.3f} {5:>9.3f} {6:>10.1f}".format(
+                    n_points, method[4:], str(decimate), t_build, t_draw, t_save, size/1024))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Plot._create_envelope against the original per-point loop
+Usage: python benchmarks/bench_envelope.py [n_variations]
+"""
+
+import sys
+import time
+import numpy as np
+
+from plotting_device.Plot import Plot
+
+def loop_envelope(arrays):
+    """ The envelope as it was computed before vectorization (only the la > 2 branch) """
+    la = len(arrays)
+    center = np.array(arrays[0])
+    max_l = []
+    min_l = []
+    n_points = len(center)
+    if la % 2 == 0:
+        error = np.array(arrays[-1])
+        la_wo = la-1
+    else:
+        error = np.zeros(n_points)
+        la_wo = la
+    for i in range(n_points):
+        l = [array[i] for array in arrays[1:la_wo]]
+        max_l.append(max(max(l), center[i]+error[i]))
+        min_l.append(min(min(l), center[i]-error[i]))
+    return center, np.array(min_l), np.array(max_l)
+
+def timeit(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    n_variations = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    plot = Plot.__new__(Plot)
+    rng = np.random.default_rng(1)
+    print("{0:>10} {1:>12} {2:>12} {3:>10}".format("bins", "loop (s)", "vector (s)", "speed-up"))
+    for n_bins in [int(1e3), int(1e5), int(1e6)]:
+        central = rng.uniform(1.0, 2.0, n_bins)
+        arrays = [central] + [central*rng.uniform(0.9, 1.1, n_bins) for _ in range(n_variations - 2)]
+        arrays.append(0.01*central)
+        arrays = np.array(arrays)
+        t_loop, old = timeit(loop_envelope, arrays)
+        t_vec, new = timeit(plot._create_envelope, arrays)
+        for a, b in zip(old, new):
+            assert np.array_equal(a, b)
+        print("{0:>10} {1:>12.4f} {2:>12.4f} {3:>9.1f}x".format(n_bins, t_loop, t_vec, t_loop/t_vec))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of a fresh interpreter importing the package for data work only
+(Plot, NewNumber, DataTable: matplotlib is not imported) and for plotting (plot_functions.default_plt)
+Usage: python benchmarks/bench_import.py [repetitions]
+"""
+
+import sys
+import time
+import subprocess
+
+STATEMENTS = [
+        ("python", "pass"),
+        ("numpy", "import numpy"),
+        ("data classes", "from plotting_device import Plot, NewNumber, DataTable"),
+        ("plotting", "import plotting_device as pd; pd.plot_functions.default_plt()"),
+        ]
+
+CHECK = "; import sys; print('matplotlib' in sys.modules)"
+
+def cold_start(statement, repetitions):
+    best = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", statement + CHECK], check = True,
+                capture_output = True, text = True).stdout
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output.strip() == "True"
+
+if __name__ == "__main__":
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{0:<14} {1:>9} {2:>11}".format("import", "time (s)", "matplotlib"))
+    for name, statement in STATEMENTS:
+        elapsed, matplotlib = cold_start(statement, repetitions)
+        print("{0:<14} {1:>9.3f} {2:>11}".format(name, elapsed, "yes" if matplotlib else "no"))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark of integrals over many x-windows: one get_integral call per window,
+a single get_integrals batch call, and the per-bin loop _compute_integral used to do
+Usage: python benchmarks/bench_integrals.py [n_bins] [n_windows]
+"""
+
+import sys
+import time
+import numpy as np
+
+from bench_algebra import random_plot
+
+def loop_integral(plot, xmin, xmax):
+    """ _compute_integral as it was before the prefix-sum index (central value and error only) """
+    total_y = 0.0
+    total_dy_sum = 0.0
+    for i, (xm, xp) in enumerate(zip(plot.xmin, plot.xmax)):
+        if (xm >= xmin) & (xp <= xmax):
+            total_y += plot.y[i]*(xp-xm)
+            total_dy_sum += pow(plot.stat_err[i], 2)
+    return total_y, np.sqrt(total_dy_sum)
+
+if __name__ == "__main__":
+    n_bins = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e5)
+    n_windows = int(float(sys.argv[2])) if len(sys.argv) > 2 else 200
+    plot = random_plot(n_bins, 1)
+    rng = np.random.default_rng(3)
+    lower = rng.uniform(0, n_bins/2, n_windows).round()
+    upper = lower + rng.uniform(1, n_bins/2, n_windows).round()
+
+    start = time.perf_counter()
+    loop = [loop_integral(plot, i, j) for i, j in zip(lower[:5], upper[:5])]
+    t_loop = (time.perf_counter() - start)/5.0
+
+    start = time.perf_counter()
+    single = [plot.get_integral(i, j) for i, j in zip(lower, upper)]
+    t_single = (time.perf_counter() - start)/n_windows
+
+    start = time.perf_counter()
+    batch_y, batch_dy = plot.get_integrals(lower, upper)
+    t_batch = time.perf_counter() - start
+
+    assert np.allclose([i[0] for i in loop], batch_y[:5]) and np.allclose([i[1] for i in loop], batch_dy[:5])
+    assert np.allclose([i[0] for i in single], batch_y)
+    print("{0} bins, {1} windows".format(n_bins, n_windows))
+    print("  per-bin loop:          {0:.2e} s per window".format(t_loop))
+    print("  get_integral:          {0:.2e} s per window".format(t_single))
+    print("  get_integrals (batch): {0:.2e} s for all windows".format(t_batch))
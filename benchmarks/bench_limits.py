@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark of update_limits and relimit (running extents, only new lines are scanned)
+against the previous implementation (Python min/max over every plot and every line)
+on a ratio panel where many curves are overlaid, relimiting after each one
+Usage: python benchmarks/bench_limits.py [n_curves] [n_bins]
+"""
+
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import extend_class as ec
+from plotting_device import plot_functions as pf
+from types import MethodType
+from bench_algebra import random_plot
+
+def old_update_limits(axis, plot, padding = 0.05, ):
+    """
+    update_limits as it was before, the first plot sets the limits
+    (the library doesn't keep that flag anymore, overlay sets axis.old_first_plot)
+    """
+    if axis.keep_limits:
+        return
+    if axis.old_first_plot:
+        axis.old_first_plot = False
+        cur_ylim = (plot.y[0], plot.y[0])
+        cur_xlim = (plot.x[0], plot.x[0])
+    else:
+        cur_ylim = axis.get_ylim()
+        cur_xlim = axis.get_xlim()
+    axis.set_ylim( (min(cur_ylim[0], min(plot.ymin)), max(cur_ylim[1], (1.0+padding)*max(plot.ymax))) )
+    axis.set_xlim( (min(cur_xlim[0], min(plot.xmin)), max(cur_xlim[1], max(plot.xmax))) )
+
+def old_line_extents(axis):
+    """ Scan of the lines in relimit as it was before """
+    ymin_l = []
+    ymax_l = []
+    for line in axis.lines:
+        ydata = line.get_ydata()
+        ymin_l.append(min(ydata))
+        ymax_l.append(max(ydata))
+    return min(ymin_l), max(ymax_l)
+
+def overlay(plt, curves, old):
+    fig, axis = pf.draw_canvas(plt, 1, 1)
+    axis = axis[0]
+    if old:
+        axis.update_limits = MethodType(old_update_limits, axis)
+        axis.old_first_plot = True
+        ec._line_extents, new_line_extents = old_line_extents, ec._line_extents
+    start = time.perf_counter()
+    for plot in curves:
+        axis.gnu_line(plot, draw_labels = False)
+        axis.relimit()
+    elapsed = time.perf_counter() - start
+    if old:
+        ec._line_extents = new_line_extents
+    limits = axis.get_ylim(), axis.get_xlim()
+    plt.close(fig)
+    return elapsed, limits
+
+if __name__ == "__main__":
+    n_curves = int(float(sys.argv[1])) if len(sys.argv) > 1 else 30
+    n_bins = int(float(sys.argv[2])) if len(sys.argv) > 2 else int(1e5)
+    plt = pf.default_plt()
+    curves = [random_plot(n_bins, seed) for seed in range(n_curves)]
+    t_old, old_limits = overlay(plt, curves, True)
+    t_new, new_limits = overlay(plt, curves, False)
+    assert np.allclose(old_limits, new_limits)
+    print("{0} curves of {1} bins, gnu_line + relimit after each one".format(n_curves, n_bins))
+    print("  before:           {0:.3f} s".format(t_old))
+    print("  running extents:  {0:.3f} s".format(t_new))
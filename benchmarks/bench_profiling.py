@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Overhead of the profiling spans: small ratio plots (where the overhead weighs the most) built with profiling disabled and enabled,
+the spans of the enabled run are written as JSON and as a Chrome trace
+Usage: python benchmarks/bench_profiling.py [n_figures] [n_bins] [output_directory]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import Plot, profiling
+from plotting_device import plot_functions as pf
+import datagen
+
+def algebra(p1, p2, n_loops):
+    for _ in range(n_loops):
+        (p1 + p2)/p2
+
+def figures(plt, p1, p2, n_figures):
+    for i in range(n_figures):
+        with profiling.figure("ratio_{0:02d}".format(i)):
+            fig, axis = pf.canvas_plot_and_ratio(plt)
+            axis[0].gnu_errorbar(p1)
+            axis[0].gnu_errorbar(p2)
+            axis[1].gnu_errorbar(p1/p2, draw_labels = False)
+            axis[1].relimit(line_one = True)
+            plt.close(fig)
+
+def compare(function, repeat = 5):
+    """
+    Best time of function with profiling disabled and enabled, after a warm-up run,
+    the two states alternate so the drift of the machine affects both
+    """
+    function()
+    times = {False : [], True : []}
+    for _ in range(repeat):
+        for state in [False, True]:
+            profiling.enable() if state else profiling.disable()
+            start = time.perf_counter()
+            function()
+            times[state].append(time.perf_counter() - start)
+    profiling.disable()
+    return min(times[False]), min(times[True])
+
+if __name__ == "__main__":
+    n_figures = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_bins = int(float(sys.argv[2])) if len(sys.argv) > 2 else 50
+    output_dir = sys.argv[3] if len(sys.argv) > 3 else tempfile.mkdtemp()
+    os.makedirs(output_dir, exist_ok = True)
+    plt = pf.default_plt()
+    filename = datagen.write_dat(os.path.join(output_dir, "profiling.dat"), n_bins, 2)
+    p1 = Plot(filename, columns_x = datagen.COLUMNS_X, columns_y = datagen.columns_y(2))
+    p2 = Plot(filename, columns_x = datagen.COLUMNS_X, columns_y = datagen.columns_y(2))
+
+    n_loops = 100*n_figures
+    for name, function in [("plot algebra ({0} sums and ratios)".format(n_loops), lambda: algebra(p1, p2, n_loops)),
+            ("{0} figures".format(n_figures), lambda: figures(plt, p1, p2, n_figures))]:
+        t_disabled, t_enabled = compare(function)
+        print("{0} of {1} bins: disabled {2:.4f} s, enabled {3:.4f} s ({4:+.1%})".format(
+            name, n_bins, t_disabled, t_enabled, t_enabled/t_disabled - 1.0))
+
+    profiling.reset()
+    profiling.enable()
+    figures(plt, p1, p2, n_figures)
+    profiling.disable()
+    print(profiling.table().str_latex()[:600])
+    profiling.write_json(os.path.join(output_dir, "profile.json"))
+    profiling.write_chrome_trace(os.path.join(output_dir, "trace.json"))
+    print("{0} spans written to {1}".format(len(profiling.records()), output_dir))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+pdf save time and size of a plot+ratio figure with many boxxyerrorbar boxes and dense histeps,
+saved as vectors and with save_to_file(rasterize_above = 1000) at 150 and 300 dpi
+Usage: python benchmarks/bench_rasterize.py [n_bins ...]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from bench_algebra import random_plot
+
+def heavy_figure(plt, n_bins):
+    p1 = random_plot(n_bins, 1)
+    p2 = random_plot(n_bins, 2)
+    p1.set_plot_parameters(color = "blue")
+    p2.set_plot_parameters(color = "red")
+    fig, axis = pf.canvas_plot_and_ratio(plt)
+    axis[0].draw_boxxyerrorbar(p1)
+    axis[0].gnu_histeps(p2)
+    ratio = p1/p2
+    axis[1].gnu_histeps(ratio, draw_labels = False)
+    axis[1].relimit(line_one = True)
+    return fig
+
+if __name__ == "__main__":
+    sizes = [int(float(i)) for i in sys.argv[1:]] or [int(1e3), int(1e4), int(1e5)]
+    plt = pf.default_plt()
+    print("{0:>8} {1:>16} {2:>9} {3:>10}".format("bins", "save", "time (s)", "size (kB)"))
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "figure.pdf")
+        for n_bins in sizes:
+            fig = heavy_figure(plt, n_bins)
+            for name, kwargs in [("vectors", {}),
+                    ("raster, 150 dpi", {"rasterize_above" : 1000, "dpi" : 150}),
+                    ("raster, 300 dpi", {"rasterize_above" : 1000, "dpi" : 300})]:
+                start = time.perf_counter()
+                pf.save_to_file(fig, output, **kwargs)
+                elapsed = time.perf_counter() - start
+                print("{0:>8} {1:>16} {2:>9.3f} {3:>10.1f}".format(n_bins, name, elapsed, os.path.getsize(output)/1024))
+            plt.close(fig)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark of dat_reader.read_columns against the np.loadtxt call Plot used to do
+on a generated file in the test_data layout (xmin x xmax y ymax ymin stat_err)
+With numpy 2.4 the speed-up is about 1.2-1.7x (short of the 5x asked for), see dat_reader
+Usage: python benchmarks/bench_reader.py [n_lines]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+from plotting_device import dat_reader
+
+def write_test_file(filename, n_lines):
+    rng = np.random.default_rng(1)
+    x = 10.0*np.arange(n_lines)
+    y = rng.uniform(0.1, 10.0, n_lines)
+    data = np.column_stack([x, x + 5.0, x + 10.0, y, 1.01*y, 0.99*y, 0.005*y])
+    with open(filename, "w") as f:
+        f.write("# xmin x xmax y ymax ymin stat_err\n")
+        f.write("@ generated by bench_reader.py\n")
+        np.savetxt(f, data, fmt = "%.12g")
+
+def best_of(n, function, *args, **kwargs):
+    times = []
+    for _ in range(n):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+if __name__ == "__main__":
+    n_lines = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e6)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "bench.dat")
+        write_test_file(filename, n_lines)
+        cols = range(7)
+        t_old, old = best_of(3, np.loadtxt, filename, comments = ["#", "@"], usecols = cols, unpack = True, ndmin = 2)
+        t_new, new = best_of(3, dat_reader.read_columns, filename, cols)
+        assert np.array_equal(old, new)
+        print("{0} lines, np.loadtxt: {1:.3f} s, dat_reader: {2:.3f} s, speed-up: {3:.1f}x".format(
+            n_lines, t_old, t_new, t_old/t_new))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Memory use and algebra timings of SparsePlot against Plot on a wide, mostly empty grid
+Usage: python benchmarks/bench_sparse.py [n_bins] [occupancy]
+"""
+
+import sys
+import time
+import numpy as np
+
+from plotting_device.Plot import Plot
+from plotting_device.SparsePlot import SparsePlot
+
+def mostly_empty_plot(n_bins, occupancy, seed):
+    rng = np.random.default_rng(seed)
+    xmin = np.arange(n_bins, dtype = float)
+    xmax = xmin + 1.0
+    y = np.where(rng.random(n_bins) < occupancy, rng.uniform(1.0, 2.0, n_bins), 0.0)
+    return Plot(x_data = [(xmin + xmax)/2.0, xmin, xmax], y_data = [y, 0.9*y, 1.1*y, 0.01*y])
+
+def timeit(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    n_bins = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e6)
+    occupancy = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    p1 = mostly_empty_plot(n_bins, occupancy, 1)
+    p2 = mostly_empty_plot(n_bins, occupancy, 2)
+    s1 = SparsePlot(p1)
+    s2 = SparsePlot(p2)
+    usage = s1.memory_usage()
+    print("{0} bins, {1} occupied".format(usage["bins"], usage["occupied"]))
+    print("  dense:  {0:.2f} MB".format(usage["dense_bytes"]/1024**2))
+    print("  sparse: {0:.2f} MB".format(usage["sparse_bytes"]/1024**2))
+    for name, dense_op, sparse_op in [
+            ("sum", lambda: p1 + p2, lambda: s1 + s2),
+            ("ratio", lambda: p1/p2, lambda: s1/s2),
+            ("integral", lambda: p1.get_integral(), lambda: s1.get_integral()),
+            ]:
+        t_dense, _ = timeit(dense_op)
+        t_sparse, _ = timeit(sparse_op)
+        print("  {0:<8} dense {1:.4f} s, sparse {2:.4f} s".format(name, t_dense, t_sparse))
+    t_dense, _ = timeit(lambda: p1.rebin(10))
+    t_sparse, _ = timeit(lambda: s1.rebin(10))
+    assert np.allclose(s1.to_dense().y, p1.y)
+    print("  {0:<8} dense {1:.4f} s, sparse {2:.4f} s".format("rebin", t_dense, t_sparse))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Checks that Plot(filename, block_size = n) gives exactly the same arrays as
+the non-streaming loader and compares the peak memory (as seen by tracemalloc) of both
+Usage: python benchmarks/bench_streaming.py [n_lines] [block_size]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+
+from plotting_device.Plot import Plot
+from bench_reader import write_test_file
+
+ATTRIBUTES = ["x", "xmin", "xmax", "y", "ymin", "ymax", "stat_err"]
+
+def load(filename, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    plot = Plot(filename, columns_x = [1, 0, 2], columns_y = [3, 4, 5, 6], **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return plot, elapsed, peak
+
+if __name__ == "__main__":
+    n_lines = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e6)
+    block_size = int(float(sys.argv[2])) if len(sys.argv) > 2 else int(1e4)
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "bench.dat")
+        write_test_file(filename, n_lines)
+        full, t_full, m_full = load(filename)
+        stream, t_stream, m_stream = load(filename, block_size = block_size)
+        for attribute in ATTRIBUTES:
+            assert np.array_equal(getattr(full, attribute), getattr(stream, attribute)), attribute
+        # The same must hold when the last block is not full
+        odd, _, _ = load(filename, block_size = 7)
+        for attribute in ATTRIBUTES:
+            assert np.array_equal(getattr(full, attribute), getattr(odd, attribute)), attribute
+    output = 7*n_lines*8/1024**2
+    print("{0} lines (output arrays: {1:.1f} MB)".format(n_lines, output))
+    print("  full load:      {0:.2f} s, peak {1:.1f} MB".format(t_full, m_full/1024**2))
+    print("  block_size={0}: {1:.2f} s, peak {2:.1f} MB".format(block_size, t_stream, m_stream/1024**2))
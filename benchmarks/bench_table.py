@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark of DataTable on a cut-flow like table: filling it row by row (add_row), in bulk (add_rows, from_columns),
+and writing it with str_latex/str_html (whole table in memory) against write_latex/write_html to a file,
+with the peak memory allocated while writing
+Usage: python benchmarks/bench_table.py [n_rows]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+
+from plotting_device import DataTable
+
+def cut_flow(n_rows):
+    rng = np.random.default_rng(1)
+    names = np.array(["cut_{0}".format(i) for i in range(n_rows)], dtype = object)
+    events = rng.integers(1, 10**6, n_rows)
+    efficiency = rng.random(n_rows)
+    return names, events, efficiency
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def write_to(filename, method):
+    with open(filename, "w") as f:
+        method(f)
+
+if __name__ == "__main__":
+    n_rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(5e4)
+    header = ["cut", "events", "efficiency"]
+    names, events, efficiency = cut_flow(n_rows)
+    rows = [list(i) for i in zip(names.tolist(), events.tolist(), efficiency.tolist())]
+
+    def row_by_row():
+        table = DataTable(header = header)
+        for row in rows:
+            table.add_row(row)
+        return table
+
+    print("{0} rows".format(n_rows))
+    for name, fill in [
+            ("add_row", row_by_row),
+            ("add_rows", lambda: DataTable(header = header, data = rows)),
+            ("from_columns", lambda: DataTable.from_columns([names, events, efficiency], header = header)),
+            ]:
+        start = time.perf_counter()
+        table = fill()
+        table.nrows
+        print("  fill with {0:<13} {1:.4f} s".format(name, time.perf_counter() - start))
+
+    table = DataTable.from_columns([names, events, efficiency], header = header)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "table.tex")
+        for name, write in [
+                ("str_latex", lambda: table.str_latex()),
+                ("write_latex", lambda: write_to(filename, table.write_latex)),
+                ("str_html", lambda: table.str_html()),
+                ("write_html", lambda: write_to(filename, table.write_html)),
+                ]:
+            elapsed, peak, _ = measure(write)
+            print("  {0:<23} {1:.4f} s, peak {2:.1f} MB".format(name, elapsed, peak/1024**2))
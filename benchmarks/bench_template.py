@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Per-figure time of rendering the same plot+ratio layout for many observables
+building every figure from scratch against reusing a FigureTemplate
+Usage: python benchmarks/bench_template.py [n_figures] [n_bins]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from plotting_device.FigureTemplate import FigureTemplate
+from bench_algebra import random_plot
+
+def observables(n_figures, n_bins):
+    result = []
+    for i in range(n_figures):
+        p1 = random_plot(n_bins, 2*i)
+        p2 = random_plot(n_bins, 2*i + 1)
+        p2.set_plot_parameters(color = "red")
+        result.append([p1, p2, p1/p2])
+    return result
+
+def from_scratch(plt, plots, output):
+    fig, axis = pf.canvas_plot_and_ratio(plt)
+    axis[0].gnu_errorbar(plots[0])
+    axis[0].draw_boxxyerrorbar(plots[1])
+    axis[1].gnu_errorbar(plots[2], draw_labels = False)
+    axis[1].relimit(line_one = True)
+    if output:
+        pf.save_to_file(fig, output)
+    else:
+        fig.canvas.draw()
+    plt.close(fig)
+
+def with_template(template, plots, output):
+    fig = template.render(plots, output = output)
+    if not output:
+        fig.canvas.draw()
+
+def per_figure(function, sets, outputs):
+    start = time.perf_counter()
+    for plots, output in zip(sets, outputs):
+        function(plots, output)
+    return (time.perf_counter() - start)/len(sets)
+
+if __name__ == "__main__":
+    n_figures = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_bins = int(float(sys.argv[2])) if len(sys.argv) > 2 else 100
+    plt = pf.default_plt()
+    sets = observables(n_figures, n_bins)
+    print("{0} figures of {1} bins, time per figure".format(n_figures, n_bins))
+    with tempfile.TemporaryDirectory() as directory:
+        for name, outputs in [("draw (Agg)", n_figures*[None]),
+                ("save to pdf", [os.path.join(directory, "figure_{0}.pdf".format(i)) for i in range(n_figures)])]:
+            t_scratch = per_figure(lambda plots, output: from_scratch(plt, plots, output), sets, outputs)
+            template = FigureTemplate(plt, relimit = {1 : {"line_one" : True}})
+            template.add(0, "gnu_errorbar")
+            template.add(0, "draw_boxxyerrorbar")
+            template.add(1, "gnu_errorbar", draw_labels = False)
+            t_template = per_figure(lambda plots, output: with_template(template, plots, output), sets, outputs)
+            template.close()
+            print("  {0:<12} from scratch {1:.3f} s, template {2:.3f} s".format(name, t_scratch, t_template))
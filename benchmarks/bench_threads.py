@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Memory (resident set size) while rendering many figures one after the other
+through pyplot without closing them, through pyplot closing them and without pyplot (draw_canvas(None))
+and wall time of batch_render in the current process and in a thread pool
+Usage: python benchmarks/bench_threads.py [n_figures] [n_threads]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import plot_functions as pf
+from plotting_device import batch_render
+from bench_algebra import random_plot
+from bench_batch import figure_specs
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1])*os.sysconf("SC_PAGE_SIZE")/1024**2
+
+def figure(plt, plot):
+    fig, axis = pf.canvas_plot_and_ratio(plt)
+    axis[0].gnu_errorbar(plot)
+    axis[1].gnu_errorbar(plot/plot, draw_labels = False)
+    fig.canvas.draw()
+    return fig
+
+def memory(n_figures, mode):
+    plot = random_plot(100, 1)
+    if mode == "no pyplot":
+        context, plt = pf.style_context(), None
+    else:
+        plt = pf.default_plt()
+        context = pf.style_context()
+    with context:
+        for i in range(n_figures + 20):
+            if i == 20:
+                # Growth after the font and text caches are warm
+                start = rss_mb()
+            fig = figure(plt, plot)
+            if mode == "pyplot, close":
+                plt.close(fig)
+    return rss_mb() - start
+
+if __name__ == "__main__":
+    n_figures = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    mode = os.environ.get("BENCH_THREADS_MODE")
+    if mode:
+        print("{0:<16} +{1:.1f} MB after {2} figures".format(mode, memory(n_figures, mode), n_figures))
+        sys.exit(0)
+    # Every memory measurement in a fresh interpreter
+    import subprocess
+    for mode in ["pyplot, no close", "pyplot, close", "no pyplot"]:
+        subprocess.run([sys.executable, "-W", "ignore", __file__, str(n_figures)], env = dict(os.environ, BENCH_THREADS_MODE = mode), check = True)
+    with tempfile.TemporaryDirectory() as directory:
+        specs = figure_specs(min(n_figures, 32), 1000, directory)
+        for name, kwargs in [("in process", {"workers" : 1}), ("{0} threads".format(n_threads), {"workers" : n_threads, "threads" : True})]:
+            start = time.perf_counter()
+            results = batch_render.render_all(specs, **kwargs)
+            elapsed = time.perf_counter() - start
+            errors = [result["error"] for result in results if result["error"]]
+            assert not errors, errors
+            print("{0:<16} {1:.3f} s for {2} figures".format(name, elapsed, len(specs)))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the rounding behind relimit: NewNumber.ceil/floor with decimals (quantize) against decimal.Decimal.quantize,
+and plan_ticks for many axes one at a time against a single call
+Usage: python benchmarks/bench_ticks.py [n_values] [n_axes]
+"""
+
+import sys
+import time
+import decimal as dec
+import numpy as np
+
+from plotting_device.NewNumber import quantize
+from plotting_device.extend_class import plan_ticks
+
+def timeit(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def decimal_ceil(values, decimals):
+    """ What NewNumber.ceil used to do for every number """
+    f_n = dec.Decimal(str(pow(10, -decimals)))
+    return np.array([float(dec.Decimal(i).quantize(f_n, rounding = dec.ROUND_UP)) for i in values.tolist()])
+
+if __name__ == "__main__":
+    n_values = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e5)
+    n_axes = int(float(sys.argv[2])) if len(sys.argv) > 2 else 1000
+    rng = np.random.default_rng(1)
+    values = rng.normal(0.0, 1.0, n_values)
+
+    print("{0} values".format(n_values))
+    for decimals in [1, 3, 6]:
+        t_decimal, reference = timeit(lambda: decimal_ceil(values, decimals))
+        t_quantize, result = timeit(lambda: quantize(values, decimals, away_from_zero = True))
+        assert np.array_equal(result, reference)
+        print("  ceil to {0} decimals: Decimal {1:.4f} s, quantize {2:.4f} s".format(decimals, t_decimal, t_quantize))
+
+    low = rng.uniform(0.5, 0.95, n_axes)
+    high = low + rng.uniform(0.05, 1.0, n_axes)
+    print("{0} ratio axes".format(n_axes))
+    t_loop, plans = timeit(lambda: [plan_ticks(a, b, line_one = True)[0] for a, b in zip(low, high)])
+    t_batch, batch = timeit(lambda: plan_ticks(low, high, line_one = True))
+    assert all(a["ylabels"] == b["ylabels"] and a["ylim"] == b["ylim"] for a, b in zip(plans, batch))
+    print("  plan_ticks one axis at a time {0:.4f} s, all at once {1:.4f} s".format(t_loop, t_batch))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Benchmark of format_uncertainties against str(NewNumber) one number at a time,
+and of str_latex of a table with a column of NewNumber against the same column as a NewNumberArray
+Usage: python benchmarks/bench_uncertainties.py [n_entries]
+"""
+
+import sys
+import time
+import numpy as np
+
+from plotting_device import NewNumber, NewNumberArray, DataTable
+from plotting_device.NewNumberArray import format_uncertainties
+
+def timeit(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    n_entries = int(float(sys.argv[1])) if len(sys.argv) > 1 else int(1e5)
+    rng = np.random.default_rng(1)
+    x = rng.uniform(1.0, 1e4, n_entries)
+    dx = x*10.0**rng.uniform(-5.0, 0.0, n_entries)
+
+    t_scalar, scalar = timeit(lambda: [str(NewNumber(a, b)) for a, b in zip(x, dx)])
+    t_batch, batch = timeit(lambda: format_uncertainties(x, dx))
+    assert scalar == batch
+    print("{0} entries".format(n_entries))
+    print("  str(NewNumber)          {0:.4f} s".format(t_scalar))
+    print("  format_uncertainties    {0:.4f} s".format(t_batch))
+    for mode in ["latex", "html"]:
+        t_mode, _ = timeit(lambda: format_uncertainties(x, dx, mode = mode))
+        print("  format_uncertainties, {0:<5} {1:.4f} s".format(mode, t_mode))
+
+    names = ["bin_{0}".format(i) for i in range(n_entries)]
+    numbers = [NewNumber(a, b) for a, b in zip(x, dx)]
+    for name, column in [("NewNumber", numbers), ("NewNumberArray", NewNumberArray(x, dx))]:
+        table = DataTable.from_columns([names, column], header = ["bin", "value"])
+        t_table, _ = timeit(table.str_latex)
+        print("  str_latex, {0:<14} {1:.4f} s".format(name, t_table))
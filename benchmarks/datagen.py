@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Synthetic data files in the test_data layout, for the benchmarks:
+
+    xmin x xmax y var_1 ... var_n stat_err
+
+The file is written in blocks of rows so any size can be generated with flat memory
+Plot reads them with columns_x = COLUMNS_X, columns_y = columns_y(n_variations)
+Usage: python benchmarks/datagen.py output_directory [--bins 1e2 1e4 ...] [--variations 2 10 ...]
+"""
+
+import os
+import argparse
+import numpy as np
+
+COLUMNS_X = [1, 0, 2]
+BLOCK_ROWS = 100000
+
+def columns_y(n_variations):
+    """ Columns of y, the variations and the stat error """
+    return list(range(3, 3 + n_variations + 2))
+
+def data_filename(directory, n_bins, n_variations):
+    return os.path.join(directory, "bins_{0}_var_{1}.dat".format(n_bins, n_variations))
+
+def write_dat(filename, n_bins, n_variations, seed = 1):
+    """
+    Writes a file with n_bins bins of width 10 and n_variations variations of y of up to 10%
+    """
+    rng = np.random.default_rng(seed)
+    header = ["xmin", "x", "xmax", "y"] + ["var_{0}".format(i + 1) for i in range(n_variations)] + ["stat_err"]
+    with open(filename, "w") as f:
+        f.write("# " + " ".join(header) + "\n")
+        f.write("@ generated by datagen.py\n")
+        for start in range(0, n_bins, BLOCK_ROWS):
+            n_rows = min(BLOCK_ROWS, n_bins - start)
+            xmin = 10.0*np.arange(start, start + n_rows)
+            y = rng.uniform(1.0, 10.0, n_rows)
+            variations = y*rng.uniform(0.9, 1.1, (n_variations, n_rows))
+            block = np.vstack([xmin, xmin + 5.0, xmin + 10.0, y, variations, 0.005*y]).T
+            np.savetxt(f, block, fmt = "%.10g")
+    return filename
+
+def generate(directory, sizes, variations, seed = 1):
+    """
+    Writes (if not there already) one file for every combination of sizes and variations,
+    returns a dictionary {(n_bins, n_variations) : filename}
+    """
+    os.makedirs(directory, exist_ok = True)
+    files = {}
+    for n_bins in sizes:
+        for n_variations in variations:
+            filename = data_filename(directory, n_bins, n_variations)
+            if not os.path.exists(filename):
+                write_dat(filename, n_bins, n_variations, seed = seed)
+            files[(n_bins, n_variations)] = filename
+    return files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Write synthetic data files in the test_data layout")
+    parser.add_argument("directory")
+    parser.add_argument("--bins", nargs = "+", type = float, default = [1e2, 1e4, 1e6])
+    parser.add_argument("--variations", nargs = "+", type = int, default = [2, 10, 100])
+    parser.add_argument("--seed", type = int, default = 1)
+    args = parser.parse_args()
+    files = generate(args.directory, [int(i) for i in args.bins], args.variations, seed = args.seed)
+    for (n_bins, n_variations), filename in sorted(files.items()):
+        print("{0:>10} bins {1:>4} variations: {2} ({3:.1f} MB)".format(
+            n_bins, n_variations, filename, os.path.getsize(filename)/1024**2))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: times the main operations of the library on synthetic files (see datagen.py)
+for every combination of number of bins and of variation columns, and writes the results to a JSON file
+
+    load       Plot(filename)
+    envelope   Plot._create_envelope of the raw variations
+    rebin      Plot.rebin(2)
+    ratio      p1/p2
+    sum        p1 + p2
+    integral   get_integral() (the integral index is rebuilt every time)
+    total      get_total()
+    str_latex  DataTable.str_latex of x, y +/- stat_err
+    build      canvas_plot_and_ratio + gnu_errorbar of p1, p2 and p1/p2 + relimit
+    save       save_to_file to pdf
+
+Every operation is run --repeat times, the best and the median times are stored
+Compare two runs with --compare old.json, operations more than --threshold slower are flagged
+(and the exit code is 1)
+Usage: python benchmarks/run_suite.py [--bins 1e2 1e4 ...] [--variations 2 10 ...] [--output results.json]
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from plotting_device import Plot, NewNumberArray, DataTable
+from plotting_device import plot_functions as pf
+import datagen
+
+def measure(function, setup = None, repeat = 3):
+    """
+    Times function(setup()) repeat times (setup is not timed), returns the list of times
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        function(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+def load(filename, n_variations):
+    return Plot(filename, columns_x = datagen.COLUMNS_X, columns_y = datagen.columns_y(n_variations))
+
+def fresh_index(plot):
+    """ A copy of plot without the integral index """
+    new_plot = copy.copy(plot)
+    new_plot._index = None
+    return new_plot
+
+def build_figure(plt, p1, p2):
+    fig, axis = pf.canvas_plot_and_ratio(plt)
+    axis[0].gnu_errorbar(p1)
+    axis[0].gnu_errorbar(p2)
+    axis[1].gnu_errorbar(p1/p2, draw_labels = False)
+    axis[1].relimit(line_one = True)
+    return fig
+
+def latex_table(plot):
+    table = DataTable.from_columns([plot.x, NewNumberArray(plot.y, plot.stat_err)], header = ["x", "y"])
+    return table.str_latex()
+
+def operations(plt, files, n_bins, n_variations, max_table_bins, max_figure_bins, output_dir):
+    """
+    List of (name, function, setup) to time for one data size
+    """
+    filename = files[(n_bins, n_variations)]
+    p1 = load(filename, n_variations)
+    p2 = load(filename, n_variations)
+    p2.y = 1.1*p2.y
+    p1.set_plot_parameters(color = "blue")
+    p2.set_plot_parameters(color = "red")
+    ops = [
+            ("load", lambda _: load(filename, n_variations), None),
+            ("envelope", lambda _: p1._create_envelope(p1.y_variations), None),
+            ("rebin", lambda plot: plot.rebin(2), lambda: copy.copy(p1)),
+            ("ratio", lambda _: p1/p2, None),
+            ("sum", lambda _: p1 + p2, None),
+            ("integral", lambda plot: plot.get_integral(), lambda: fresh_index(p1)),
+            ("total", lambda plot: plot.get_total(), lambda: fresh_index(p1)),
+            ]
+    if n_bins <= max_table_bins:
+        ops.append(("str_latex", lambda _: latex_table(p1), None))
+    if n_bins <= max_figure_bins:
+        output = os.path.join(output_dir, "figure.pdf")
+        def build(_):
+            plt.close(build_figure(plt, p1, p2))
+        def save(fig):
+            pf.save_to_file(fig, output)
+            plt.close(fig)
+        ops.append(("build", build, None))
+        ops.append(("save", save, lambda: build_figure(plt, p1, p2)))
+    return ops
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True,
+                cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+            "date" : time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit" : commit,
+            "python" : platform.python_version(),
+            "numpy" : np.__version__,
+            "matplotlib" : matplotlib.__version__,
+            "machine" : platform.machine(),
+            "system" : platform.system(),
+            "cpus" : os.cpu_count(),
+            }
+
+def run(sizes, variations, repeat = 3, data_dir = None, max_table_bins = int(1e6), max_figure_bins = int(1e4)):
+    """
+    Runs the suite, returns the dictionary written to the JSON output
+    """
+    plt = pf.default_plt()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = datagen.generate(data_dir or tmp, sizes, variations)
+        for n_bins in sizes:
+            for n_variations in variations:
+                for name, function, setup in operations(plt, files, n_bins, n_variations,
+                        max_table_bins, max_figure_bins, tmp):
+                    times = measure(function, setup, repeat)
+                    results.append({
+                        "name" : name, "bins" : n_bins, "variations" : n_variations,
+                        "best" : min(times), "median" : float(np.median(times)), "times" : times,
+                        })
+                    print("{0:>10} {1:>4} {2:>10} {3:>10.3f} {4:>10.3f}".format(
+                        n_bins, n_variations, name, 1e3*min(times), 1e3*np.median(times)))
+    return {"environment" : environment(), "repeat" : repeat, "results" : results}
+
+def compare(old, new, threshold = 0.1, min_time = 1e-3):
+    """
+    Prints the change of the best time of every operation present in both runs
+    Returns the number of operations more than threshold (relative) slower,
+    operations faster than min_time (in seconds) in both runs are too noisy to be flagged
+    """
+    key = lambda result: (result["name"], result["bins"], result["variations"])
+    old_results = {key(i) : i for i in old["results"]}
+    n_slower = 0
+    print("{0:>10} {1:>4} {2:>10} {3:>10} {4:>10} {5:>8}".format("bins", "var", "operation", "old (ms)", "new (ms)", "change"))
+    for result in new["results"]:
+        previous = old_results.get(key(result))
+        if previous is None:
+            continue
+        change = result["best"]/previous["best"] - 1.0
+        flag = ""
+        if change > threshold and max(result["best"], previous["best"]) >= min_time:
+            flag = " slower"
+            n_slower += 1
+        print("{0:>10} {1:>4} {2:>10} {3:>10.3f} {4:>10.3f} {5:>+7.0%}{6}".format(
+            result["bins"], result["variations"], result["name"], 1e3*previous["best"], 1e3*result["best"], change, flag))
+    return n_slower
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark suite of plotting_device")
+    parser.add_argument("--bins", nargs = "+", type = float, default = [1e2, 1e4, 1e5])
+    parser.add_argument("--variations", nargs = "+", type = int, default = [2, 10])
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--data-dir", help = "keep the generated files here (default: a temporary directory)")
+    parser.add_argument("--max-table-bins", type = float, default = 1e6, help = "skip str_latex above this size")
+    parser.add_argument("--max-figure-bins", type = float, default = 1e4, help = "skip build and save above this size")
+    parser.add_argument("--output", default = "benchmark_results.json")
+    parser.add_argument("--compare", help = "JSON output of a previous run to compare with")
+    parser.add_argument("--threshold", type = float, default = 0.1, help = "relative slow-down flagged by --compare")
+    parser.add_argument("--min-time", type = float, default = 1e-3,
+            help = "operations faster than this (in seconds) are not flagged by --compare")
+    args = parser.parse_args()
+
+    print("{0:>10} {1:>4} {2:>10} {3:>10} {4:>10}".format("bins", "var", "operation", "best (ms)", "median (ms)"))
+    data = run([int(i) for i in args.bins], args.variations, repeat = args.repeat, data_dir = args.data_dir,
+            max_table_bins = int(args.max_table_bins), max_figure_bins = int(args.max_figure_bins))
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent = 1)
+    print("Results written to {0}".format(args.output))
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        n_slower = compare(old, data, args.threshold, args.min_time)
+        if n_slower:
+            print("{0} operations are more than {1:.0%} slower".format(n_slower, args.threshold))
+            sys.exit(1)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from . import plot_functions as pf
+from . import profiling
+from .extend_class import boxxyerrorbar, decimated_data
+
+class FigureTemplate:
+
+    """
+    A figure layout that is built once and reused for many sets of plots
+
+        template = FigureTemplate(plt, relimit = {1 : {"line_one" : True}})
+        template.add(0, "gnu_errorbar")
+        template.add(0, "draw_boxxyerrorbar")
+        template.add(1, "gnu_errorbar", draw_labels = False)
+        for p1, p2, output in observables:
+            template.render([p1, p2, p1/p2], output = output)
+
+    The first render draws the plots with the usual axis methods (gnu_errorbar, gnu_line, gnu_histeps, draw_boxxyerrorbar),
+    the following ones only swap the data of the artists already in the figure
+    and recompute the limits of every axis once
+    The style (fmt, capsize...) is the one of the first render, colors, legends and labels follow the new plots
+    With plt = None the figure is created without pyplot (see plot_functions.draw_canvas)
+    """
+
+    def __init__(self, plt = None, layout = "plot_and_ratio", canvas = None, relimit = None):
+        self.plt = plt
+        self.fig, self.axis = pf.canvas_from_layout(plt, layout, **(canvas or {}))
+        self.relimit = dict(relimit) if relimit else {}
+        self.slots = []
+        self.artists = None
+
+    def add(self, axis = 0, method = "gnu_errorbar", **kwargs):
+        """
+        Adds a slot to the template: the plot in this position will be drawn in axis with method(plot, **kwargs)
+        """
+        if self.artists is not None:
+            raise Exception("Can't add slots to a template that has been rendered already")
+        if kwargs.get("histeps"):
+            raise Exception("Use a separate gnu_histeps slot instead of histeps = True")
+        self.slots.append((axis, method, kwargs))
+        return len(self.slots) - 1
+
+    def render(self, plots, output = None):
+        """
+        Draws plots (one per slot, in the order they were added) and saves the figure to output (if given)
+        Returns the figure
+        The profiling spans recorded meanwhile are attributed to output
+        """
+        if len(plots) != len(self.slots):
+            raise Exception("The template has {0} slots, got {1} plots".format(len(self.slots), len(plots)))
+        with profiling.figure(output):
+            if self.artists is None:
+                self.artists = []
+                for (axis, method, kwargs), plot in zip(self.slots, plots):
+                    self.artists.append(getattr(self.axis[axis], method)(plot, **kwargs))
+            else:
+                legends = set()
+                for (axis, method, kwargs), artist, plot in zip(self.slots, self.artists, plots):
+                    getattr(self, "_update_" + method)(self.axis[axis], artist, plot, kwargs)
+                    if plot.xlabel: self.axis[axis].set_xlabel(plot.xlabel, weight = 'medium')
+                    if plot.ylabel: self.axis[axis].set_ylabel(plot.ylabel, weight = 'medium')
+                    if self.axis[axis].get_legend() is not None:
+                        legends.add(axis)
+                for axis in legends:
+                    self.axis[axis].legend()
+                self._recompute_limits(plots)
+            for axis, relimit_kwargs in self.relimit.items():
+                self.axis[axis].relimit(**relimit_kwargs)
+            if output:
+                pf.save_to_file(self.fig, output)
+        return self.fig
+
+    def close(self):
+        if self.plt is not None:
+            self.plt.close(self.fig)
+
+    # Limits
+    def _recompute_limits(self, plots):
+        """
+        Same limits update_limits would produce drawing plots in a new canvas, set once per axis
+        Axes that share a direction share the extent of the data
+        """
+        extents = {}
+        for (axis, method, kwargs), plot in zip(self.slots, plots):
+            axe = self.axis[axis]
+            if axe.keep_limits:
+                continue
+            padding = kwargs.get("padding", 0.05)
+            for extent, setter, low, high in [
+                    (axe.gnu_yextent, axe.set_ylim, np.min(plot.ymin), (1.0+padding)*np.max(plot.ymax)),
+                    (axe.gnu_xextent, axe.set_xlim, np.min(plot.xmin), np.max(plot.xmax)),
+                    ]:
+                if id(extent) in extents:
+                    _, _, old_low, old_high = extents[id(extent)]
+                    low, high = min(low, old_low), max(high, old_high)
+                extents[id(extent)] = (extent, setter, low, high)
+        for extent, setter, low, high in extents.values():
+            extent["limits"] = setter((low, high))
+
+    # In-place updates of the artists created by each drawing method
+    def _update_gnu_errorbar(self, axis, container, plot, kwargs):
+        data_line, caplines, barlinecols = container.lines
+        x, y, err = decimated_data(axis, plot, kwargs.get("decimate"))
+        data_line.set_data(x, y)
+        if caplines:
+            caplines[0].set_data(x, y - err)
+            caplines[1].set_data(x, y + err)
+        segments = np.empty((len(x), 2, 2))
+        segments[:, :, 0] = np.asarray(x)[:, None]
+        segments[:, 0, 1] = y - err
+        segments[:, 1, 1] = y + err
+        barlinecols[0].set_segments(segments)
+        container.set_label(plot.legend)
+        if plot.color:
+            for artist in (data_line,) + tuple(caplines) + tuple(barlinecols):
+                artist.set_color(plot.color)
+        else:
+            plot.set_plot_parameters(color = data_line.get_color())
+
+    def _update_gnu_line(self, axis, lines, plot, kwargs):
+        line = lines[0]
+        x, y, _ = decimated_data(axis, plot, kwargs.get("decimate"), errors = False)
+        line.set_data(x, y)
+        line.set_label(plot.legend)
+        if plot.color:
+            line.set_color(plot.color)
+        else:
+            plot.set_plot_parameters(color = line.get_color())
+
+    def _update_gnu_histeps(self, axis, lines, plot, kwargs):
+        if getattr(plot, "sparse", False):
+            step_x, step_y = plot.step_arrays()
+        else:
+            # The two steps gnu_histeps draws, in a single line
+            step_x, step_y = np.append(plot.xmin, plot.xmax[-1]), np.append(plot.y, plot.y[-1])
+        lines[0].set_data(step_x, step_y)
+        for line in lines[1:]:
+            line.set_data([], [])
+        if plot.color:
+            for line in lines:
+                line.set_color(plot.color)
+        else:
+            plot.color = lines[0].get_color()
+
+    def _update_draw_boxxyerrorbar(self, axis, collection, plot, kwargs):
+        collection.set_paths(boxxyerrorbar(plot.xmin, plot.xmax, plot.ymin, plot.ymax))
+        if plot.color:
+            collection.set_facecolor(plot.color)
+        else:
+            plot.set_plot_parameters(color = collection.get_facecolor())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+from matplotlib.axes import Axes
+from matplotlib.projections import register_projection
+from . import extend_class as ec
+
+class GnuAxes(Axes):
+
+    """
+    matplotlib Axes with the gnuplot-like methods of extend_class, registered as the "gnu" projection
+
+        fig, axis = plt.subplots(2, 1, subplot_kw = {"projection" : "gnu"})
+        axis[0].gnu_errorbar(plot)
+
+    twinx/twiny of a GnuAxes are GnuAxes as well
+    """
+
+    name = "gnu"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        ec.init_state(self)
+
+    format_ticks = ec.format_ticks
+    update_limits = ec.update_limits
+    draw_labels = ec.draw_labels
+    draw_boxxyerrorbar = ec.draw_boxxyerrorbar
+    gnu_histeps = ec.gnu_histeps
+    gnu_errorbar = ec.gnu_errorbar
+    gnu_line = ec.gnu_line
+    relimit = ec.relimit
+
+    def _make_twin_axes(self, *args, **kwargs):
+        if "projection" not in kwargs and "axes_class" not in kwargs:
+            kwargs["projection"] = self.name
+        return super()._make_twin_axes(*args, **kwargs)
+
+register_projection(GnuAxes)
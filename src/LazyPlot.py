@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from .NewNumber import NewNumber
+from .NewNumberArray import NewNumberArray
+from .Plot import Plot, _widen
+from . import profiling
+
+LABELS = ["filename", "xlabel", "ylabel", "legend", "fmt", "color"]
+
+def _derived_labels(**labels):
+    """ Labels of a newly derived Plot, updated with labels """
+    new_labels = {"filename" : "Derived plot", "xlabel" : None, "ylabel" : None,
+            "legend" : None, "fmt" : ".", "color" : None}
+    new_labels.update(labels)
+    return new_labels
+
+class LazyPlot:
+
+    """
+    Lazy version of the Plot algebra, created with plot.lazy()
+
+    Operating (+, -, /) with a LazyPlot builds an expression tree instead of a Plot
+        result = (p1.lazy() + p2 - p3) / p4
+    which is evaluated only once, on first access to any of the attributes of the plot
+    (ie, when it is drawn) or explicitly with result.evaluate()
+
+    The evaluation checks the compatibility of all the plots involved once
+    and computes the result directly on the arrays, only the final Plot is created
+    Bins dropped by a ratio (denominator equal to 0) are dropped from the final result
+    """
+
+    def __init__(self, operation, operands, factor = 1.0):
+        object.__setattr__(self, "_operation", operation)
+        object.__setattr__(self, "_operands", operands)
+        object.__setattr__(self, "_factor", factor)
+        object.__setattr__(self, "_result", None)
+
+    @classmethod
+    def from_plot(cls, plot):
+        return cls("leaf", [plot])
+
+    def _leaves(self):
+        if self._operation == "leaf":
+            return [self._operands[0]]
+        leaves = []
+        for operand in self._operands:
+            if isinstance(operand, LazyPlot):
+                leaves += operand._leaves()
+        return leaves
+
+    def _check_compatibility(self):
+        leaves = list({id(leaf) : leaf for leaf in self._leaves()}.values())
+        reference = leaves[0]
+        for leaf in leaves[1:]:
+            if not np.array_equal(reference.x, leaf.x) or not np.array_equal(reference.xmin, leaf.xmin) \
+                    or not np.array_equal(reference.xmax, leaf.xmax):
+                raise Exception("The plots '{0}' and '{1}' are not compatible".format(reference, leaf))
+        return reference
+
+    def _compute(self):
+        """
+        Returns the arrays (y, ymin, ymax, stat_err), the mask of valid bins (or None) and the labels of the node
+        """
+        if self._operation == "leaf":
+            plot = self._operands[0]
+            arrays = [np.asarray(i, dtype = float) for i in (plot.y, plot.ymin, plot.ymax, plot.stat_err)]
+            labels = {key : getattr(plot, key) for key in LABELS}
+            return arrays, None, labels
+
+        (y, ymin, ymax, stat_err), mask, labels = self._operands[0]._compute()
+
+        if self._operation == "sum":
+            (y2, ymin2, ymax2, stat_err2), mask2, _ = self._operands[1]._compute()
+            new_y = NewNumberArray(y, stat_err)._sum_n(NewNumberArray(y2, stat_err2), factor = self._factor)
+            new_ymin, new_ymax = _widen(new_y.x, ymin + ymin2*self._factor, ymax + ymax2*self._factor, new_y.dx)
+            arrays = [new_y.x, new_ymin, new_ymax, new_y.dx]
+            mask = _combine(mask, mask2)
+            labels = _derived_labels(xlabel = labels["xlabel"], ylabel = labels["ylabel"])
+        elif self._operation == "ratio":
+            (y2, _, _, stat_err2), mask2, labels2 = self._operands[1]._compute()
+            nonzero = y2 != 0.0
+            # Bins with a zero denominator are masked out, divide by 1 to avoid warnings
+            denominator = np.where(nonzero, y2, 1.0)
+            ratio = NewNumberArray(y, stat_err) / NewNumberArray(denominator, stat_err2)
+            new_ymin, new_ymax = _widen(ratio.x, ymin/denominator, ymax/denominator, ratio.dx)
+            arrays = [ratio.x, new_ymin, new_ymax, ratio.dx]
+            mask = _combine(_combine(mask, mask2), nonzero)
+            labels = _derived_labels(legend = "{0}/{1}".format(labels["legend"], labels2["legend"]),
+                    xlabel = labels["xlabel"], fmt = labels["fmt"], color = labels["color"])
+        elif self._operation == "divide_number":
+            number = self._operands[1]
+            new_y = NewNumberArray(y, stat_err) / number
+            arrays = [new_y.x, ymin/number.x, ymax/number.x, new_y.dx]
+        else:
+            raise Exception("Unknown operation {0}".format(self._operation))
+        return arrays, mask, labels
+
+    @profiling.instrument("plot.lazy_evaluate", size = profiling.size_of_result)
+    def evaluate(self):
+        """
+        Evaluates the expression tree (only the first time) and returns the resulting Plot
+        """
+        if self._result is not None:
+            return self._result
+        reference = self._check_compatibility()
+        if self._operation == "leaf":
+            result = reference
+        else:
+            (y, ymin, ymax, stat_err), mask, labels = self._compute()
+            x_arrays = [np.asarray(i) for i in (reference.x, reference.xmin, reference.xmax)]
+            if mask is not None:
+                x_arrays = [i[mask] for i in x_arrays]
+                y, ymin, ymax, stat_err = y[mask], ymin[mask], ymax[mask], stat_err[mask]
+            result = Plot._from_arrays(*x_arrays, y, ymin, ymax, stat_err)
+            for key, value in labels.items():
+                setattr(result, key, value)
+        object.__setattr__(self, "_result", result)
+        return result
+
+    # Everything else is forwarded to the evaluated Plot
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.evaluate(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.evaluate(), name, value)
+
+    def __str__(self):
+        if self._result is not None:
+            return str(self._result)
+        return "Lazy plot ({0})".format(self._operation)
+
+    # Plot Algebra
+    def _node(self, operation, other, factor = 1.0):
+        if isinstance(other, Plot):
+            other = other.lazy()
+        if not isinstance(other, LazyPlot):
+            raise Exception("Operation between types 'LazyPlot' and '{0}' not implemented".format(type(other)))
+        return LazyPlot(operation, [self, other], factor = factor)
+
+    def __add__(self, plot):
+        return self._node("sum", plot, factor = 1.0)
+    def __sub__(self, plot):
+        return self._node("sum", plot, factor = -1.0)
+
+    def __truediv__(self, divider):
+        if isinstance(divider, (Plot, LazyPlot)):
+            return self._node("ratio", divider)
+        elif isinstance(divider, float):
+            return LazyPlot("divide_number", [self, NewNumber(divider, 0.0)])
+        elif isinstance(divider, (tuple, list)):
+            return LazyPlot("divide_number", [self, NewNumber(divider[0], divider[1])])
+        else:
+            raise Exception("Division between types 'LazyPlot' and '{0}' not implemented".format(type(divider)))
+
+def _combine(mask1, mask2):
+    if mask1 is None:
+        return mask2
+    if mask2 is None:
+        return mask1
+    return mask1 & mask2
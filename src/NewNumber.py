@@ -1,6 +1,104 @@
+import math
 import numpy as np
 import decimal as dec
 
+def _is_array(number):
+    from .NewNumberArray import NewNumberArray
+    return isinstance(number, NewNumberArray)
+
+def _as_array(number):
+    """ Promotes a NewNumber to a NewNumberArray, for operations with NewNumberArray """
+    from .NewNumberArray import NewNumberArray
+    return NewNumberArray(number.x, number.dx)
+
+def _scaled(x, power):
+    """ x/10**power, multiplying or dividing by an exact power of 10 """
+    return np.where(power <= 0, x*10.0**np.maximum(-power, 0), x/10.0**np.maximum(power, 0))
+
+def leading_digit(x):
+    """
+    Returns the power of 10 and the first significant digit of every (positive, finite) number in x,
+    the same digit str(x) starts with
+    """
+    x = np.asarray(x, dtype = float)
+    power = np.floor(np.log10(x))
+    # log10 can be off by one next to the powers of 10
+    scaled = _scaled(x, power)
+    power = power + (scaled >= 10.0) - (scaled < 1.0)
+    return power, np.floor(_scaled(x, power))
+
+# Largest number of decimals with an exact power of 10 and integers exact in a double
+_MAX_DECIMALS = 22
+_MAX_EXACT = 2.0**52
+
+def _two_product(a, b):
+    """ p, e such that p = fl(a*b) and a*b = p + e exactly (Dekker) """
+    p = a*b
+    split = 134217729.0 # 2**27 + 1
+    a_c = split*a
+    a_hi = a_c - (a_c - a)
+    a_lo = a - a_hi
+    b_c = split*b
+    b_hi = b_c - (b_c - b)
+    b_lo = b - b_hi
+    e = ((a_hi*b_hi - p) + a_hi*b_lo + a_lo*b_hi) + a_lo*b_lo
+    return p, e
+
+def _quantize_decimal(x, decimals, rounding):
+    f_n = dec.Decimal(str(pow(10, -decimals)))
+    return float(dec.Decimal(float(x)).quantize(f_n, rounding = rounding))
+
+def _quantize_float(x, decimals, away_from_zero):
+    """ quantize for a single number, with python floats """
+    decimals = max(int(decimals), 0)
+    if decimals <= _MAX_DECIMALS:
+        scale = 10.0**decimals
+        p, e = _two_product(abs(x), scale)
+        if p < _MAX_EXACT:
+            if away_from_zero:
+                k = math.ceil(p)
+                if k == p and e > 0.0:
+                    k += 1
+            else:
+                k = math.floor(p)
+                if k == p and e < 0.0:
+                    k -= 1
+            return math.copysign(k/scale, x)
+    return _quantize_decimal(x, decimals, dec.ROUND_UP if away_from_zero else dec.ROUND_DOWN)
+
+def quantize(x, decimals, away_from_zero):
+    """
+    Rounds x (a number or an array) to decimals places (a number or an array), away from zero or toward zero,
+    with the same result as decimal.Decimal(x).quantize(10**-decimals, rounding = ROUND_UP or ROUND_DOWN)
+    on the exact binary value of x, without going through Decimal
+    As NewNumber.ceil and NewNumber.floor always did, negative decimals round to integers
+    The remainder of x*10**decimals is kept exactly, so ie 0.1 (slightly above 1/10) rounds up to 0.2 with 1 decimal
+    """
+    if isinstance(x, (float, int, np.number)) and isinstance(decimals, (int, np.integer)):
+        return _quantize_float(float(x), decimals, away_from_zero)
+    x = np.asarray(x, dtype = float)
+    decimals = np.maximum(decimals, 0)
+    scale = 10.0**np.minimum(decimals, _MAX_DECIMALS)
+    with np.errstate(invalid = "ignore"):
+        # inf and nan go to Decimal below
+        p, e = _two_product(np.abs(x), scale)
+    # abs(x)*scale = p + e, p is only an integer when the exact product is next to one
+    if away_from_zero:
+        k = np.ceil(p)
+        k = k + ((k == p) & (e > 0.0))
+    else:
+        k = np.floor(p)
+        k = k - ((k == p) & (e < 0.0))
+    result = np.copysign(k/scale, x)
+    slow = ~(p < _MAX_EXACT) | (decimals > _MAX_DECIMALS)
+    if np.any(slow):
+        # Too many digits (or not a number) for a double, let Decimal do it
+        rounding = dec.ROUND_UP if away_from_zero else dec.ROUND_DOWN
+        x, decimals, slow = np.broadcast_arrays(x, decimals, slow)
+        result = np.array(np.broadcast_to(result, x.shape))
+        result[slow] = [_quantize_decimal(i, int(j), rounding) for i, j in zip(x[slow], decimals[slow])]
+    return result
+
 class NewNumber:
 
     """
@@ -19,41 +117,16 @@ class NewNumber:
             self.x = float(x)
             self.dx = float(dx)
 
-    def _retrieve_first_digit(self, nonzero = False):
+    def _autogenerate_precision(self):
         """
-        Retrieves first digit of the number and the stat error on the number
-        if nonzero = True, returns the first number which is non 0
+        Up to the first significant digit of the error (the first two if it is a 1), none for self.dx > 1.0
+        Same rule as the batch formatting of NewNumberArray, see uncertainty_precision
         """
-        str_x = str(self.x).replace(".", "").replace("-","")
-        str_dx = str(self.dx).replace(".", "").replace("-","")
-        
-        if nonzero:
-            if self.x != 0.0:
-                str_x = str_x.replace("0", "")
-            if self.dx != 0.0:
-                str_dx = str_dx.replace("0", "")
-
-        f_x = int(str_x[0])
-        f_dx = int(str_dx[0])
-
-        return f_x, f_x
-        
-    def _autogenerate_precision(self):
         if self.prec:
             # Precision has been set from outside
             return 
-        precision = np.floor(np.log10(self.dx))
-
-        # If the error's first number is 1, get an extra digit!
-        _, first_digit = self._retrieve_first_digit(nonzero = True)
-        if first_digit == 1:
-            precision -= 1
-
-        if precision > 0:
-            # Use the full number for self.dx > 1.0
-            self.set_precision(0)
-        else:
-            self.set_precision(-int(precision))
+        from .NewNumberArray import uncertainty_precision
+        self.set_precision(int(uncertainty_precision(self.dx)))
 
     def power_of_10(self, partition = 1):
         """
@@ -65,39 +138,35 @@ class NewNumber:
             (ie, if partition = 2: 152 = 15.2 * 10)
         """
         pow10 = np.floor(np.log10(self.x))
-        f, _ = self._retrieve_first_digit(nonzero = True)
+        _, f = leading_digit(self.x)
         if f < partition:
             pow10 -= 1
 
         return int(pow10)
 
     def ceil(self, decimals = 0):
+        """
+        Rounds x and dx up to decimals places (away from zero, see quantize), decimals = 0 is np.ceil
+        """
         if decimals == 0:
             new_x = np.ceil(self.x)
             new_dx = np.ceil(self.dx)
         else:
-            f_x = dec.Decimal(self.x)
-            f_dx = dec.Decimal(self.dx)
-            base_n = str(pow(10,-decimals))
-            f_n = dec.Decimal(base_n)
-            
-            new_x = f_x.quantize(f_n, rounding=dec.ROUND_UP)
-            new_dx = f_dx.quantize(f_n, rounding=dec.ROUND_UP)
+            new_x = quantize(self.x, decimals, away_from_zero = True)
+            new_dx = quantize(self.dx, decimals, away_from_zero = True)
 
         return NewNumber(new_x, new_dx)
 
     def floor(self, decimals = 0):
+        """
+        Rounds x and dx down to decimals places (toward zero, see quantize), decimals = 0 is np.floor
+        """
         if decimals == 0:
             new_x = np.floor(self.x)
             new_dx = np.floor(self.dx)
         else:
-            f_x = dec.Decimal(self.x)
-            f_dx = dec.Decimal(self.dx)
-            base_n = str(pow(10,-decimals))
-            f_n = dec.Decimal(base_n)
-            
-            new_x = f_x.quantize(f_n, rounding=dec.ROUND_DOWN)
-            new_dx = f_dx.quantize(f_n, rounding=dec.ROUND_DOWN)
+            new_x = quantize(self.x, decimals, away_from_zero = False)
+            new_dx = quantize(self.dx, decimals, away_from_zero = False)
 
         return NewNumber(new_x, new_dx)
 
@@ -132,6 +201,8 @@ class NewNumber:
         Overloads the addition and subtraction operations
         returns a new instance of NewNumber
         """
+        if _is_array(number):
+            return _as_array(self)._sum_n(number, factor = factor)
         x, dx = self._parse_number(number)
         new_x = self.x + factor*x
         new_dx = np.sqrt(pow(self.dx, 2) + pow(dx, 2))
@@ -172,6 +243,8 @@ class NewNumber:
         return self._sum_n(number, factor = -1.0)
 
     def __truediv__(self, number):
+        if _is_array(number):
+            return _as_array(self) / number
         x, dx = self._parse_number(number)
         new_x = self.x / x
         a = pow( self.dx/x , 2)
@@ -180,6 +253,8 @@ class NewNumber:
         return NewNumber(new_x, new_dx)
 
     def __mul__(self, number):
+        if _is_array(number):
+            return _as_array(self) * number
         x, dx = self._parse_number(number)
         new_x = self.x * x
         new_dx = np.sqrt( pow(x*self.dx,2) + pow(self.x*dx,2) )
@@ -0,0 +1,158 @@
+import numpy as np
+from .NewNumber import NewNumber, quantize, leading_digit
+
+# "x +/- dx" in every output format
+UNCERTAINTY_FORMATS = {
+        "plain" : "{0} +/- {1}",
+        "latex" : "${0} \\pm {1}$",
+        "html" : "{0} &plusmn; {1}",
+        }
+
+def uncertainty_precision(dx):
+    """
+    Number of decimal places str(NewNumber(x, dx)) uses for every error in dx:
+    up to the first significant digit of the error (the first two if that digit is 1), no decimals for errors above 1
+    """
+    dx = np.abs(np.asarray(dx, dtype = float))
+    valid = np.isfinite(dx) & (dx > 0.0)
+    power, first_digit = leading_digit(np.where(valid, dx, 1.0))
+    precision = power - (first_digit == 1.0)
+    return np.where(valid, np.maximum(-precision, 0), 0).astype(int)
+
+def format_uncertainties(x, dx = None, mode = "plain", precision = None):
+    """
+    Returns the list of strings "x +/- dx" for arrays of values x and errors dx,
+    rounded as str(NewNumber(x, dx)) (see uncertainty_precision), entries with dx = 0 are str(x)
+    x can also be a NewNumberArray or a sequence of NewNumber (ie, a column of a DataTable) with dx = None
+    mode: "plain", "latex" or "html" (see UNCERTAINTY_FORMATS)
+    precision: number of decimal places of every entry, to override the automatic one
+    """
+    if mode not in UNCERTAINTY_FORMATS:
+        raise Exception("Unknown format {0}, use one of {1}".format(mode, list(UNCERTAINTY_FORMATS)))
+    if dx is None:
+        if isinstance(x, NewNumberArray):
+            x, dx = x.x, x.dx
+        else:
+            x, dx = [i.x for i in x], [i.dx for i in x]
+    x = np.asarray(x, dtype = float)
+    dx = np.asarray(dx, dtype = float)
+    if precision is None:
+        precision = uncertainty_precision(dx)
+    pattern = UNCERTAINTY_FORMATS[mode].format("%.*f", "%.*f")
+    x_list = x.tolist()
+    strings = [pattern % (p, a, p, b) for p, a, b in zip(np.broadcast_to(precision, x.shape).tolist(), x_list, dx.tolist())]
+    for i in np.flatnonzero(dx == 0.0):
+        strings[i] = str(x_list[i])
+    return strings
+
+class NewNumberArray:
+
+    """
+        NewNumberArray(x, dx)
+        where x and dx are arrays of values and the errors associated with them
+        Array version of NewNumber: overloads the sum/subtraction/multiplication/division operations
+        with the same error propagation as NewNumber, element-wise
+        Operations broadcast against scalars, arrays, NewNumber and NewNumberArray
+    """
+
+    # Make numpy defer to our reflected operations (ie, np.array + NewNumberArray)
+    __array_ufunc__ = None
+
+    def __init__(self, x, dx = 0.0):
+        self.x = np.array(x, dtype = float)
+        self.dx = np.zeros_like(self.x) + np.asarray(dx, dtype = float)
+
+    def _parse_number(self, number):
+        """
+        Checks type of number and returns
+        x and dx
+        if type(x) == float, int or np.ndarray, dx = 0.0
+        """
+        if isinstance(number, (type(self), NewNumber)):
+            x = number.x
+            dx = number.dx
+        elif isinstance(number, (float, int, np.number, np.ndarray, list, tuple)):
+            x = np.asarray(number, dtype = float)
+            dx = 0.0
+        else:
+            raise Exception("Operation with type {0} not implemented".format(type(number)))
+        return x, dx
+
+    def _sum_n(self, number, factor = 1.0):
+        """
+        Overloads the addition and subtraction operations
+        returns a new instance of NewNumberArray
+        """
+        x, dx = self._parse_number(number)
+        new_x = self.x + factor*x
+        new_dx = np.sqrt(pow(self.dx, 2) + pow(dx, 2))
+        return NewNumberArray(new_x, new_dx)
+
+    def _divide(self, x, dx, y, dy):
+        new_x = x / y
+        a = pow( dx/y , 2)
+        b = pow( dy*x/y/y, 2)
+        return NewNumberArray(new_x, np.sqrt(a + b))
+
+    def ceil(self, decimals = 0):
+        """ Element-wise NewNumber.ceil """
+        if decimals == 0:
+            return NewNumberArray(np.ceil(self.x), np.ceil(self.dx))
+        return NewNumberArray(quantize(self.x, decimals, away_from_zero = True), quantize(self.dx, decimals, away_from_zero = True))
+
+    def floor(self, decimals = 0):
+        """ Element-wise NewNumber.floor """
+        if decimals == 0:
+            return NewNumberArray(np.floor(self.x), np.floor(self.dx))
+        return NewNumberArray(quantize(self.x, decimals, away_from_zero = False), quantize(self.dx, decimals, away_from_zero = False))
+
+    def round(self, decimals = 0):
+        return NewNumberArray(np.round(self.x, decimals = decimals), np.round(self.dx, decimals = decimals))
+
+    def to_strings(self, mode = "plain"):
+        """
+        List with every entry as str(NewNumber) would print it (see format_uncertainties)
+        """
+        return format_uncertainties(self.x, self.dx, mode = mode)
+
+    ####### Intrinsic overrides
+    def __str__(self):
+        return "NewNumberArray(x = {0}, dx = {1})".format(self.x, self.dx)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, item):
+        x = self.x[item]
+        dx = self.dx[item]
+        if np.ndim(x) == 0:
+            return NewNumber(x, dx)
+        return NewNumberArray(x, dx)
+
+    # Operations override
+
+    def __add__(self, number):
+        return self._sum_n(number, factor = 1.0)
+    def __sub__(self, number):
+        return self._sum_n(number, factor = -1.0)
+    def __radd__(self, number):
+        return self._sum_n(number, factor = 1.0)
+    def __rsub__(self, number):
+        return NewNumberArray(-self.x, self.dx)._sum_n(number, factor = 1.0)
+    def __neg__(self):
+        return NewNumberArray(-self.x, self.dx)
+
+    def __truediv__(self, number):
+        x, dx = self._parse_number(number)
+        return self._divide(self.x, self.dx, x, dx)
+    def __rtruediv__(self, number):
+        x, dx = self._parse_number(number)
+        return self._divide(x, dx, self.x, self.dx)
+
+    def __mul__(self, number):
+        x, dx = self._parse_number(number)
+        new_x = self.x * x
+        new_dx = np.sqrt( pow(x*self.dx,2) + pow(self.x*dx,2) )
+        return NewNumberArray(new_x, new_dx)
+    def __rmul__(self, number):
+        return self.__mul__(number)
@@ -2,7 +2,33 @@
 
 import numpy as np
 import copy
-from NewNumber import NewNumber
+from .NewNumber import NewNumber
+from .NewNumberArray import NewNumberArray
+from . import parse_cache
+from . import dat_reader
+from . import profiling
+
+def _sum_groups(array, starts, stops):
+    """
+    Sums array[..., starts[i]:stops[i]] for every i (along the last axis)
+    """
+    padded = np.concatenate([array, np.zeros(array.shape[:-1] + (1,))], axis = -1)
+    indices = np.empty(2*len(starts), dtype = int)
+    indices[0::2] = starts
+    indices[1::2] = stops
+    return np.add.reduceat(padded, indices, axis = -1)[..., 0::2]
+
+# A window whose bins add up (in absolute value) to less than 1/_CANCELLATION of the cumulative sum
+# up to its end is summed bin by bin instead of subtracting cumulative sums, see Plot._window_sums
+_CANCELLATION = 1e3
+
+def _widen(y, ymin, ymax, stat_err):
+    """
+    Envelope of a derived plot, the same Plot(x_data, y_data = [y, ymin, ymax, stat_err]) computes
+    """
+    new_ymax = np.maximum(np.maximum(ymin, ymax), y + stat_err)
+    new_ymin = np.minimum(np.minimum(ymin, ymax), y - stat_err)
+    return new_ymin, new_ymax
 
 class Plot:
 
@@ -16,18 +42,18 @@ class Plot:
     [x, xmin, xmax]
     [y, ymin, ymax, ymin, ymax, ymin, ymax, ... , stat_err]
     everything other than x and y is optional
+
+    For very large files, block_size = n reads the file in blocks of n rows to bound the memory usage
     """
 
+    sparse = False
+
     def __init__(self, filename = None, columns_x = [0,1,2], columns_y = [3,4,5,6], 
-            x_data = None, y_data = None):
-        self.xlabel = None  
-        self.ylabel = None
-        self.legend = None   
-        self.fmt = "."
-        self.color = None  
+            x_data = None, y_data = None, block_size = None):
+        self._init_parameters()
         if filename:
             self.filename = filename
-            self._unpack_from_file(filename, columns_x, columns_y)
+            self._unpack_from_file(filename, columns_x, columns_y, block_size = block_size)
         elif x_data and y_data:
             self.filename = "Derived plot"
             self._unpack_from_data(x_data, y_data)
@@ -36,6 +62,35 @@ class Plot:
         self._cook_data()
         self.rebinned = 1 # 1 == not-rebinned, 1:1 relation with the file
 
+    def _init_parameters(self):
+        self.xlabel = None  
+        self.ylabel = None
+        self.legend = None   
+        self.fmt = "."
+        self.color = None  
+
+    @classmethod
+    def _from_arrays(cls, x, xmin, xmax, y, ymin, ymax, stat_err, filename = "Derived plot"):
+        """
+        Creates a Plot directly from its seven arrays, without computing any envelope
+        """
+        plot = cls.__new__(cls)
+        plot._init_parameters()
+        plot.filename = filename
+        plot.x, plot.xmin, plot.xmax = x, xmin, xmax
+        plot.y, plot.ymin, plot.ymax, plot.stat_err = y, ymin, ymax, stat_err
+        plot.y_variations = None
+        plot._cook_data()
+        plot.rebinned = 1
+        return plot
+
+    def lazy(self):
+        """
+        Returns a LazyPlot wrapping this plot: the algebra done with it is evaluated only once
+        when the result is first used, see LazyPlot
+        """
+        return LazyPlot.from_plot(self)
+
     # Setters
 
     def set_label_parameters(self, xlabel = None, ylabel = None, legend = None, title = None):
@@ -57,10 +112,13 @@ class Plot:
         if not self.quiet:
             print(msg)
 
+    @profiling.instrument("plot.envelope", size = profiling.size_of_argument)
     def _create_envelope(self, arrays, mode_x = False):
         """
         From some set of arrays it returns a central value, a minimum and maximum
+        The arrays are stacked into a single (n_arrays, n_points) matrix and reduced along the first axis
         """
+        arrays = np.asarray(arrays, dtype = float)
         la = len(arrays)
         center = np.array(arrays[0])
         if la == 1:
@@ -69,32 +127,46 @@ class Plot:
         elif la == 2 and mode_x:
             min_arr = np.array(arrays[0])
             max_arr = np.array(arrays[1])
-            center  = np.array([ (i+j)/2.0 for i,j in zip(min_arr, max_arr) ])
+            center  = (min_arr + max_arr)/2.0
         elif la == 2:
-            error = np.array(arrays[1])
+            error = arrays[1]
             min_arr = center - error
             max_arr = center + error
         else:
-            max_l = []
-            min_l = []
-            n_points = len(center)
             if la % 2 == 0:
-                error = np.array(arrays[-1])
-                la_wo = la-1
+                error = arrays[-1]
+                variations = arrays[1:-1]
             else:
-                error = np.zeros(n_points)
-                la_wo = la
-            for i in range(n_points):
-                l = [array[i] for array in arrays[1:la_wo]]
-                max_l.append(max(max(l), center[i]+error[i]))
-                min_l.append(min(min(l), center[i]-error[i]))
-            min_arr = np.array(min_l)
-            max_arr = np.array(max_l)
+                error = 0.0
+                variations = arrays[1:]
+            max_arr = np.maximum(variations.max(axis = 0), center + error)
+            min_arr = np.minimum(variations.min(axis = 0), center - error)
         return center, min_arr, max_arr
 
-    def _unpack_from_file(self, filename, columns_x, columns_y, comments = ["#", "@"]):
+    def recompute_envelope(self, rows = None):
+        """
+        Recomputes y, ymin, ymax (and stat_err) from the variation matrix stored at load time
+        rows: indices of the rows of self.y_variations to use, following the same rules as columns_y
+              (first row is the central value and, for an even number of rows, the last one is the stat error)
+        """
+        if self.y_variations is None:
+            raise Exception("This plot does not hold the raw variations, can't recompute the envelope")
+        if rows is None:
+            rows = range(len(self.y_variations))
+        rows = list(rows)
+        variations = self.y_variations[rows]
+        self.y, self.ymin, self.ymax = self._create_envelope(variations)
+        if len(rows) % 2 == 0:
+            self.stat_err = np.array(variations[-1])
+        else:
+            self.stat_err = np.zeros(len(self.x))
+        self.invalidate()
+
+    @profiling.instrument("plot.load", size = profiling.size_of_self)
+    def _unpack_from_file(self, filename, columns_x, columns_y, comments = ["#", "@"], block_size = None):
         """
-        Given a file name, uses np.loadtxt to open it and load it to the x, x_min, x_max (and y) members
+        Given a file name, uses dat_reader to open it and load it to the x, x_min, x_max (and y) members
+        (or the binary parse_cache, if enabled)
         columns_x = [x, xmin, xmax]
         columns_y = [y, ymin, ymax, ymin2, ymax2, ..., stat_err] 
                     all but x and y are optional
@@ -103,19 +175,62 @@ class Plot:
         if only one column is given in y, ymin=ymax=y
         Note: it could happen that a member of ymin is greater than a member of ymax
             we will shift members around to avoid that
+        if block_size is given, the file is streamed in blocks of block_size rows (see _unpack_from_file_streaming)
         """
         columns_x = list(columns_x)
         columns_y = list(columns_y)
-        last_col = max(columns_x + columns_y)
-        data = np.loadtxt(filename, comments=comments, usecols=range(last_col + 1), unpack=True, ndmin = 2)
+        # Only the columns used are parsed, data holds them in the order of usecols
+        usecols = sorted(set(columns_x + columns_y))
+        row = {column : i for i, column in enumerate(usecols)}
+        rows_x = [row[i] for i in columns_x]
+        rows_y = [row[i] for i in columns_y]
+        if block_size:
+            self._unpack_from_file_streaming(filename, usecols, rows_x, rows_y, comments, block_size)
+            return
+        loader = lambda f: dat_reader.read_columns(f, usecols, comments = comments)
+        # If parse_cache is enabled, data might be a memory-mapped array
+        data = parse_cache.load(filename, columns_x, columns_y, comments, loader)
+        if data.shape[1] == 0:
+            raise Exception("No data found in {0}".format(filename))
     
-        self.x, self.xmin, self.xmax = self._create_envelope(data[columns_x], mode_x = True)
-        self.y, self.ymin, self.ymax = self._create_envelope(data[columns_y])
+        # Keep the raw variations around so the envelope can be recomputed without re-reading the file
+        self.y_variations = data[rows_y]
+        arrays = self._arrays_from_columns(data, rows_x, rows_y)
+        self.x, self.xmin, self.xmax, self.y, self.ymin, self.ymax, self.stat_err = arrays
 
+    def _unpack_from_file_streaming(self, filename, usecols, rows_x, rows_y, comments, block_size):
+        """
+        Same as _unpack_from_file but the file is read (in a single pass) in blocks of block_size lines
+        which are reduced straight away, so only the reduced arrays of every block are kept
+        and they are joined one array at a time: the peak memory is bounded by the output plus one block and one array
+        The raw variations (y_variations) are not kept in this mode
+        """
+        pieces = [[] for _ in range(7)]
+        for block in dat_reader.iter_blocks(filename, usecols, block_size, comments):
+            for piece, block_array in zip(pieces, self._arrays_from_columns(block, rows_x, rows_y)):
+                piece.append(block_array)
+        if not pieces[0]:
+            raise Exception("No data found in {0}".format(filename))
+        arrays = []
+        while pieces:
+            piece = pieces.pop(0)
+            arrays.append(np.concatenate(piece))
+            del piece[:]
+        self.y_variations = None
+        self.x, self.xmin, self.xmax, self.y, self.ymin, self.ymax, self.stat_err = arrays
+
+    def _arrays_from_columns(self, data, columns_x, columns_y):
+        """
+        Given the unpacked columns of a file returns x, xmin, xmax, y, ymin, ymax, stat_err
+        columns_x, columns_y are the rows of data holding each column
+        """
+        x, xmin, xmax = self._create_envelope(data[columns_x], mode_x = True)
+        y, ymin, ymax = self._create_envelope(data[columns_y])
         if len(columns_y) % 2 == 0:
-            self.stat_err = data[columns_y[-1]]
+            stat_err = np.array(data[columns_y[-1]])
         else:
-            self.stat_err = np.zeros(len(self.x))
+            stat_err = np.zeros(len(x))
+        return x, xmin, xmax, y, ymin, ymax, stat_err
 
 
     def _unpack_from_data(self, x_data, y_data):
@@ -130,7 +245,8 @@ class Plot:
         everything but the central values (x,y) are optional, see _unpack_from_file for details
         """
         self.x, self.xmin, self.xmax = self._create_envelope(x_data)
-        self.y, self.ymin, self.ymax = self._create_envelope(y_data)
+        self.y_variations = np.asarray(y_data, dtype = float)
+        self.y, self.ymin, self.ymax = self._create_envelope(self.y_variations)
 
         if len(y_data) % 2 == 0:
             self.stat_err = y_data[-1]
@@ -139,62 +255,109 @@ class Plot:
 
     # Data treatment
 
-    def rebin(self, nrebin = 2):
+    @profiling.instrument("plot.rebin", size = profiling.size_of_self)
+    def rebin(self, nrebin = 2, edges = None):
         """
-        Join together every two bins (work in progress) 
-        TODO: make it work for non-equal bin sizes 
+        Join together bins, either:
+            every nrebin bins, counted with respect to the binning of the file
+                (ie, rebin(2) followed by rebin(4) joins the bins of the file four by four)
+            or into the bins defined by the array of target bin edges,
+                which need to coincide with edges of the current bins.
+                After this the current binning becomes the reference for nrebin
+        y, ymin and ymax are averaged weighted by the width of the bins, stat_err is added in quadrature
+        Works for variable-width bins, but not across gaps between bins (ie, bins dropped by a ratio): that raises an exception
         """
-        if self.rebinned >= nrebin:
-            print("Plot already rebinned for n={0}".format(nrebin))
+        groups = self._rebin_groups(nrebin, edges, self.xmin, self.xmax)
+        if groups is None:
             return
-        nrebin = int(nrebin/self.rebinned)
-        nrebin_f = float(nrebin)
-        total_n = len(self.y)
-        xm = [] ; xc = [] ; xp = [];
-        ny = [] ; ndy = [] ; nym = [] ; nyp = []
-        for n in range(nrebin-1, total_n, nrebin):
-            left_bin = n-(nrebin-1)
-            right_bin = n
-            # Sanity check
-            if nrebin == 2 and self.xmax[n-1] != self.xmin[n]:
-                print("Something went wront")
-                raise Exception("Broken function rebin Plot.py")
-            xleft = self.xmin[left_bin]
-            xright = self.xmax[right_bin]
-            xcenter = xleft + (xright-xleft)/2.0
-            xm.append(xleft)
-            xc.append(xcenter)
-            xp.append(xright)
-
-            ymax = sum(self.ymax[left_bin : n+1])/nrebin_f
-            nyp.append(ymax)
-
-            ymin = sum(self.ymin[left_bin : n+1])/nrebin_f
-            nym.append(ymin)
-        
-            yc = NewNumber(0.0, 0.0)
-            for i, di in zip(self.y[left_bin:n+1], self.stat_err[left_bin:n+1]):
-                yc += NewNumber(i, di)
-            yc = yc/nrebin_f
-            
-            ny.append(yc.x)
-            ndy.append(yc.dx)
-
-        self.xmax     = np.array(xp)
-        self.xmin     = np.array(xm)
-        self.x        = np.array(xc)
-        self.ymin     = np.array(nym)
-        self.ymax     = np.array(nyp)
-        self.y        = np.array(ny)
-        self.stat_err = np.array(ndy)
+        starts, stops, new_rebinned = groups
+
+        width = self.xmax - self.xmin
+        if np.any(width <= 0.0):
+            # Points rather than bins, just average them
+            width = np.ones_like(width)
+        total_width = _sum_groups(width, starts, stops)
+
+        def average(array):
+            return _sum_groups(array*width, starts, stops)/total_width
+
+        new_xmin = self.xmin[starts]
+        new_xmax = self.xmax[stops - 1]
+        self.xmin = new_xmin
+        self.xmax = new_xmax
+        self.x = (new_xmin + new_xmax)/2.0
+        self.ymin = average(self.ymin)
+        self.ymax = average(self.ymax)
+        self.y = average(self.y)
+        self.stat_err = np.sqrt(_sum_groups(pow(self.stat_err*width, 2), starts, stops))/total_width
+        if self.y_variations is not None:
+            variations = _sum_groups(self.y_variations*width, starts, stops)/total_width
+            if len(self.y_variations) % 2 == 0:
+                variations[-1] = np.sqrt(_sum_groups(pow(self.y_variations[-1]*width, 2), starts, stops))/total_width
+            self.y_variations = variations
         self._cook_data()
-        self.rebinned = nrebin*self.rebinned
-            
+        self.rebinned = new_rebinned
 
+    def _rebin_groups(self, nrebin, edges, xmin, xmax):
+        """
+        Returns the first and (one past the) last bin of each of the groups of bins rebin joins
+        for the binning given by xmin, xmax, and the new value of self.rebinned
+        Returns None if there is nothing to do
+        Bins are only joined with their neighbours if there is no gap between them
+        (ie, a ratio which dropped some bins can't be rebinned across them)
+        """
+        if edges is not None:
+            starts, stops = self._bin_groups_from_edges(edges, xmin, xmax)
+            new_rebinned = 1
+        else:
+            if self.rebinned >= nrebin:
+                print("Plot already rebinned for n={0}".format(nrebin))
+                return None
+            if nrebin % self.rebinned != 0:
+                raise Exception("Can't rebin a plot rebinned for n={0} with n={1}".format(self.rebinned, nrebin))
+            factor = nrebin // self.rebinned
+            n_groups = len(xmin) // factor
+            if n_groups == 0:
+                raise Exception("Not enough bins to rebin with n={0}".format(nrebin))
+            starts = np.arange(n_groups)*factor
+            stops = starts + factor
+            new_rebinned = nrebin
+        if np.all(xmax > xmin):
+            # Every bin but the last one of its group needs to end where the next one starts
+            inner = np.ones(len(xmin), dtype = bool)
+            inner[stops - 1] = False
+            inner[:starts[0]] = False
+            inner[stops[-1]:] = False
+            inner = np.flatnonzero(inner)
+            if not np.allclose(xmax[inner], xmin[inner + 1]):
+                raise Exception("Can't rebin across a gap between bins")
+        return starts, stops, new_rebinned
+
+    def _bin_groups_from_edges(self, edges, xmin, xmax):
+        """
+        Returns the first and (one past the) last bin of the binning given by xmin, xmax
+        that fall in each of the target bins defined by edges
+        """
+        edges = np.asarray(edges, dtype = float)
+        if edges.ndim != 1 or len(edges) < 2 or np.any(np.diff(edges) <= 0.0):
+            raise Exception("The edges for rebin need to be an increasing array of at least two numbers")
+        if np.any(np.diff(xmin) < 0.0) or np.any(np.diff(xmax) < 0.0):
+            raise Exception("Can only rebin plots with ordered bins")
+        starts = np.searchsorted(xmin, edges[:-1], side = "left")
+        stops = np.searchsorted(xmax, edges[1:], side = "right")
+        valid = (starts < len(xmin)) & (stops > starts)
+        if not np.all(valid) \
+                or not np.allclose(xmin[starts], edges[:-1]) \
+                or not np.allclose(xmax[stops - 1], edges[1:]):
+            raise Exception("The edges for rebin need to coincide with edges of the current bins")
+        return starts, stops
+
+    @profiling.instrument("plot.cook", size = profiling.size_of_self)
     def _cook_data(self):
         """
         Ensures xmin/xmax actually make sense
         """
+        self.invalidate()
         if self.x.shape == () or len(self.x) == 1:
             # We are dealing with a scalar
             self.xmin = self.x
@@ -205,29 +368,137 @@ class Plot:
             self.xmin = np.array([i-delta/2.0 for i in self.x])
             self.xmax = np.array([i+delta/2.0 for i in self.x])
 
+    def invalidate(self):
+        """
+        Drops the integral index (see _integral_index), it will be rebuilt on the next integral or total
+        Needed after editing the data arrays in place (ie, plot.y *= 2), replacing them is detected automatically
+        """
+        self._index = None
+
+    def _integral_index(self):
+        """
+        Lazily built index of cumulative sums over the bins of the plot
+        (y*dx, ymax*dx, ymin*dx and stat_err^2 for the integrals, y for the totals)
+        so that any window of x can be computed with a searchsorted and a subtraction
+        The index is rebuilt whenever one of the data arrays of the plot is replaced
+        (or after invalidate, which rebin, recompute_envelope and the derived plots call)
+        """
+        arrays = (self.x, self.xmin, self.xmax, self.y, self.ymin, self.ymax, self.stat_err)
+        index = getattr(self, "_index", None)
+        if index is not None and all(i is j for i, j in zip(index["arrays"], arrays)):
+            return index
+
+        x, xmin, xmax, y, ymin, ymax, stat_err = [np.atleast_1d(np.asarray(i, dtype = float)) for i in arrays]
+        cumsum = lambda array: np.concatenate([[0.0], np.cumsum(array)])
+        width = xmax - xmin
+        values = {
+                "y" : y*width,
+                "ymax" : ymax*width,
+                "ymin" : ymin*width,
+                "err2" : stat_err*stat_err,
+                "total_y" : y,
+                }
+        index = {
+                "arrays" : arrays,
+                "x" : x, "xmin" : xmin, "xmax" : xmax,
+                "sorted" : all(np.all(np.diff(i) >= 0.0) for i in (x, xmin, xmax)),
+                "values" : values,
+                "prefix" : {key : cumsum(value) for key, value in values.items()},
+                "abs_prefix" : {key : cumsum(np.abs(value)) for key, value in values.items()},
+                }
+        self._index = index
+        return index
+
+    def _window_sums(self, index, lower, upper, keys, edges):
+        """
+        For each window [lower[i], upper[i]] returns the sum of the bins inside of it for every key of the index
+        edges = (array for the lower bound, array for the upper bound) the bins are selected with
+        Windows much smaller than the bins before them (ie, the tail of a spectrum that spans many orders of magnitude)
+        would lose all their digits in the subtraction of the cumulative sums, those are summed bin by bin
+        """
+        lower = np.atleast_1d(np.asarray(lower, dtype = float))
+        upper = np.atleast_1d(np.asarray(upper, dtype = float))
+        low_edges, up_edges = edges
+        if index["sorted"]:
+            start = np.searchsorted(low_edges, lower, side = "left")
+            stop = np.maximum(np.searchsorted(up_edges, upper, side = "right"), start)
+            results = []
+            for key in keys:
+                prefix, abs_prefix = index["prefix"][key], index["abs_prefix"][key]
+                sums = prefix[stop] - prefix[start]
+                cancelled = np.flatnonzero((stop > start) &
+                        (abs_prefix[stop] > _CANCELLATION*(abs_prefix[stop] - abs_prefix[start])))
+                if len(cancelled):
+                    sums[cancelled] = _sum_groups(index["values"][key], start[cancelled], stop[cancelled])
+                results.append(sums)
+            return results
+        # Unsorted bins: no shortcut, use a mask per window
+        results = [np.empty(len(lower)) for _ in keys]
+        for i, (low, up) in enumerate(zip(lower, upper)):
+            inside = np.flatnonzero((low_edges >= low) & (up_edges <= up))
+            for result, key in zip(results, keys):
+                result[i] = np.sum(index["values"][key][inside])
+        return results
+
+    def _default_window(self):
+        """ Window of the integrals and totals when no bounds are given: the whole plot """
+        return np.atleast_1d(self.xmin)[0], np.atleast_1d(self.xmax)[-1]
+
+    def _single_point(self):
+        """
+        Plots with a single point have no width, their integral is the point itself whatever the window:
+        returns its (y, ymax, ymin, stat_err), None for any other plot
+        """
+        if np.size(self.x) != 1:
+            return None
+        return [np.atleast_1d(i)[0] for i in (self.y, self.ymax, self.ymin, self.stat_err)]
+
+    def _window_bounds(self, xmins, xmaxs):
+        if xmins is None or xmaxs is None:
+            default_min, default_max = self._default_window()
+            if xmins is None:
+                xmins = default_min
+            if xmaxs is None:
+                xmaxs = default_max
+        xmins, xmaxs = np.broadcast_arrays(np.asarray(xmins, dtype = float), np.asarray(xmaxs, dtype = float))
+        return np.atleast_1d(xmins), np.atleast_1d(xmaxs)
+
+    @profiling.instrument("plot.integrals", size = profiling.size_of_self)
+    def get_integral_envelopes(self, xmins = None, xmaxs = None):
+        """
+        Batch version of get_integral_envelope:
+        for arrays of window bounds returns arrays of (integral, integral of ymax, integral of ymin, error)
+        """
+        xmins, xmaxs = self._window_bounds(xmins, xmaxs)
+        single = self._single_point()
+        if single is not None:
+            return tuple(np.full(len(xmins), i, dtype = float) for i in single)
+        index = self._integral_index()
+        y, ymax, ymin, err2 = self._window_sums(index, xmins, xmaxs,
+                ["y", "ymax", "ymin", "err2"], (index["xmin"], index["xmax"]))
+        return y, ymax, ymin, np.sqrt(err2)
+
+    def get_integrals(self, xmins = None, xmaxs = None):
+        """
+        Batch version of get_integral, returns arrays of integrals and errors
+        """
+        y, _, _, dy = self.get_integral_envelopes(xmins, xmaxs)
+        return y, dy
+
+    @profiling.instrument("plot.totals", size = profiling.size_of_self)
+    def get_totals(self, xmins = None, xmaxs = None):
+        """
+        Batch version of get_total, returns arrays of totals and errors
+        """
+        xmins, xmaxs = self._window_bounds(xmins, xmaxs)
+        index = self._integral_index()
+        y, err2 = self._window_sums(index, xmins, xmaxs, ["total_y", "err2"], (index["x"], index["x"]))
+        return y, np.sqrt(err2)
+
     def _compute_integral(self, xmin = None, xmax = None):
-        if len(self.x) == 1:
-            return self.y[0], self.ymax[0], self.ymin[0],  self.stat_err[0]
-        if not xmin:
-            xmin = self.xmin[0]
-        if not xmax:
-            xmax = self.xmax[-1]
-
-        # [central y, ymax, ymin]
-        total_y = [0, 0, 0]
-        total_dy_sum = 0
-
-        for i, xmp in enumerate(zip(self.xmin, self.xmax)):
-            xm = xmp[0]
-            xp = xmp[1]
-            if (xm >= xmin) & (xp <= xmax):
-                total_y[0] += self.y[i]*(xp-xm)
-                total_y[1] += self.ymax[i]*(xp-xm)
-                total_y[2] += self.ymin[i]*(xp-xm)
-                total_dy_sum += pow(self.stat_err[i],2)
-        total_y.append(np.sqrt(total_dy_sum))
-
-        return tuple(total_y)
+        # [central y, ymax, ymin, error], a bound of 0 (or None) is the edge of the plot
+        total_y = self.get_integral_envelopes(xmin or None, xmax or None)
+        return tuple(i[0] for i in total_y)
 
     # Output functions
 
@@ -240,18 +511,8 @@ class Plot:
         return y, dy
 
     def get_total(self, xmin = None, xmax = None):
-        if not xmin:
-            xmin = self.xmin[0]
-        if not xmax:
-            xmax = self.xmax[-1]
-
-        y = self.y[ (self.x >= xmin) & (self.x <= xmax) ]
-        dy = self.stat_err[ (self.x >= xmin) & (self.x <= xmax) ]
-
-        total_y = sum(self.y[ (self.x >= xmin) & (self.x <= xmax) ])
-        total_dy = np.sqrt(sum([i*i for i in dy]))
-
-        return total_y, total_dy
+        total_y, total_dy = self.get_totals(xmin or None, xmax or None)
+        return total_y[0], total_dy[0]
 
 
     def output_columns(self):
@@ -270,11 +531,13 @@ class Plot:
         dy goes through error_y if given, otherwise is untreated
         """
         new_plot = copy.copy(self)
+        new_plot.y_variations = None
         new_plot.ymin = [function_y(i) for i in self.ymin]
         new_plot.ymax = [function_y(i) for i in self.ymax]
         new_plot.y = [function_y(i) for i in self.y]
         if error_y:
             new_plot.stat_err = [error_y(i) for i in self.stat_err]
+        new_plot.invalidate()
         return new_plot
 
     # Overloads
@@ -283,18 +546,17 @@ class Plot:
 
     def _divide_by_NewNumber(self, divide_number):
         new_plot = copy.copy(self)
+        new_plot.y_variations = None
         new_plot.ymin = self.ymin / divide_number.x
         new_plot.ymax = self.ymax / divide_number.x
         new_plot.y = self.y / divide_number.x
-        central_dy = []
-        for i, di in zip(self.y , self.stat_err):
-            ydy = NewNumber(i,di) / divide_number
-            central_dy.append(ydy.dx)
-        new_plot.stat_err = central_dy
+        new_plot.stat_err = (NewNumberArray(self.y, self.stat_err) / divide_number).dx
+        new_plot.invalidate()
         return new_plot
 
 
     # Plot Algebra
+    @profiling.instrument("plot.sum", size = profiling.size_of_self)
     def _sum_plot(self, plot, factor = 1.0):
         """
         Overloads the addition and subtraction operations
@@ -302,6 +564,10 @@ class Plot:
         It's vital than the two plots are 100% compatible
         ie, this function will sum all the y and needs that the x values are the same!
         """
+        if isinstance(plot, LazyPlot):
+            return self.lazy()._node("sum", plot, factor = factor)
+        if getattr(plot, "sparse", False):
+            return type(plot)(self)._sum_plot(plot, factor = factor)
         if not isinstance(plot, type(self)):
             return Exception("You are trying to sum a plot and a {0}, you monster!".format(type(plot)))
         # Check that the x, x.min, x.max values are exactly the same!
@@ -309,13 +575,10 @@ class Plot:
             return Exception("These two plots are not compatible")
 
         x_data = [self.x, self.xmin, self.xmax]
-        new_y = self.y + plot.y*factor
+        new_y = NewNumberArray(self.y, self.stat_err)._sum_n(NewNumberArray(plot.y, plot.stat_err), factor = factor)
         new_ymin = self.ymin + plot.ymin*factor
         new_ymax = self.ymax + plot.ymax*factor
-        new_stat_err = []
-        for i,j in zip(self.stat_err, plot.stat_err):
-            new_stat_err.append(np.sqrt(i*i + j*j))
-        y_data = [new_y, new_ymin, new_ymax, np.array(new_stat_err)]
+        y_data = [new_y.x, new_ymin, new_ymax, new_y.dx]
         new_plot = Plot(x_data = x_data, y_data = y_data)
         new_plot.set_label_parameters(xlabel = self.xlabel, ylabel = self.ylabel)
         return new_plot
@@ -325,28 +588,26 @@ class Plot:
     def __sub__(self, plot):
         return self._sum_plot(plot, factor = -1.0)
 
+    @profiling.instrument("plot.divide", size = profiling.size_of_self)
     def __truediv__(self, divider): 
-        if isinstance(divider, type(self)): # Ratio self / plot
+        if isinstance(divider, LazyPlot):
+            return self.lazy() / divider
+        elif getattr(divider, "sparse", False):
+            return type(divider)(self) / divider
+        elif isinstance(divider, type(self)): # Ratio self / plot
             plot = divider
             # Step 1, check that the x axis is the same in both plots
             if not np.array_equal(self.x, plot.x):
                 raise Exception("You are trying to take the ratio of two plots with different x axis")
-            x_data = [self.x [plot.y != 0.0],
-                    self.xmin [plot.y != 0.0],
-                    self.xmax [plot.y != 0.0]
-                    ]
+            # Bins where the denominator is 0 are dropped
+            nonzero = plot.y != 0.0
+            x_data = [self.x[nonzero], self.xmin[nonzero], self.xmax[nonzero]]
             # Take ratio of central values
-            min_y = [i/j for i,j in zip(self.ymin, plot.y) if j != 0.0]
-            max_y = [i/j for i,j in zip(self.ymax, plot.y) if j != 0.0]
-            central_y = []
-            central_dy = []
-            for i,j, di,dj in zip(self.y, plot.y, self.stat_err, plot.stat_err):
-                if j == 0.0:
-                    continue
-                ydy = NewNumber(i,di) / NewNumber(j, dj)
-                central_y.append(ydy.x)
-                central_dy.append(ydy.dx)
-            y_data = [central_y, min_y, max_y, central_dy]
+            denominator = plot.y[nonzero]
+            min_y = self.ymin[nonzero] / denominator
+            max_y = self.ymax[nonzero] / denominator
+            ratio = NewNumberArray(self.y[nonzero], self.stat_err[nonzero]) / NewNumberArray(denominator, plot.stat_err[nonzero])
+            y_data = [ratio.x, min_y, max_y, ratio.dx]
             new_plot = Plot(x_data = x_data, y_data = y_data)
             new_plot.set_label_parameters(legend = "{0}/{1}".format(self.legend, plot.legend))
             new_plot.set_label_parameters(xlabel = self.xlabel)
@@ -359,22 +620,5 @@ class Plot:
             raise Exception("Division between types 'Plot' and '{0}' not implemented".format(type(divider)))
         return new_plot
 
-        
-if __name__ == "__main__":
-    file1 = "test1.dat"
-    file2 = "test2.dat"
-
-    xcol = [1,0,2]
-    ycol = [3,4]
-
-    plot1 = Plot(file1, xcol, ycol)
-    plot2 = Plot(file2, xcol, ycol)
-
-    print(plot2.get_total())
-
-
-    plot1.output_columns()
-
-
-
-
+# LazyPlot builds on Plot, so it can only be imported once Plot is defined
+from .LazyPlot import LazyPlot
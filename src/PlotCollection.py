@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from .Plot import Plot
+
+def _load_plot(args):
+    """
+    Worker function, loads one Plot
+    Returns (plot, None) or (None, error message) so one broken file doesn't abort the whole batch
+    """
+    filename, plot_kwargs, label_kwargs, style_kwargs = args
+    try:
+        plot = Plot(filename, **plot_kwargs)
+        if label_kwargs:
+            plot.set_label_parameters(**label_kwargs)
+        if style_kwargs:
+            plot.set_plot_parameters(**style_kwargs)
+    except Exception as e:
+        return None, "{0}: {1}".format(type(e).__name__, e)
+    return plot, None
+
+class PlotCollection:
+
+    """
+    An ordered collection of Plot objects, loaded concurrently in a process pool
+
+        plots = PlotCollection.from_glob("runs/*.dat", columns_x = [1,0,2], columns_y = [3,4])
+        for plot in plots:
+            ...
+
+    Files that could not be loaded are not in the collection, they are listed in self.errors
+    as {filename : error message}
+    """
+
+    def __init__(self, plots = None, errors = None):
+        if plots is None:
+            plots = []
+        self.plots = list(plots)
+        self.errors = dict(errors) if errors else {}
+
+    @classmethod
+    def from_files(cls, filenames, columns_x = [0,1,2], columns_y = [3,4,5,6], workers = None,
+            legends = None, colors = None, block_size = None):
+        """
+        Loads every file in filenames, the order of the collection is the order of filenames
+        workers: number of processes (default: number of cpus), workers = 1 loads in the current process
+        legends, colors: optional lists (same length as filenames) with the legend and color of each plot
+        """
+        filenames = list(filenames)
+        if legends is None:
+            legends = len(filenames)*[None]
+        if colors is None:
+            colors = len(filenames)*[None]
+        if len(legends) != len(filenames) or len(colors) != len(filenames):
+            raise Exception("legends and colors need to have the same length as the list of files")
+
+        plot_kwargs = {"columns_x" : columns_x, "columns_y" : columns_y, "block_size" : block_size}
+        tasks = []
+        for filename, legend, color in zip(filenames, legends, colors):
+            label_kwargs = {"legend" : legend} if legend else None
+            style_kwargs = {"color" : color} if color else None
+            tasks.append((filename, plot_kwargs, label_kwargs, style_kwargs))
+
+        if workers == 1 or len(tasks) < 2:
+            results = [_load_plot(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers = workers) as executor:
+                # map keeps the order of the input
+                results = list(executor.map(_load_plot, tasks))
+
+        plots = []
+        errors = {}
+        for filename, (plot, error) in zip(filenames, results):
+            if error:
+                errors[filename] = error
+            else:
+                plots.append(plot)
+        return cls(plots, errors)
+
+    @classmethod
+    def from_glob(cls, pattern, **kwargs):
+        """
+        Loads every file matching pattern, sorted by name, see from_files for the options
+        """
+        return cls.from_files(sorted(glob.glob(pattern)), **kwargs)
+
+    @property
+    def filenames(self):
+        return [plot.filename for plot in self.plots]
+
+    def report_errors(self):
+        for filename, error in self.errors.items():
+            print("Could not load {0}: {1}".format(filename, error))
+
+    # Overloads
+    def __len__(self):
+        return len(self.plots)
+
+    def __iter__(self):
+        return iter(self.plots)
+
+    def __getitem__(self, item):
+        return self.plots[item]
+
+    def __str__(self):
+        return "PlotCollection with {0} plots ({1} errors)".format(len(self.plots), len(self.errors))
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from .NewNumberArray import NewNumberArray
+from .Plot import Plot, _widen, _sum_groups
+from . import profiling
+
+LABELS = ["filename", "xlabel", "ylabel", "legend", "fmt", "color", "rebinned"]
+
+class SparsePlot(Plot):
+
+    """
+    Sparse representation of a Plot, for mostly empty distributions
+    Only the occupied bins (those where any of y, ymin, ymax or stat_err is not 0) are stored,
+    together with the layout of the bins (bin_low, bin_high), which for contiguous bins is a single array of edges
+
+        sparse = SparsePlot(plot)
+
+    The usual x, xmin, xmax, y, ymin, ymax, stat_err members hold the occupied bins only,
+    so the drawing functions work as for a Plot,
+    the algebra, rebin, integrals and totals understand the full layout. to_dense() returns the equivalent Plot
+    memory_usage() compares the memory used with the dense representation
+    """
+
+    sparse = True
+
+    def __init__(self, plot):
+        self._init_parameters()
+        for key in LABELS:
+            setattr(self, key, getattr(plot, key))
+        xmin = np.atleast_1d(np.asarray(plot.xmin, dtype = float))
+        xmax = np.atleast_1d(np.asarray(plot.xmax, dtype = float))
+        self._set_layout(xmin, xmax)
+        y, ymin, ymax, stat_err = [np.atleast_1d(np.asarray(i, dtype = float))
+                for i in (plot.y, plot.ymin, plot.ymax, plot.stat_err)]
+        index = np.flatnonzero((y != 0.0) | (ymin != 0.0) | (ymax != 0.0) | (stat_err != 0.0))
+        x = np.atleast_1d(np.asarray(plot.x, dtype = float))
+        self._set_bins(index, x[index], y[index], ymin[index], ymax[index], stat_err[index])
+
+    def _set_layout(self, bin_low, bin_high):
+        """
+        Stores the layout of the bins, contiguous bins are stored as a single array of edges
+        """
+        if len(bin_low) > 1 and np.array_equal(bin_high[:-1], bin_low[1:]):
+            self._edges = np.append(bin_low, bin_high[-1])
+            self.bin_low = self._edges[:-1]
+            self.bin_high = self._edges[1:]
+        else:
+            self._edges = None
+            self.bin_low = bin_low
+            self.bin_high = bin_high
+
+    def _set_bins(self, index, x, y, ymin, ymax, stat_err):
+        """
+        Stores the occupied bins (index are their positions in the layout)
+        """
+        self.index = index
+        self.x = x
+        self.xmin = self.bin_low[index]
+        self.xmax = self.bin_high[index]
+        self.y, self.ymin, self.ymax, self.stat_err = y, ymin, ymax, stat_err
+        self.y_variations = None
+        self.invalidate()
+
+    @classmethod
+    def _from_layout(cls, reference, bin_low, bin_high, index, x, y, ymin, ymax, stat_err):
+        plot = cls.__new__(cls)
+        plot._init_parameters()
+        plot.filename = "Derived plot"
+        plot.rebinned = 1
+        if reference is not None and reference.bin_low is bin_low:
+            # Share the layout
+            plot._edges, plot.bin_low, plot.bin_high = reference._edges, reference.bin_low, reference.bin_high
+        else:
+            plot._set_layout(bin_low, bin_high)
+        plot._set_bins(index, x, y, ymin, ymax, stat_err)
+        return plot
+
+    @profiling.instrument("plot.cook", size = profiling.size_of_self)
+    def _cook_data(self):
+        pass
+
+    def lazy(self):
+        raise Exception("Lazy evaluation is not implemented for sparse plots")
+
+    def recompute_envelope(self, rows = None):
+        raise Exception("Sparse plots do not hold the raw variations, can't recompute the envelope")
+
+    # Conversions
+
+    def _dense_x(self):
+        x = (self.bin_low + self.bin_high)/2.0
+        x[self.index] = self.x
+        return x
+
+    def _scatter(self, array):
+        """ Dense version of one of the arrays of the occupied bins (zeros elsewhere) """
+        dense = np.zeros(len(self.bin_low))
+        dense[self.index] = array
+        return dense
+
+    def to_dense(self):
+        """
+        Returns the equivalent (dense) Plot
+        """
+        arrays = [self._scatter(i) for i in (self.y, self.ymin, self.ymax, self.stat_err)]
+        plot = Plot._from_arrays(self._dense_x(), self.bin_low.copy(), self.bin_high.copy(), *arrays)
+        for key in LABELS:
+            setattr(plot, key, getattr(self, key))
+        return plot
+
+    def memory_usage(self):
+        """
+        Returns a dictionary with the number of bins, the number of occupied bins
+        and the memory (in bytes) used by this plot and by the equivalent dense Plot
+        """
+        if self._edges is not None:
+            layout = self._edges.nbytes
+        else:
+            layout = self.bin_low.nbytes + self.bin_high.nbytes
+        bins = [self.index, self.x, self.xmin, self.xmax, self.y, self.ymin, self.ymax, self.stat_err]
+        n_bins = len(self.bin_low)
+        return {
+                "bins" : n_bins,
+                "occupied" : len(self.index),
+                "sparse_bytes" : layout + sum(i.nbytes for i in bins),
+                "dense_bytes" : 7*n_bins*np.dtype(float).itemsize,
+                }
+
+    def step_arrays(self):
+        """
+        x and y arrays for a step (where = 'post') drawing of the plot,
+        only the occupied bins and the points where the steps drop to 0 are included
+        """
+        index = self.index
+        n_bins = len(self.bin_low)
+        if len(index) == 0:
+            return np.array([self.bin_low[0], self.bin_high[-1]]), np.zeros(2)
+        # After the last bin of every run of occupied bins the step drops to 0
+        run_end = np.append(np.diff(index) != 1, True)
+        order = np.argsort(np.concatenate([2*np.arange(len(index)), 2*np.flatnonzero(run_end) + 1]))
+        step_x = np.concatenate([self.xmin, self.xmax[run_end]])[order]
+        step_y = np.concatenate([self.y, np.zeros(np.count_nonzero(run_end))])[order]
+        if index[0] > 0:
+            step_x = np.append(self.bin_low[0], step_x)
+            step_y = np.append(0.0, step_y)
+        if index[-1] < n_bins - 1:
+            step_x = np.append(step_x, self.bin_high[-1])
+            step_y = np.append(step_y, 0.0)
+        return step_x, step_y
+
+    # Integrals and totals
+
+    def _default_window(self):
+        """ The whole layout, not only the occupied bins """
+        return self.bin_low[0], self.bin_high[-1]
+
+    def _single_point(self):
+        """
+        Same as Plot._single_point for the dense plot: only when the layout has a single bin
+        """
+        if len(self.bin_low) != 1:
+            return None
+        return [i[0] if len(i) else 0.0 for i in (self.y, self.ymax, self.ymin, self.stat_err)]
+
+    # Data treatment
+
+    @profiling.instrument("plot.rebin", size = profiling.size_of_self)
+    def rebin(self, nrebin = 2, edges = None):
+        """
+        Same as Plot.rebin, the empty bins contribute with their width to the averages
+        """
+        groups = self._rebin_groups(nrebin, edges, self.bin_low, self.bin_high)
+        if groups is None:
+            return
+        starts, stops, new_rebinned = groups
+
+        width = self.bin_high - self.bin_low
+        if np.any(width <= 0.0):
+            width = np.ones_like(width)
+        total_width = _sum_groups(width, starts, stops)
+
+        # Group of each of the occupied bins, bins outside of any group are dropped
+        group = np.searchsorted(starts, self.index, side = "right") - 1
+        valid = (group >= 0)
+        valid[valid] = self.index[valid] < stops[group[valid]]
+        new_index, inverse = np.unique(group[valid], return_inverse = True)
+        occupied_width = width[self.index[valid]]
+        group_width = total_width[new_index]
+
+        def average(array):
+            return np.bincount(inverse, weights = array[valid]*occupied_width, minlength = len(new_index))/group_width
+
+        new_low = self.bin_low[starts]
+        new_high = self.bin_high[stops - 1]
+        stat_err2 = np.bincount(inverse, weights = pow(self.stat_err[valid]*occupied_width, 2), minlength = len(new_index))
+        self._set_layout(new_low, new_high)
+        self._set_bins(new_index, (new_low[new_index] + new_high[new_index])/2.0,
+                average(self.y), average(self.ymin), average(self.ymax), np.sqrt(stat_err2)/group_width)
+        self.rebinned = new_rebinned
+
+    # Overloads
+    def __str__(self):
+        return "Sparse plot object for '{0}' ({1} of {2} bins occupied)".format(
+                self.filename, len(self.index), len(self.bin_low))
+
+    # Plot Algebra
+    def _check_layout(self, plot):
+        if plot.bin_low is self.bin_low and plot.bin_high is self.bin_high:
+            return
+        if not np.array_equal(self.bin_low, plot.bin_low) or not np.array_equal(self.bin_high, plot.bin_high):
+            raise Exception("These two plots are not compatible")
+
+    def _as_sparse(self, plot):
+        if isinstance(plot, SparsePlot):
+            return plot
+        elif isinstance(plot, Plot):
+            return SparsePlot(plot)
+        raise Exception("Operation between types 'SparsePlot' and '{0}' not implemented".format(type(plot)))
+
+    def _gather(self, array, index):
+        """ Values of array (of the occupied bins) at the bins index, 0 for the empty ones """
+        values = np.zeros(len(index))
+        if len(self.index) == 0:
+            return values
+        position = np.minimum(np.searchsorted(self.index, index), len(self.index) - 1)
+        found = self.index[position] == index
+        values[found] = array[position[found]]
+        return values
+
+    @profiling.instrument("plot.sum", size = profiling.size_of_self)
+    def _sum_plot(self, plot, factor = 1.0):
+        plot = self._as_sparse(plot)
+        self._check_layout(plot)
+        index = np.union1d(self.index, plot.index)
+        y1, ymin1, ymax1, e1 = [self._gather(i, index) for i in (self.y, self.ymin, self.ymax, self.stat_err)]
+        y2, ymin2, ymax2, e2 = [plot._gather(i, index) for i in (plot.y, plot.ymin, plot.ymax, plot.stat_err)]
+        new_y = NewNumberArray(y1, e1)._sum_n(NewNumberArray(y2, e2), factor = factor)
+        new_ymin, new_ymax = _widen(new_y.x, ymin1 + ymin2*factor, ymax1 + ymax2*factor, new_y.dx)
+        x = self._dense_x()[index]
+        new_plot = SparsePlot._from_layout(self, self.bin_low, self.bin_high, index, x, new_y.x, new_ymin, new_ymax, new_y.dx)
+        new_plot.set_label_parameters(xlabel = self.xlabel, ylabel = self.ylabel)
+        return new_plot
+
+    @profiling.instrument("plot.divide", size = profiling.size_of_self)
+    def __truediv__(self, divider):
+        if not isinstance(divider, Plot):
+            return super().__truediv__(divider)
+        plot = self._as_sparse(divider)
+        self._check_layout(plot)
+        # Bins where the denominator is 0 are dropped (as in Plot.__truediv__):
+        # the layout of the ratio is made of the bins where it is defined
+        nonzero = plot.y != 0.0
+        kept = plot.index[nonzero]
+        denominator = plot.y[nonzero]
+        y, ymin, ymax, stat_err = [self._gather(i, kept) for i in (self.y, self.ymin, self.ymax, self.stat_err)]
+        ratio = NewNumberArray(y, stat_err) / NewNumberArray(denominator, plot.stat_err[nonzero])
+        new_ymin, new_ymax = _widen(ratio.x, ymin/denominator, ymax/denominator, ratio.dx)
+        x = self._dense_x()[kept]
+        index = np.flatnonzero((ratio.x != 0.0) | (new_ymin != 0.0) | (new_ymax != 0.0) | (ratio.dx != 0.0))
+        new_plot = SparsePlot._from_layout(None, self.bin_low[kept], self.bin_high[kept], index,
+                x[index], ratio.x[index], new_ymin[index], new_ymax[index], ratio.dx[index])
+        new_plot.set_label_parameters(legend = "{0}/{1}".format(self.legend, plot.legend))
+        new_plot.set_label_parameters(xlabel = self.xlabel)
+        new_plot.set_plot_parameters(fmt = self.fmt, color = self.color)
+        return new_plot
@@ -0,0 +1,31 @@
+"""
+plotting_device: gnuplot-like plots with matplotlib
+
+The data classes (Plot, NewNumber, NewNumberArray, DataTable) are imported with the package and don't need matplotlib,
+every other module (plot_functions, extend_class, SparsePlot...) is only imported on first use:
+
+    import plotting_device as pd
+    plot = pd.Plot("test_data/test1.dat")   # matplotlib is not imported
+    plt = pd.plot_functions.default_plt()   # now it is
+"""
+
+import importlib
+
+from .NewNumber import NewNumber
+from .NewNumberArray import NewNumberArray
+from .Plot import Plot
+from .jupyter_tricks import DataTable
+
+_LAZY_MODULES = ["plot_functions", "extend_class", "GnuAxes", "FigureTemplate", "batch_render",
+        "LazyPlot", "SparsePlot", "PlotCollection", "parse_cache", "dat_reader", "jupyter_tricks",
+        "profiling"]
+
+__all__ = ["Plot", "NewNumber", "NewNumberArray", "DataTable"] + _LAZY_MODULES
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
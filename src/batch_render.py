@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Renders many figures concurrently in a process pool
+
+Every figure is described by a dictionary (spec):
+
+    spec = {
+        "output" : "ratio_01.pdf",
+        "layout" : "plot_and_ratio", # or "canvas" for plot_functions.draw_canvas
+        "canvas" : {"ratio_range" : (0.8, 1.2)}, # keyword arguments for the canvas function
+        "draw" : [
+            {"plot" : p1, "method" : "gnu_errorbar", "axis" : 0},
+            {"plot" : p2, "method" : "draw_boxxyerrorbar", "axis" : 0, "style" : {"color" : "red"}},
+            {"plot" : p1/p2, "method" : "gnu_errorbar", "axis" : 1, "kwargs" : {"draw_labels" : False}},
+            ],
+        "relimit" : {1 : {"line_one" : True}}, # axis : keyword arguments for axis.relimit
+        }
+
+    results = render_all(specs)
+    report(results)
+
+In a draw entry "plot" can be a Plot or a dictionary with the arguments to create one (then the file is read by the worker),
+"style" and "labels" are passed to plot.set_plot_parameters and plot.set_label_parameters
+Every worker process uses the Agg backend and sets up the rcParams from default_plt once
+With threads = True (or workers = 1) the figures are rendered in this process instead, without pyplot
+"""
+
+import os
+import copy
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .Plot import Plot
+from . import plot_functions as pf
+from . import profiling
+
+# pyplot as set up by default_plt in a worker process (never in the process calling render_all)
+_worker = {}
+
+def _init_worker(backend = "Agg", profile = False):
+    """
+    Initializer of the worker processes, sets up the backend and the rcParams
+    profile: enable the profiling spans in the worker (see profiling)
+    A forked worker starts with a copy of the records of the parent, they are dropped
+    so only the spans recorded in the worker travel back (see _render_in_pool)
+    """
+    if profile:
+        profiling.reset()
+        profiling.enable()
+    import matplotlib
+    matplotlib.use(backend)
+    _worker["plt"] = pf.default_plt()
+
+def _get_plot(entry):
+    plot = entry["plot"]
+    if isinstance(plot, dict):
+        plot = Plot(**plot)
+    else:
+        # The style and the drawing functions change the plot, don't touch the one in the spec
+        plot = copy.copy(plot)
+    if entry.get("style"):
+        style = dict(entry["style"])
+        # set_plot_parameters would otherwise reset the color
+        style.setdefault("color", plot.color)
+        plot.set_plot_parameters(**style)
+    if entry.get("labels"):
+        plot.set_label_parameters(**entry["labels"])
+    return plot
+
+def _build_figure(plt, spec):
+    fig, axis = pf.canvas_from_layout(plt, spec.get("layout", "plot_and_ratio"), **spec.get("canvas", {}))
+    for entry in spec.get("draw", []):
+        plot = _get_plot(entry)
+        draw = getattr(axis[entry.get("axis", 0)], entry.get("method", "gnu_errorbar"))
+        draw(plot, **entry.get("kwargs", {}))
+    for i, relimit_kwargs in spec.get("relimit", {}).items():
+        axis[i].relimit(**relimit_kwargs)
+    return fig
+
+def _render_figure(spec, plt = None):
+    """
+    Renders and saves one figure (with pyplot if given)
+    Returns a dictionary with the output, the time spent building and saving the figure and the error (or None)
+    so one broken figure doesn't abort the whole batch
+    The profiling spans recorded meanwhile are attributed to the output
+    """
+    result = {"output" : spec.get("output"), "build" : 0.0, "save" : 0.0, "error" : None, "pid" : os.getpid()}
+    fig = None
+    start = time.perf_counter()
+    with profiling.figure(result["output"]):
+        try:
+            fig = _build_figure(plt, spec)
+            built = time.perf_counter()
+            result["build"] = built - start
+            pf.save_to_file(fig, spec["output"])
+            result["save"] = time.perf_counter() - built
+        except Exception as e:
+            result["error"] = "{0}: {1}".format(type(e).__name__, e)
+        finally:
+            if fig is not None and plt is not None:
+                plt.close(fig)
+    result["total"] = time.perf_counter() - start
+    return result
+
+def _render_in_worker(spec):
+    """
+    Worker function of the process pool
+    """
+    return _render_figure(spec, _worker["plt"])
+
+def _render_in_pool(spec):
+    """
+    _render_in_worker for another process, the profiling spans travel back with the result
+    """
+    result = _render_in_worker(spec)
+    if profiling.is_enabled():
+        result["profile"] = profiling.take_records()
+    return result
+
+def render_all(specs, workers = None, threads = False):
+    """
+    Renders every figure in specs, results are returned in the same order
+    workers: number of processes (default: number of cpus), workers = 1 renders in the current process
+    threads: use a pool of threads instead
+    In the current process (workers = 1 or threads) figures are built without pyplot inside plot_functions.style_context,
+    so the backend and the rcParams of the process are left as they were once it returns
+    (meanwhile nothing else in the process should draw, see style_context)
+    """
+    specs = list(specs)
+    if threads:
+        with pf.style_context(), ThreadPoolExecutor(max_workers = workers) as executor:
+            return list(executor.map(_render_figure, specs))
+    if workers == 1 or len(specs) < 2:
+        with pf.style_context():
+            return [_render_figure(spec) for spec in specs]
+    with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker,
+            initargs = ("Agg", profiling.is_enabled())) as executor:
+        # map keeps the order of the input
+        results = list(executor.map(_render_in_pool, specs))
+    for result in results:
+        profiling.add_records(result.pop("profile", []))
+    return results
+
+def report(results):
+    """
+    Prints the timings of every figure and the errors
+    """
+    for result in results:
+        if result["error"]:
+            print("Could not render {0}: {1}".format(result["output"], result["error"]))
+        else:
+            print("{0}: build {1:.3f} s, save {2:.3f} s (pid {3})".format(
+                result["output"], result["build"], result["save"], result["pid"]))
+    n_errors = sum(1 for result in results if result["error"])
+    print("{0} figures rendered, {1} errors, {2:.3f} s of rendering".format(
+        len(results) - n_errors, n_errors, sum(result["total"] for result in results)))
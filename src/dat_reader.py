@@ -0,0 +1,92 @@
+"""
+Reader for gnuplot-style .dat files: whitespace-separated float columns
+with comment lines starting with any of the comment characters (by default # and @)
+
+The file is read in chunks of whole lines (CHUNK_BYTES), in every chunk the comment characters are folded into one
+so np.loadtxt can use its C tokenizer, which it only does with a single comment character.
+Only the columns asked for are converted.
+With numpy 2.4 that is 1.2-1.7x faster than np.loadtxt with comments = ["#", "@"] (benchmarks/bench_reader.py, 1e6 lines),
+short of a 5x speed-up: pandas.read_csv is no faster with the same exact (round-trip) float parsing
+and splitting the buffer in python is slower, so there is no faster backend to fall back to
+"""
+
+import io
+import itertools
+import warnings
+import numpy as np
+
+# Size of the pieces of text parsed at once
+CHUNK_BYTES = 1 << 24
+
+def _normalise_comments(raw, comments):
+    """
+    numpy's C tokenizer is only used when there is at most one comment character,
+    so all comment characters are replaced by the first one in the raw buffer (one chunk of the file)
+    Returns the new buffer and the comment character to use
+    """
+    if not comments:
+        return raw, None
+    if isinstance(comments, str):
+        comments = [comments]
+    comments = [c.encode() for c in comments]
+    first = comments[0]
+    for c in comments[1:]:
+        if c in raw:
+            raw = raw.replace(c, first)
+    return raw, first.decode()
+
+def iter_chunks(filename, chunk_bytes = CHUNK_BYTES):
+    """
+    Reads filename in buffers of whole lines of about chunk_bytes bytes
+    """
+    with open(filename, "rb") as f:
+        rest = b""
+        while True:
+            data = f.read(chunk_bytes)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            rest = data[cut:]
+            if cut:
+                yield data[:cut]
+        if rest:
+            yield rest
+
+def read_columns(filename, usecols, comments = ("#", "@"), chunk_bytes = CHUNK_BYTES):
+    """
+    Reads the columns usecols of filename, in chunks of chunk_bytes so only one chunk of the text is in memory
+    Returns an array of shape (len(usecols), n_rows), like np.loadtxt(..., unpack = True, ndmin = 2)
+    """
+    blocks = [parse_buffer(raw, usecols, comments) for raw in iter_chunks(filename, chunk_bytes)]
+    if len(blocks) == 1:
+        return blocks[0]
+    if not blocks:
+        return np.empty((len(list(usecols)), 0))
+    return np.concatenate(blocks, axis = 1)
+
+def parse_buffer(raw, usecols, comments = ("#", "@")):
+    """
+    Parses a bytes buffer holding whole lines of a data file, see read_columns
+    A buffer without data gives an array with no rows
+    """
+    raw, comment = _normalise_comments(raw, comments)
+    with warnings.catch_warnings():
+        # loadtxt warns about buffers with comments only
+        warnings.simplefilter("ignore", UserWarning)
+        return np.loadtxt(io.BytesIO(raw), comments = comment, usecols = list(usecols), unpack = True, ndmin = 2)
+
+def iter_blocks(filename, usecols, block_size, comments = ("#", "@")):
+    """
+    Reads the columns usecols of filename in one pass, in blocks of (at most) block_size lines
+    (comment and empty lines included, so a block can hold fewer data rows)
+    Yields arrays of shape (len(usecols), rows_in_block), blocks without data are skipped
+    """
+    with open(filename, "rb") as f:
+        while True:
+            lines = list(itertools.islice(f, block_size))
+            if not lines:
+                break
+            block = parse_buffer(b"".join(lines), usecols, comments)
+            if block.shape[1]:
+                yield block
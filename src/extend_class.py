@@ -1,5 +1,6 @@
 # Methods that extend matplotlib
-from NewNumber import NewNumber
+from .NewNumber import quantize, leading_digit
+from . import profiling
 import numpy as np
 
 def format_ticks(axis, new_format_y = None, new_format_x = None):
@@ -11,6 +12,33 @@ def format_ticks(axis, new_format_y = None, new_format_x = None):
         formatter = ticker.FormatStrFormatter(new_format_x)
         axis.xaxis.set_major_formatter(formatter)
 
+def _shared_extent(axis, shared_axes, name):
+    """
+        Running extent of the data for one direction of the axis,
+        axes sharing that direction (sharex, twinx...) share the same extent
+    """
+    for sibling in shared_axes.get_siblings(axis):
+        extent = getattr(sibling, name, None)
+        if extent is not None:
+            return extent
+    return {"limits" : None}
+
+def _extend_limits(extent, get_limits, set_limits, low, high):
+    """
+        Extends the running extent with (low, high) and sets the result as the limits of the axis
+        If the limits were changed from somewhere else since they were last set here, start from those
+    """
+    limits = extent["limits"]
+    if limits is None:
+        limits = (low, high)
+    else:
+        current = get_limits()
+        if current != limits:
+            limits = current
+        limits = (min(limits[0], low), max(limits[1], high))
+    set_limits(limits)
+    extent["limits"] = get_limits()
+
 def update_limits(axis, plot, padding = 0.05, ):
     """
         Update the limits on the axis of the plot (with a padding from the top of 'padding')
@@ -19,17 +47,12 @@ def update_limits(axis, plot, padding = 0.05, ):
     if axis.keep_limits:
         return
     try:
-        if axis.gnu_extended_object == "new":
-            axis.gnu_extended_object = "old"
-            cur_ylim = (plot.y[0], plot.y[0])
-            cur_xlim = (plot.x[0], plot.x[0])
-        else:
-            cur_ylim = axis.get_ylim()
-            cur_xlim = axis.get_xlim()
-    except:
-        raise Exception("Object type: {0} didn't have property gnu_extended_object set. Can't continue".format(type(axis)))
-    axis.set_ylim( (min(cur_ylim[0], min(plot.ymin)), max(cur_ylim[1], (1.0+padding)*max(plot.ymax))) )
-    axis.set_xlim( (min(cur_xlim[0], min(plot.xmin)), max(cur_xlim[1], max(plot.xmax))) )
+        x_extent = axis.gnu_xextent
+        y_extent = axis.gnu_yextent
+    except AttributeError:
+        raise Exception("Object type: {0} didn't have the gnu extents set (see extend_all). Can't continue".format(type(axis)))
+    _extend_limits(y_extent, axis.get_ylim, axis.set_ylim, np.min(plot.ymin), (1.0+padding)*np.max(plot.ymax))
+    _extend_limits(x_extent, axis.get_xlim, axis.set_xlim, np.min(plot.xmin), np.max(plot.xmax))
 
 def draw_labels(axis, plot, show_legend = True):
     """
@@ -41,66 +64,151 @@ def draw_labels(axis, plot, show_legend = True):
         axis.legend()
 
 
-def boxxyerrorbar(xmin, xmax, ymin, ymax):
-    from matplotlib.patches import Rectangle
-    data = zip(xmin,xmax,ymin,ymax)
-    r =[]
-    for xm,xp, ym,yp in data:
-        r.append(Rectangle(
-            (xm,ym), # x,u
-            xp-xm, # width
-            yp-ym, # height
-        ))
-    return r
+def boxxyerrorbar(xmin, xmax, ymin, ymax, chunk = 1000):
+    """
+    Returns a list of compound matplotlib Paths, each one with (at most) chunk closed boxes,
+    built from one (n_bins, 5, 2) vertex array
+    (a few mid-sized paths render faster than either one path per box or a single huge path)
+    """
+    from matplotlib.path import Path
+    n_boxes = len(xmin)
+    vertices = np.empty((n_boxes, 5, 2))
+    vertices[:, 0, 0] = xmin ; vertices[:, 0, 1] = ymin
+    vertices[:, 1, 0] = xmin ; vertices[:, 1, 1] = ymax
+    vertices[:, 2, 0] = xmax ; vertices[:, 2, 1] = ymax
+    vertices[:, 3, 0] = xmax ; vertices[:, 3, 1] = ymin
+    vertices[:, 4] = vertices[:, 0]
+    codes = np.full((n_boxes, 5), Path.LINETO, dtype = Path.code_type)
+    codes[:, 0] = Path.MOVETO
+    codes[:, 4] = Path.CLOSEPOLY
+    return [Path(vertices[i:i+chunk].reshape(-1, 2), codes[i:i+chunk].ravel()) for i in range(0, n_boxes, chunk)]
+
+@profiling.instrument("draw.boxxyerrorbar", size = profiling.size_of_plot)
 def draw_boxxyerrorbar(axis, plot, alpha=0.25, draw_labels = False):
     """
     Gnuplot-like errorbars
+    All boxes go in a single collection of compound paths
     """
     axis.update_limits(plot, padding = 0.05)
-    from matplotlib.collections import PatchCollection
+    from matplotlib.collections import PathCollection
     r = boxxyerrorbar(plot.xmin, plot.xmax, plot.ymin, plot.ymax)
-    pc = PatchCollection(r, facecolor=plot.color, 
+    pc = PathCollection(r, facecolor=plot.color, 
                          edgecolor='None', alpha=alpha)
     if not plot.color: # maybe the plot did not contain a color, let's give it some color!
-        if isinstance(pc, (tuple, list)):
-            color = pc[0].get_facecolor()
-        else:
-            color = pc.get_facecolor()
+        color = pc.get_facecolor()
         # Update the plot color
         plot.set_plot_parameters(color = color)
     if draw_labels:
         axis.draw_labels(plot)
-    axis.add_collection(pc)
+    # autolim would walk every segment of the paths, update the data limits directly instead
+    axis.add_collection(pc, autolim = False)
+    if len(plot.xmin) > 0:
+        axis.update_datalim([(np.min(plot.xmin), np.min(plot.ymin)), (np.max(plot.xmax), np.max(plot.ymax))])
+    return pc
 
+@profiling.instrument("draw.histeps", size = profiling.size_of_plot)
 def gnu_histeps(axis, plot, show_legend = False, draw_labels = True, draw_grid = True):
     """
     Equivalent to gnuplot histeps. 
     """
     axis.update_limits(plot, padding = 0.05)
    
-    # Works surprisingly well for different-size steps *shrug emoji*
-    eb = axis.step(plot.xmin, plot.y, where='post', color = plot.color)
-    if not plot.color:
-        plot.color = eb[0].get_color()
     if show_legend:
         legend = plot.legend
     else:
         legend = None
-    axis.step(plot.xmax[-2:], plot.y[-2:], where='pre', color = plot.color, label = legend)
+    if getattr(plot, "sparse", False):
+        # Only the occupied bins are stored, the steps drop to 0 in between
+        step_x, step_y = plot.step_arrays()
+        eb = axis.step(step_x, step_y, where='post', color = plot.color, label = legend)
+        if not plot.color:
+            plot.color = eb[0].get_color()
+    else:
+        # Works surprisingly well for different-size steps *shrug emoji*
+        eb = axis.step(plot.xmin, plot.y, where='post', color = plot.color)
+        if not plot.color:
+            plot.color = eb[0].get_color()
+        eb += axis.step(plot.xmax[-2:], plot.y[-2:], where='pre', color = plot.color, label = legend)
     if draw_labels:
         axis.draw_labels(plot, show_legend)
     if isinstance(show_legend, (str, tuple, list)):
         axis.legend(loc = show_legend)
     if draw_grid:
         axis.grid(linestyle = '--')
+    return eb
 
-def gnu_errorbar(axis, plot, padding = 0.05, draw_labels = True, show_legend = True, histeps = False, color = None):
+def minmax_indices(x, n_columns, *series):
+    """
+    Indices of the points needed to draw series (against x) at a resolution of n_columns (ie, pixels):
+    in every column the first and last points and those with the minimum and maximum of each of the series
+    At most 2 + 2*len(series) points per column are kept, returned in increasing x
+    """
+    x = np.asarray(x, dtype = float)
+    n_points = len(x)
+    if n_points <= (2 + 2*len(series))*n_columns:
+        return np.arange(n_points)
+    order = None
+    if np.any(x[1:] < x[:-1]):
+        order = np.argsort(x, kind = "stable")
+        x = x[order]
+    series = [np.asarray(i, dtype = float) if order is None else np.asarray(i, dtype = float)[order] for i in series]
+    if x[-1] > x[0]:
+        columns = ((x - x[0])*(n_columns/(x[-1] - x[0]))).astype(np.int64)
+        np.minimum(columns, n_columns - 1, out = columns)
+    else:
+        columns = np.zeros(n_points, dtype = np.int64)
+    starts = np.append(0, np.flatnonzero(np.diff(columns)) + 1)
+    stops = np.append(starts[1:], n_points)
+    counts = stops - starts
+    keep = [starts, stops - 1]
+    for values in series:
+        for reduce in (np.minimum, np.maximum):
+            hit = np.flatnonzero(values == np.repeat(reduce.reduceat(values, starts), counts))
+            if hit.size:
+                # First point reaching the extreme in every column
+                group = np.searchsorted(starts, hit, side = "right")
+                keep.append(hit[np.append(True, group[1:] != group[:-1])])
+    index = np.unique(np.concatenate(keep))
+    if order is not None:
+        index = order[index]
+    return index
+
+def _pixel_columns(axis, decimate):
+    """
+    Number of columns for decimate: an integer is taken as is, True means the width of the axis in pixels
+    (at the largest of the figure and the savefig dpi)
+    """
+    if decimate is True:
+        from matplotlib import rcParams
+        fig = axis.figure
+        dpi = fig.dpi
+        if isinstance(rcParams["savefig.dpi"], (int, float)):
+            dpi = max(dpi, rcParams["savefig.dpi"])
+        return max(int(np.ceil(axis.get_position().width*fig.get_figwidth()*dpi)), 1)
+    return int(decimate)
+
+def decimated_data(axis, plot, decimate, errors = True):
+    """
+    x, y, stat_err of plot, reduced to the per-pixel min/max (see minmax_indices) if decimate
+    With errors = False only the extremes of y are kept, not those of y +- stat_err
+    """
+    x, y, stat_err = plot.x, plot.y, plot.stat_err
+    if decimate:
+        x, y, stat_err = np.asarray(x), np.asarray(y), np.asarray(stat_err)
+        series = (y, y - stat_err, y + stat_err) if errors else (y,)
+        index = minmax_indices(x, _pixel_columns(axis, decimate), *series)
+        x, y, stat_err = x[index], y[index], stat_err[index]
+    return x, y, stat_err
+
+@profiling.instrument("draw.errorbar", size = profiling.size_of_plot)
+def gnu_errorbar(axis, plot, padding = 0.05, draw_labels = True, show_legend = True, histeps = False, color = None, decimate = False):
     """
     Plot x, y, dy in a gnuplot-like style
     axis should be a matplotlib axis object 
     plot should be from src.Plot
     
     if histeps = True is selected, gnuplot-like histeps are also printed
+    if decimate = True (or a number of columns) only the points with the per-pixel min/max are drawn
     """
     # Set up the limits (make sure we don't override previous limits)
     axis.update_limits(plot, padding = padding)
@@ -110,7 +218,8 @@ def gnu_errorbar(axis, plot, padding = 0.05, draw_labels = True, show_legend = T
         color = plot.color
 
     # Plot errorbars
-    eb = axis.errorbar(plot.x, plot.y, yerr=plot.stat_err, label=plot.legend, color = color, fmt=plot.fmt)
+    x, y, stat_err = decimated_data(axis, plot, decimate)
+    eb = axis.errorbar(x, y, yerr=stat_err, label=plot.legend, color = color, fmt=plot.fmt)
     if not color: # maybe the plot did not contain a color, let's give it some color!
         color = eb[0].get_color()
         # Update the plot color
@@ -123,14 +232,17 @@ def gnu_errorbar(axis, plot, padding = 0.05, draw_labels = True, show_legend = T
         axis.draw_labels(plot, show_legend)
 
     axis.grid(linestyle = '--')
+    return eb
 
-def gnu_line(axis, plot, padding = 0.05, draw_labels = True, show_legend = True, histeps = False, color = None):
+@profiling.instrument("draw.line", size = profiling.size_of_plot)
+def gnu_line(axis, plot, padding = 0.05, draw_labels = True, show_legend = True, histeps = False, color = None, decimate = False):
     """
     Plot x, y, dy in a gnuplot-like style
     axis should be a matplotlib axis object 
     plot should be from src.Plot
     
     if histeps = True is selected, gnuplot-like histeps are also printed
+    if decimate = True (or a number of columns) only the points with the per-pixel min/max are drawn
     """
     # Set up the limits (make sure we don't override previous limits)
     axis.update_limits(plot, padding = padding)
@@ -140,7 +252,8 @@ def gnu_line(axis, plot, padding = 0.05, draw_labels = True, show_legend = True,
         color = plot.color
 
     # Plot errorbars
-    eb = axis.plot(plot.x, plot.y, label=plot.legend, color = color)
+    x, y, _ = decimated_data(axis, plot, decimate, errors = False)
+    eb = axis.plot(x, y, label=plot.legend, color = color)
     if not color: # maybe the plot did not contain a color, let's give it some color!
         color = eb[0].get_color()
         # Update the plot color
@@ -153,66 +266,141 @@ def gnu_line(axis, plot, padding = 0.05, draw_labels = True, show_legend = True,
         axis.draw_labels(plot, show_legend)
 
     axis.grid(linestyle = '--')
+    return eb
+
 
+def _line_extents(axis):
+    """
+    Running (min, max) of the y data of the lines in the axis
+    Only the lines added since the last call are scanned,
+    if any line was removed or had its data replaced all of them are scanned again
+    """
+    cache = axis.gnu_line_extents
+    lines = list(axis.lines)
+    scanned = cache["lines"]
+    if len(scanned) > len(lines) or any(line is not old or line.get_ydata() is not ydata
+            for line, (old, ydata) in zip(lines, scanned)):
+        cache.update(lines = [], ymin = np.inf, ymax = -np.inf)
+        scanned = cache["lines"]
+    for line in lines[len(scanned):]:
+        ydata = line.get_ydata()
+        values = np.asarray(ydata, dtype = float)
+        if values.size:
+            cache["ymin"] = min(cache["ymin"], np.min(values))
+            cache["ymax"] = max(cache["ymax"], np.max(values))
+        scanned.append((line, ydata))
+    if not scanned or cache["ymin"] > cache["ymax"]:
+        raise Exception("There are no lines in the axis to compute the limits from")
+    return cache["ymin"], cache["ymax"]
+
+def _tick_rounding(y, decimals, away_from_zero):
+    """ NewNumber(y).ceil(decimals) (away_from_zero) or NewNumber(y).floor(decimals) for arrays of y and decimals """
+    numpy_rounding = np.ceil(y) if away_from_zero else np.floor(y)
+    return np.where(decimals == 0, numpy_rounding, quantize(y, decimals, away_from_zero))
+
+def _around(values, decimals):
+    """ np.around(values, decimals) with one (integer) decimals per value """
+    scale = 10.0**np.abs(decimals)
+    return np.where(decimals >= 0, np.rint(values*scale)/scale, np.rint(values/scale)*scale)
+
+def plan_ticks(ymin, ymax, n_ticks = 4, padding = 1.05, line_one = False, round_limits = True):
+    """
+    Limits, tick positions and tick labels relimit sets for the data ranges [ymin, ymax] of many axes, in one go
+    The range is rounded out to the power of 10 of its width (see NewNumber.power_of_10, partition = 3)
+    unless round_limits = False (as relimit does for enforce_lims)
+    n_ticks is either the number of ticks or the list of the positions of the ticks
+    Returns a list with a dictionary {"ylim", "yticks", "ylabels"} per axis
+    """
+    ymin = np.atleast_1d(np.asarray(ymin, dtype = float))
+    ymax = np.atleast_1d(np.asarray(ymax, dtype = float))
+    width = ymax - ymin
+    if not np.all(width > 0.0):
+        raise Exception("Can't set the ticks of an empty range: {0}".format(list(zip(ymin, ymax))))
+    _, first_digit = leading_digit(width)
+    pow10 = (np.floor(np.log10(width)) - (first_digit < 3)).astype(int)
+    decimals = -pow10
+    if round_limits:
+        # pow as NewNumber does, numpy's power is not always the closest double to 10**-n
+        rounder = np.array([float(pow(10, i)) for i in pow10.tolist()])
+        ymax = _tick_rounding(ymax, decimals, away_from_zero = False) + rounder
+        ymin = _tick_rounding(ymin, decimals, away_from_zero = True) - rounder
+    deltay = ymax - ymin
 
+    if isinstance(n_ticks, int):
+        t_step = _tick_rounding(deltay / (n_ticks + 1.0), decimals, away_from_zero = True)
+        # np.arange(ymin, ymax, t_step) for every axis: the first tick plus multiples of the actual step
+        n_points = np.ceil(deltay/t_step).astype(int)
+        step = (ymin + t_step) - ymin
+        index = np.arange(np.max(n_points))
+        ticks = _around(ymin[:, None] + index[None, :]*step[:, None], decimals[:, None])
+        yticks = [row[:n] for row, n in zip(ticks, n_points)]
+    elif isinstance(n_ticks, (tuple, list)):
+        t_step = _tick_rounding(deltay / (len(n_ticks) + 1.0), decimals, away_from_zero = True)
+        yticks = [np.array(n_ticks) for _ in ymin]
+    else:
+        raise Exception("n_ticks must be a number of ticks or a list of ticks, got {0}".format(type(n_ticks)))
+
+    plans = []
+    d_padding = t_step/4.0*padding
+    for low, high, pad, ticks in zip(ymin.tolist(), ymax.tolist(), d_padding.tolist(), yticks):
+        labels = [str(i) for i in ticks.tolist()]
+        if line_one and 1.0 not in ticks:
+            ticks = np.append(ticks, 1.0)
+            labels.append("1")
+        plans.append({"ylim" : (low, high + pad), "yticks" : ticks, "ylabels" : labels})
+    return plans
+
+def _apply_ticks(axis, plan, line_one = False):
+    if line_one:
+        # Only one line across one, even if relimit is called many times
+        if axis.gnu_line_one is None or axis.gnu_line_one.axes is None:
+            axis.gnu_line_one = axis.axhline(y=1, color="black", lw = 1.0)
+    axis.set_ylim(plan["ylim"])
+    axis.set_yticks(plan["yticks"])
+    axis.set_yticklabels(plan["ylabels"])
+
+@profiling.instrument("draw.relimit")
 def relimit(axis, n_ticks = 4, line_one = False, padding = 1.05, enforce_lims = None):
     """ 
     Tries to figure out ylimits by itself.
     It will also print a line across one if needed and will try to figure out the correct
-    separation between ticks
+    separation between ticks (see plan_ticks)
     """
     if enforce_lims:
-        ymin = NewNumber(enforce_lims[0])
-        ymax = NewNumber(enforce_lims[1])
-
-        pow10 = (ymax-ymin).power_of_10(partition = 3)
-
+        ymin, ymax = enforce_lims[0], enforce_lims[1]
     else:
-        ymin_l = []
-        ymax_l = []
-        for line in axis.lines:
-            ydata = line.get_ydata()
-            ymin_l.append(min(ydata))
-            ymax_l.append(max(ydata))
-
-        ymin = min(ymin_l)
-        ymax = max(ymax_l)
-
-        pow10 = NewNumber(ymax-ymin).power_of_10(partition = 3)
-
-        rounder = pow(10, pow10)
-        ymax = NewNumber(ymax).floor(decimals = -pow10) + rounder
-        ymin = NewNumber(ymin).ceil(decimals = -pow10) - rounder
-
-    deltay = ymax - ymin
-    if isinstance(n_ticks, int):
-        t_step = deltay / (n_ticks + 1.0)
-        t_step = t_step.ceil(decimals = -pow10)
-
-        yticks = [np.around(i, decimals=-pow10) for i in  np.arange(ymin.x, ymax.x, t_step.x)]
-        ylabels = [np.around(i,decimals=-pow10) for i in yticks]
-    elif isinstance(n_ticks, (tuple, list)):
-        yticks = np.array(n_ticks)
-        ylabels = [str(i) for i in yticks]
-
-        t_step = deltay / (len(yticks) + 1.0)
-        t_step = t_step.ceil(decimals = -pow10)
-
-    if line_one:
-        axis.axhline(y=1, color="black", lw = 1.0)
-
-        if 1.0 not in yticks:
-            yticks = np.append(yticks, 1.0)
-            ylabels.append(1)
-
-    d_padding = float(t_step/4.0*padding)
+        ymin, ymax = _line_extents(axis)
+    plan, = plan_ticks(ymin, ymax, n_ticks = n_ticks, padding = padding, line_one = line_one,
+            round_limits = not enforce_lims)
+    _apply_ticks(axis, plan, line_one = line_one)
 
-    axis.set_ylim( (ymin.x, ymax.x + d_padding) )
-    axis.set_yticklabels(ylabels)
-    axis.set_yticks(yticks)
+@profiling.instrument("draw.relimit")
+def relimit_all(axes, n_ticks = 4, line_one = False, padding = 1.05):
+    """
+    relimit for many axes at once, the ticks of all of them are planned in a single plan_ticks call
+    """
+    axes = list(axes)
+    extents = np.array([_line_extents(axis) for axis in axes], dtype = float).reshape(-1, 2)
+    plans = plan_ticks(extents[:, 0], extents[:, 1], n_ticks = n_ticks, padding = padding, line_one = line_one)
+    for axis, plan in zip(axes, plans):
+        _apply_ticks(axis, plan, line_one = line_one)
 
+def init_state(axis):
+    """
+    Limits state used by the methods above (see GnuAxes, extend_all)
+    """
+    axis.keep_limits = False
+    # Running extents of the data drawn with update_limits and of the lines (for relimit)
+    axis.gnu_xextent = _shared_extent(axis, axis.get_shared_x_axes(), "gnu_xextent")
+    axis.gnu_yextent = _shared_extent(axis, axis.get_shared_y_axes(), "gnu_yextent")
+    axis.gnu_line_extents = {"lines" : [], "ymin" : np.inf, "ymax" : -np.inf}
+    axis.gnu_line_one = None
 
 def extend_all(plt):
+    """
+    Adds the methods above to an existing matplotlib axis
+    New canvases use the "gnu" projection instead (GnuAxes), which has them already
+    """
     from types import MethodType
     plt.draw_boxxyerrorbar = MethodType(draw_boxxyerrorbar, plt)
     plt.gnu_errorbar = MethodType(gnu_errorbar, plt)
@@ -222,6 +410,5 @@ def extend_all(plt):
     plt.gnu_line = MethodType(gnu_line, plt)
     plt.relimit = MethodType(relimit, plt)
     plt.format_ticks = MethodType(format_ticks, plt)
-    plt.keep_limits = False
-    plt.gnu_extended_object = "new"
+    init_state(plt)
     return plt
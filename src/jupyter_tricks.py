@@ -1,44 +1,72 @@
+import io
 import numpy as np
-import collections
+import collections.abc
+from .NewNumber import NewNumber
+from .NewNumberArray import NewNumberArray, format_uncertainties, uncertainty_precision
 
 def jupyter_html_print(string):
     get_ipython().run_cell_magic(u'HTML', u'', string)
 
+def _as_column(values):
+    """
+    1D array for a column of the table: arrays (and NewNumberArray) keep their dtype,
+    anything else is stored as an object array so every field prints as str(field)
+    """
+    if isinstance(values, NewNumberArray) or (isinstance(values, np.ndarray) and values.ndim == 1):
+        return values
+    column = np.empty(len(values), dtype = object)
+    try:
+        column[:] = values
+    except ValueError:
+        # Fields that are sequences themselves
+        for i, value in enumerate(values):
+            column[i] = value
+    return column
+
 class DataTable:
     """
-    This class takes as input and stores a table in the form of an array of arrays 
+    This class takes as input and stores a table in the form of an array of arrays
     with the following structure:
     self.data_raw[row][column]
+
+    Internally the table is stored by columns (a list of array chunks per column),
+    add_rows and from_columns add many rows at once and write_latex/write_html
+    write the table to a file handle in chunks of rows
+    Note data_raw is now a read-only property that builds a new list of rows every time:
+    changing it doesn't change the table, add rows with add_row/add_rows/add_columns
     """
 
     # Initialiser functions
     def __init__(self, ncols = None, header = None, data = None):
         self.header = None
-        self.data_raw = []
-        if not ncols and not header and not data:
+        self._chunks = None
+        self._pending = []
+        if not ncols and header is None and data is None:
             raise Exception("Need either ncols, header or data to initialise")
-        if data:
+        if data is not None:
             self._init_from_data(data, header = header)
-        elif header:
+        elif header is not None:
             self._init_from_header(header)
-        if ncols and (header or data):
+        if ncols and (header is not None or data is not None):
             if ncols != self.ncols:
                 raise Exception("Number of columns and header provided are not compatible")
         elif ncols:
             self.ncols = ncols
 
     def _init_from_data(self, data, header = None):
-        if header:
-            self.header = header
-            data_raw = data
+        if header is not None:
+            self._init_from_header(header)
+            rows = data
         else:
-            self.header = data[0]
-            self.data_raw = data[1:]
+            self._init_from_header(list(data[0]))
+            rows = data[1:]
+        if len(rows):
+            self.add_rows(rows)
 
     def _init_from_header(self, header):
-        if isinstance(header, (tuple, list, np.array)):
+        if isinstance(header, (tuple, list, np.ndarray)):
             self.ncols = len(header)
-            self.header = header
+            self.header = list(header)
         elif isinstance(header, (str)):
             header_sp = header.split('&')
             self.header = header_sp
@@ -46,7 +74,70 @@ class DataTable:
         else:
             raise Exception("DataTable doesn't implement type {0} yet".format(type(header)))
 
-    # Add extra content 
+    @classmethod
+    def from_columns(cls, columns, header = None):
+        """
+        Creates a DataTable from a list of columns (arrays or sequences of the same length)
+        or from a dictionary {header : column}
+        """
+        if isinstance(columns, dict):
+            if header is None:
+                header = list(columns.keys())
+            columns = list(columns.values())
+        if header is None:
+            table = cls(ncols = len(columns))
+        else:
+            table = cls(ncols = len(columns), header = header)
+        table.add_columns(columns)
+        return table
+
+    # Storage
+    def _columns_chunks(self):
+        """
+        Moves the rows added with add_row to the columns and returns the list of chunks of every column
+        """
+        if self._chunks is None:
+            self._chunks = [[] for _ in range(self.ncols)]
+        if self._pending:
+            for chunks, column in zip(self._chunks, zip(*self._pending)):
+                chunks.append(_as_column(column))
+            self._pending = []
+        return self._chunks
+
+    def column(self, i):
+        """
+        Returns the column i as a single array
+        """
+        chunks = self._columns_chunks()[i]
+        if not chunks:
+            return np.empty(0, dtype = object)
+        if len(chunks) == 1:
+            return chunks[0]
+        if all(isinstance(i, NewNumberArray) for i in chunks):
+            return NewNumberArray(np.concatenate([i.x for i in chunks]), np.concatenate([i.dx for i in chunks]))
+        # Mixed with other fields, the NewNumberArray become arrays of NewNumber
+        chunks = [_as_column(list(i)) if isinstance(i, NewNumberArray) else i for i in chunks]
+        if len(set(i.dtype for i in chunks)) > 1:
+            # Don't let numpy promote the fields (ie, ints to floats)
+            chunks = [i.astype(object) for i in chunks]
+        return np.concatenate(chunks)
+
+    @property
+    def nrows(self):
+        chunks = self._chunks[0] if self._chunks else []
+        return sum(len(i) for i in chunks) + len(self._pending)
+
+    def __len__(self):
+        return self.nrows
+
+    @property
+    def data_raw(self):
+        """ Copy of the table as a list of rows (read-only, see the class docstring) """
+        columns = [self.column(i) for i in range(self.ncols)]
+        columns = [list(i) if isinstance(i, NewNumberArray) else i.tolist() for i in columns]
+        return [list(row) for row in zip(*columns)]
+
+    # Add extra content
     def add_row(self, fields_raw, row_header = None):
         """
         Add an extra row to the DataTable
@@ -57,15 +148,42 @@ class DataTable:
         else:
             fields = []
 
-        if isinstance(fields_raw, str) or not isinstance(fields_raw, collections.Iterable):
+        if isinstance(fields_raw, str) or not isinstance(fields_raw, collections.abc.Iterable):
             fields.append(fields_raw)
         else:
-            for field in fields_raw:
-                fields.append(field)
+            fields.extend(fields_raw)
 
         if len(fields) != self.ncols:
             raise Exception("The number of fields provided do not match the current table size")
-        self.data_raw.append(fields)
+        self._pending.append(fields)
+
+    def add_rows(self, rows, row_header = None):
+        """
+        Adds many rows at once, rows is a 2D array or a list of rows
+        row_header (optional) is the list of the first column of every row
+        """
+        if len(rows) == 0:
+            return
+        if isinstance(rows, np.ndarray) and rows.ndim == 2:
+            columns = list(rows.T)
+        else:
+            columns = [list(i) for i in zip(*rows)]
+        if row_header is not None:
+            columns = [row_header] + columns
+        self.add_columns(columns)
+
+    def add_columns(self, columns):
+        """
+        Adds rows to the table given as a list with the values of every column
+        """
+        if len(columns) != self.ncols:
+            raise Exception("The number of fields provided do not match the current table size")
+        columns = [_as_column(i) for i in columns]
+        n_rows = len(columns[0])
+        if any(len(i) != n_rows for i in columns):
+            raise Exception("All the columns must have the same number of rows")
+        for chunks, column in zip(self._columns_chunks(), columns):
+            chunks.append(column)
 
     # Printing functions
     def _str_row(self, row, escape = None):
@@ -80,43 +198,86 @@ class DataTable:
             out_row.append(new_st)
         return out_row
 
-    def str_latex(self, align = "c", v_sep = "", h_sep = "", environment = "tabular"):
+    def _str_column(self, column, mode = None):
+        """ Same as _str_row for a (chunk of a) column
+        NewNumberArray and NewNumber are formatted in one go (see format_uncertainties) as x +/- dx in the format mode
+        (plain text by default, latex or html), other fields are escaped for latex with mode = "latex"
         """
-        Print table as a latex tabular (by default) environment
+        number_mode = mode or "plain"
+        if isinstance(column, NewNumberArray):
+            return format_uncertainties(column.x, column.dx, mode = number_mode)
+        if column.dtype.kind == "f" and column.dtype != np.float64:
+            # tolist would turn them into python floats, which print more digits than str(np.float32(...))
+            items = list(column)
+        else:
+            items = column.tolist()
+        strings = [None if isinstance(item, NewNumber) else str(item) for item in items]
+        numbers = [i for i, item in enumerate(items) if isinstance(item, NewNumber)]
+        if numbers:
+            x = np.array([items[i].x for i in numbers], dtype = float)
+            dx = np.array([items[i].dx for i in numbers], dtype = float)
+            # A precision set from outside wins, as in NewNumber.__str__
+            precision = np.array([items[i].prec or 0 for i in numbers], dtype = int)
+            precision = np.where(precision > 0, precision, uncertainty_precision(dx))
+            for i, string in zip(numbers, format_uncertainties(x, dx, mode = number_mode, precision = precision)):
+                strings[i] = string
+        if mode == "latex":
+            escaped = set(numbers)
+            strings = [string if i in escaped else string.replace("%", "\\%") for i, string in enumerate(strings)]
+        return strings
+
+    def _iter_str_rows(self, mode = None, chunk_rows = 1000):
+        """
+        Generator of lists of at most chunk_rows rows, every row a list of str (see _str_column)
+        """
+        chunks = self._columns_chunks()
+        n_chunks = len(chunks[0]) if chunks else 0
+        for k in range(n_chunks):
+            n_rows = len(chunks[0][k])
+            for start in range(0, n_rows, chunk_rows):
+                columns = [self._str_column(i[k][start:start + chunk_rows], mode = mode) for i in chunks]
+                yield list(zip(*columns))
+
+    def write_latex(self, fh, align = "c", v_sep = "", h_sep = "", environment = "tabular", chunk_rows = 1000):
+        """
+        Writes the table as a latex tabular (by default) environment to the file handle fh,
+        chunk_rows rows at a time
         """
         environment_c = "{" + environment + "}"
         # Preprocess the table
         if "-" in h_sep or "_" in h_sep:
-            latex_sep = "    \\\\ \hline\n"
+            latex_sep = "    \\\\ \\hline\n"
         else:
-            latex_sep = "     \\\\ {0}\n".format(h_sep)  
+            latex_sep = "     \\\\ {0}\n".format(h_sep)
         positioning_sp = " {0} ".format(align)
         # Header always have a separator
         if self.header and h_sep == "":
-            header_sep = "    \\\\ \hline\n"
+            header_sep = "    \\\\ \\hline\n"
         else:
             header_sep = latex_sep
         amp = " & "
 
         # Generate the column structure and the first few lines
         columns = "{" + v_sep + v_sep.join( self.ncols*[positioning_sp] ) + v_sep + "}"
-        latex_begin = "\\begin{0}{1}".format(environment_c, columns) + "\n"
-        latex_end = "\end{0}".format(environment_c)
-
-        # Generate a list of strings
-        latex_out = latex_begin 
+        fh.write("\\begin{0}{1}".format(environment_c, columns) + "\n")
         if self.header:
-            latex_out += "\hline " + amp.join(self._str_row(self.header, escape = "latex")) + header_sep
-
-        lines = []
-        for row in self.data_raw:
-            lines.append( amp.join(self._str_row(row, escape = "latex")) )
-        lines.append(latex_end)
+            fh.write("\\hline " + amp.join(self._str_row(self.header, escape = "latex")) + header_sep)
+        for rows in self._iter_str_rows(mode = "latex", chunk_rows = chunk_rows):
+            fh.write("".join(amp.join(row) + latex_sep for row in rows))
+        fh.write("\\end{0}".format(environment_c))
 
-        latex_out += latex_sep.join(lines)
-        return latex_out
+    def str_latex(self, align = "c", v_sep = "", h_sep = "", environment = "tabular"):
+        """
+        Print table as a latex tabular (by default) environment
+        """
+        output = io.StringIO()
+        self.write_latex(output, align = align, v_sep = v_sep, h_sep = h_sep, environment = environment)
+        return output.getvalue()
 
-    def str_html(self, align = "center"):
+    def write_html(self, fh, align = "center", chunk_rows = 1000):
+        """
+        Writes the table as a html table to the file handle fh, chunk_rows rows at a time
+        """
         # Create the CSS style
         table_style = "border-collapse: separate; border-spacing: 1px; width:95%; margin-left:auto; margin-right:auto;"
         cell_style = "text-align: {0};".format(align)
@@ -129,26 +290,33 @@ class DataTable:
         cell_end = "</td>"
         cell_separator = cell_end + "\n\t\t" + cell_start # </td><td>
 
-        row_start = "\t<tr>\n\t\t" + cell_start
+        row_start = "\n\t<tr>\n\t\t" + cell_start
         row_end = cell_end + "\n\t</tr>"
 
-        # Build the table
-        lines = [table_start]
+        # Write the table
+        fh.write(table_start)
         # Write header if it exists
         if self.header:
             bold_header = ["<strong>{0}</strong>".format(i) for i in self.header]
-            new_str = row_start + cell_separator.join(bold_header) + row_end
-            lines.append(new_str)
-        for row in self.data_raw:
-            new_str = row_start 
-            new_str += cell_separator.join(self._str_row(row))
-            new_str += row_end
-            lines.append(new_str)
-        lines.append(table_end)
-        return "\n".join(lines)
+            fh.write(row_start + cell_separator.join(bold_header) + row_end)
+        for rows in self._iter_str_rows(mode = "html", chunk_rows = chunk_rows):
+            fh.write("".join(row_start + cell_separator.join(row) + row_end for row in rows))
+        fh.write("\n" + table_end)
+
+    def str_html(self, align = "center"):
+        output = io.StringIO()
+        self.write_html(output, align = align)
+        return output.getvalue()
 
 
     # Wrappers
     def jupyter_print(self, mode = 'html'):
         if mode == 'html':
             jupyter_html_print(self.str_html())
+
+def jupyter_profile_print(mode = 'html'):
+    """
+    Prints in the notebook the per figure breakdown of the profiling spans (see profiling.table)
+    """
+    from . import profiling
+    profiling.table().jupyter_print(mode = mode)
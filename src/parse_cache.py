@@ -0,0 +1,131 @@
+"""
+Opt-in on-disk cache for the parsed content of data files
+
+Once enabled, the array parsed out of a text file by Plot is saved as a .npy file
+in the cache directory and subsequent loads of the same file are served
+as a memory-mapped binary array instead of parsing the text again.
+
+Entries are keyed by the absolute path, modification time and size of the file,
+the columns requested and the comment characters.
+The total size of the cache is bounded, the least recently used entries are evicted first.
+
+    from plotting_device import parse_cache
+    parse_cache.enable("/tmp/plot_cache", max_size = 2*1024**3)
+"""
+
+import os
+import hashlib
+import numpy as np
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "plotting_device")
+DEFAULT_MAX_SIZE = 1024**3 # 1 GB
+# Layout of the cached arrays (one row per column used by Plot), part of the key so old entries are not reused
+_FORMAT = 2
+
+_config = {
+        "enabled" : False,
+        "directory" : DEFAULT_DIR,
+        "max_size" : DEFAULT_MAX_SIZE,
+        }
+
+def enable(directory = None, max_size = None):
+    """
+    Enable the cache
+    directory: where to store the cache files (default: ~/.cache/plotting_device)
+    max_size: maximum size in bytes of the cache directory
+    """
+    if directory:
+        _config["directory"] = directory
+    if max_size:
+        _config["max_size"] = max_size
+    os.makedirs(_config["directory"], exist_ok = True)
+    _config["enabled"] = True
+
+def disable():
+    _config["enabled"] = False
+
+def is_enabled():
+    return _config["enabled"]
+
+def _path_hash(filename):
+    return hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()[:16]
+
+def _entry_name(filename, columns_x, columns_y, comments):
+    stat = os.stat(filename)
+    key = repr((_FORMAT, os.path.abspath(filename), stat.st_mtime_ns, stat.st_size,
+                list(columns_x), list(columns_y), list(comments)))
+    key_hash = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return "{0}-{1}.npy".format(_path_hash(filename), key_hash)
+
+def _entries():
+    """ Returns a list of (path, size, mtime) for every entry in the cache """
+    directory = _config["directory"]
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".npy"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+def _evict(keep = None):
+    """
+    Remove the least recently used entries until the cache fits in max_size
+    keep: path of an entry that must not be removed
+    """
+    entries = sorted(_entries(), key = lambda entry: entry[2])
+    total = sum(entry[1] for entry in entries)
+    for path, size, _ in entries:
+        if total <= _config["max_size"]:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def invalidate(filename):
+    """ Remove every cache entry corresponding to filename """
+    prefix = _path_hash(filename) + "-"
+    for path, _, _ in _entries():
+        if os.path.basename(path).startswith(prefix):
+            os.remove(path)
+
+def clear():
+    """ Remove all entries from the cache """
+    for path, _, _ in _entries():
+        os.remove(path)
+
+def load(filename, columns_x, columns_y, comments, loader):
+    """
+    Returns the array loader(filename) would return
+    If the cache is enabled and holds an entry for this file and set of columns
+    the array is memory-mapped from the binary file instead
+    """
+    if not _config["enabled"]:
+        return loader(filename)
+    path = os.path.join(_config["directory"], _entry_name(filename, columns_x, columns_y, comments))
+    if os.path.exists(path):
+        try:
+            data = np.load(path, mmap_mode = "r")
+            os.utime(path) # mark as recently used
+            return data
+        except (OSError, ValueError):
+            # Corrupted entry, parse the file again
+            os.remove(path)
+    data = loader(filename)
+    os.makedirs(_config["directory"], exist_ok = True)
+    tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        np.save(f, data)
+    os.replace(tmp_path, path)
+    _evict(keep = path)
+    return data
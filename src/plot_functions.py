@@ -1,55 +1,103 @@
-import extend_class as ec
+import threading
+import contextlib
 import numpy as np
-
-def default_plt():
-    import matplotlib.pyplot as plt
-
-    font_family = 'sans-serif'
-    font = 'Iosevka'
-    text_weight = 'medium'
-    label_size = 22
-    capsize = 4
-
-    plt.rcParams['font.family'] = font_family
-    plt.rcParams['font.sans-serif'] = font
-    plt.rcParams['font.weight'] = text_weight
-    plt.rcParams['xtick.labelsize'] = label_size
-    plt.rcParams['ytick.labelsize'] = label_size
-    plt.rcParams['errorbar.capsize'] = capsize
-
+from . import profiling
+
+font_family = 'sans-serif'
+font = 'Iosevka'
+text_weight = 'medium'
+label_size = 22
+capsize = 4
+
+# rcParams of the default style, used by default_plt and style_context
+STYLE = {
+    'font.family' : font_family,
+    'font.sans-serif' : font,
+    'font.weight' : text_weight,
+    'xtick.labelsize' : label_size,
+    'ytick.labelsize' : label_size,
+    'errorbar.capsize' : capsize,
     # Grid
-    plt.rcParams['grid.linestyle'] = '--'
-    plt.rcParams['grid.linewidth'] = 0.7
-
+    'grid.linestyle' : '--',
+    'grid.linewidth' : 0.7,
     # Generic lines
-    plt.rcParams['lines.linewidth'] = 2.0
-
+    'lines.linewidth' : 2.0,
     # Legend
-    plt.rcParams['legend.fontsize'] = label_size-4
-    plt.rcParams['legend.frameon'] = False
-
+    'legend.fontsize' : label_size-4,
+    'legend.frameon' : False,
     # Axes
-    plt.rcParams['axes.linewidth'] = 2.2
-    plt.rcParams['axes.labelsize'] = label_size
-    plt.rcParams['axes.titlesize'] = label_size 
-
+    'axes.linewidth' : 2.2,
+    'axes.labelsize' : label_size,
+    'axes.titlesize' : label_size,
     # Ticks
-    plt.rcParams['xtick.direction'] = "in"
-    plt.rcParams['ytick.direction'] = "in"
-
-
-#     plt.rcParams['text.usetex'] = False
+    'xtick.direction' : "in",
+    'ytick.direction' : "in",
+#     'text.usetex' : False,
+    }
 
+def default_plt():
+    import matplotlib.pyplot as plt
+    plt.rcParams.update(STYLE)
     return plt
 
-def draw_canvas(plt, nrows = 2, ncols = 1, gridspec_kw = None, sharex = True, multiscales = False): 
+# Threads currently inside style_context and the rcParams they replaced
+_style_lock = threading.Lock()
+_style_users = {"count" : 0, "saved" : None}
+
+@contextlib.contextmanager
+def style_context():
+    """
+    Applies STYLE to the rcParams while inside the context, without pyplot
+    The context can be entered from many threads at the same time: the style is applied by the first one
+    and the previous rcParams are restored when the last one leaves
+    Everything reading rcParams (creating the canvas, drawing, saving) should happen inside the context
+
+    Warning: rcParams are global to the process, so while any thread is inside the context
+    every figure of the process (pyplot, a notebook, other threads) gets STYLE too.
+    Nothing that should keep the previous rcParams may draw or save until the last thread leaves.
+    (matplotlib.rc_context changes the same global rcParams, so it can't isolate threads either)
+
+        with pf.style_context():
+            fig, axis = pf.canvas_plot_and_ratio(None)
+            ...
+            pf.save_to_file(fig, "plot.pdf")
+    """
+    from matplotlib import rcParams
+    with _style_lock:
+        if _style_users["count"] == 0:
+            _style_users["saved"] = {key : rcParams[key] for key in STYLE}
+            rcParams.update(STYLE)
+        _style_users["count"] += 1
+    try:
+        yield
+    finally:
+        with _style_lock:
+            _style_users["count"] -= 1
+            if _style_users["count"] == 0:
+                rcParams.update(_style_users["saved"])
+                _style_users["saved"] = None
+
+def new_figure(**figure_kwargs):
+    """
+    Creates a Figure with an Agg canvas without going through pyplot
+    The figure is not registered anywhere, it is freed as soon as it is not referenced
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(**figure_kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+@profiling.instrument("figure.canvas")
+def draw_canvas(plt = None, nrows = 2, ncols = 1, gridspec_kw = None, sharex = True, multiscales = False): 
     """
     Call subplots to draw canvas using the gridspec_kw dictionary
     If multiscales, creates a twinx for each axis, numbered at the end of the normal axis list
             ie, if there is 4 subplots, the twinx plots indices are axis[4] for axis[0], 5 for 1, etc.
+    With plt = None the figure is created without pyplot (see new_figure and style_context)
     """
     if not gridspec_kw: # Use default [1,1,1,1]
-        ratios = ncols*nrows*[1]
+        ratios = nrows*[1]
         gridspec_kw = {
             'height_ratios' : ratios,
             'hspace' : 0,
@@ -57,27 +105,29 @@ def draw_canvas(plt, nrows = 2, ncols = 1, gridspec_kw = None, sharex = True, mu
             'right' : 2.0,
             'bottom' : 0.0,
             'top' : 1.0 }
-    fig, axis = plt.subplots(nrows, ncols, sharex = sharex, gridspec_kw = gridspec_kw)
+    from .GnuAxes import GnuAxes
+    if plt is None:
+        fig = new_figure()
+    else:
+        fig = plt.figure()
+    axis = fig.subplots(nrows, ncols, sharex = sharex, gridspec_kw = gridspec_kw, subplot_kw = {"projection" : GnuAxes.name})
     if isinstance(axis, np.ndarray):  
-        axis = [ec.extend_all(i) for i in axis]
+        axis = list(axis.flat)
     else:
-        axis = [ec.extend_all(axis)]
+        axis = [axis]
     if multiscales:
-        tmp = []
-        for axe in axis:
-            tmp_axe = axe.twinx()
-            tmp.append(ec.extend_all(tmp_axe))
-        axis += tmp
+        axis += [axe.twinx() for axe in axis]
 
     return fig, axis
 
-def canvas_plot_and_ratio(plt, ratio = [1.5,1], ratio_range = (0.5,1.5), n_ticks = 4, format_tick = "%.0f", keep_limits = False, mode = 'landscape', size = None):
+def canvas_plot_and_ratio(plt = None, ratio = [1.5,1], ratio_range = (0.5,1.5), n_ticks = 4, format_tick = "%.0f", keep_limits = False, mode = 'landscape', size = None):
     """
     Create a figure for a plot-ratio 
     ratio: ratio between proper plot and ratio_plot (default, plot 1.5 times bigger than ratio, [1.5,1])
     ratio_range: yrange for ratio plot (default 0.5 to 1.5)
     n_ticks: how many ticks to print
     format_tick: default format tick for plot (default %.0f)
+    plt: pyplot, or None to create the figure without it (see draw_canvas)
     """
     if size:
         rit = size[0]
@@ -107,6 +157,80 @@ def canvas_plot_and_ratio(plt, ratio = [1.5,1], ratio_range = (0.5,1.5), n_ticks
     return fig, axis
     
 
-def save_to_file(fig, filename):
-    fig.savefig(filename, bbox_inches = 'tight')
+def canvas_from_layout(plt = None, layout = "plot_and_ratio", **canvas_kwargs):
+    """
+    Creates a canvas by name: "plot_and_ratio" (canvas_plot_and_ratio) or "canvas" (draw_canvas)
+    """
+    if layout == "plot_and_ratio":
+        return canvas_plot_and_ratio(plt, **canvas_kwargs)
+    elif layout == "canvas":
+        return draw_canvas(plt, **canvas_kwargs)
+    raise Exception("Unknown layout {0}".format(layout))
 
+def n_elements(artist):
+    """
+    Number of elements drawn by artist: points of a line, vertices (or markers) of a collection or a patch
+    """
+    from matplotlib.lines import Line2D
+    from matplotlib.collections import Collection
+    if isinstance(artist, Line2D):
+        return len(artist.get_xdata())
+    elif isinstance(artist, Collection):
+        return max(sum(len(path.vertices) for path in artist.get_paths()), len(artist.get_offsets()))
+    return len(artist.get_path().vertices)
+
+def heavy_artists(fig, rasterize_above):
+    """
+    Lines, collections and patches of the axes of fig with more than rasterize_above elements (see n_elements)
+    The axes themselves, ticks, labels, legends and the line across one of relimit are never included
+    """
+    heavy = []
+    for axis in fig.axes:
+        line_one = getattr(axis, "gnu_line_one", None)
+        for artist in list(axis.lines) + list(axis.collections) + list(axis.patches):
+            if artist is line_one or artist.get_rasterized():
+                continue
+            if n_elements(artist) > rasterize_above:
+                heavy.append(artist)
+    return heavy
+
+@profiling.instrument("figure.save")
+def save_to_file(fig, filename, pad_inches = None, rasterize_above = None, dpi = None):
+    """
+    Saves fig to filename cropped to its tight bounding box (plus pad_inches, default: savefig.pad_inches)
+    fig and filename can also be lists, then every figure is saved with the width and height of the largest ones:
+    the smaller figures get extra margin on the left and at the bottom (where the tick and axis labels are)
+    so the axes line up when the figures are put side by side or one after the other
+    rasterize_above: artists with more elements than this (see heavy_artists) are rasterized at dpi
+    (default: savefig.dpi) in vector outputs, everything else is kept as vectors
+    """
+    if pad_inches is None:
+        from matplotlib import rcParams
+        pad_inches = rcParams['savefig.pad_inches']
+    figs = list(fig) if isinstance(fig, (list, tuple)) else [fig]
+    if isinstance(fig, (list, tuple)) and not isinstance(filename, (list, tuple)):
+        raise Exception("A list of figures needs a list of filenames, got {0!r}".format(filename))
+    filenames = list(filename) if isinstance(fig, (list, tuple)) else [filename]
+    if len(figs) != len(filenames):
+        raise Exception("Got {0} figures and {1} filenames".format(len(figs), len(filenames)))
+    rasterized = []
+    if rasterize_above is not None:
+        for i in figs:
+            rasterized += heavy_artists(i, rasterize_above)
+    for artist in rasterized:
+        artist.set_rasterized(True)
+    try:
+        if not isinstance(fig, (list, tuple)):
+            fig.savefig(filename, bbox_inches = 'tight', pad_inches = pad_inches, dpi = dpi)
+            return
+        from matplotlib.transforms import Bbox
+        boxes = [i.get_tightbbox() for i in figs]
+        width = max(box.width for box in boxes)
+        height = max(box.height for box in boxes)
+        for i, name, box in zip(figs, filenames, boxes):
+            aligned = Bbox.from_extents(box.x1 - width, box.y1 - height, box.x1, box.y1)
+            i.savefig(name, bbox_inches = aligned.padded(pad_inches), dpi = dpi)
+    finally:
+        # Leave the figures as they were
+        for artist in rasterized:
+            artist.set_rasterized(False)
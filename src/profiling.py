@@ -0,0 +1,220 @@
+"""
+Opt-in instrumentation of the slow stages of the library
+
+Once enabled, the instrumented functions (file parsing, envelopes, _cook_data, the plot algebra,
+the drawing methods of extend_class, canvases and save_to_file) record a span with their duration
+and the number of elements (bins, points...) they worked on.
+Spans are attributed to the figure being made (see figure, batch_render and FigureTemplate do it for every output)
+
+    from plotting_device import profiling
+    profiling.enable()
+    with profiling.figure("ratio_01.pdf"):
+        ...
+    jupyter_tricks.jupyter_profile_print()       # or print(profiling.table().str_latex())
+    profiling.write_chrome_trace("trace.json")   # for chrome://tracing or https://ui.perfetto.dev
+
+When disabled (the default) an instrumented function only pays for checking a flag
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+import contextlib
+import numpy as np
+
+_config = {
+        "enabled" : False,
+        "pid" : None,
+        }
+
+# Spans as tuples of _FIELDS (cheaper to store than dictionaries, see records)
+_FIELDS = ("name", "figure", "start", "duration", "size", "pid", "thread")
+_records = []
+_local = threading.local()
+
+def enable():
+    """
+    Start recording spans (the records of previous runs are kept, see reset)
+    """
+    _config["enabled"] = True
+    _config["pid"] = os.getpid()
+
+def disable():
+    _config["enabled"] = False
+
+def is_enabled():
+    return _config["enabled"]
+
+def reset():
+    """
+    Drop all the records
+    """
+    del _records[:]
+
+def _current_figure():
+    stack = getattr(_local, "figures", None)
+    return stack[-1] if stack else None
+
+def _record(name, start, end, size):
+    _records.append((name, _current_figure(), start, end - start, size, _config["pid"], threading.get_ident()))
+
+@contextlib.contextmanager
+def figure(name):
+    """
+    Attributes the spans recorded inside (in this thread) to the figure name
+    """
+    stack = getattr(_local, "figures", None)
+    if stack is None:
+        stack = _local.figures = []
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+@contextlib.contextmanager
+def span(name, size = None):
+    """
+    Records the code inside as a span called name (if enabled)
+    """
+    if not _config["enabled"]:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter(), size)
+
+def instrument(name, size = None):
+    """
+    Decorator that records every call of the function as a span called name (if enabled)
+    size(args, result) returns the number of elements of the call
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _config["enabled"]:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            end = time.perf_counter()
+            _record(name, start, end, size(args, result) if size else None)
+            return result
+        return wrapper
+    return decorator
+
+# Sizes of the usual arguments
+def size_of_self(args, result):
+    """ Bins of the plot the method was called on """
+    return _n_bins(args[0])
+
+def size_of_result(args, result):
+    """ Bins of the plot returned """
+    return _n_bins(result)
+
+def size_of_argument(args, result):
+    """ Elements of the first argument of a method, ie the arrays of _create_envelope """
+    return int(np.size(args[1]))
+
+def size_of_plot(args, result):
+    """ Bins of the plot drawn by one of the axis methods, axis.method(plot) """
+    return _n_bins(args[1])
+
+def _n_bins(plot):
+    try:
+        return len(plot.x)
+    except (AttributeError, TypeError):
+        return None
+
+# Records and summaries
+
+def records():
+    """
+    List of the spans recorded so far (dictionaries with name, figure, start, duration, size, pid and thread)
+    """
+    return [dict(zip(_FIELDS, record)) for record in _records]
+
+def take_records():
+    """
+    Returns the spans recorded so far and drops them (ie, to send them from a worker process)
+    """
+    taken = records()
+    del _records[:len(taken)]
+    return taken
+
+def add_records(new_records):
+    """
+    Adds spans recorded somewhere else (ie, by take_records in a worker process)
+    """
+    _records.extend(tuple(record[field] for field in _FIELDS) for record in new_records)
+
+def summary():
+    """
+    Per figure breakdown: list with the number of calls, total, mean and maximum time
+    and total number of elements (None for spans without size) of every span name of every figure, in order of appearance
+    """
+    groups = {}
+    for record in records():
+        key = (record["figure"], record["name"])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"figure" : record["figure"], "name" : record["name"],
+                    "calls" : 0, "total" : 0.0, "max" : 0.0, "size" : None}
+        group["calls"] += 1
+        group["total"] += record["duration"]
+        group["max"] = max(group["max"], record["duration"])
+        if record["size"] is not None:
+            group["size"] = (group["size"] or 0) + record["size"]
+    for group in groups.values():
+        group["mean"] = group["total"]/group["calls"]
+    return list(groups.values())
+
+def table():
+    """
+    DataTable with the summary (times in ms), see jupyter_tricks.jupyter_profile_print
+    """
+    from .jupyter_tricks import DataTable
+    rows = summary()
+    header = ["figure", "stage", "calls", "total (ms)", "mean (ms)", "max (ms)", "elements"]
+    columns = [
+            [row["figure"] or "-" for row in rows],
+            [row["name"] for row in rows],
+            [row["calls"] for row in rows],
+            ["{0:.3f}".format(1e3*row["total"]) for row in rows],
+            ["{0:.3f}".format(1e3*row["mean"]) for row in rows],
+            ["{0:.3f}".format(1e3*row["max"]) for row in rows],
+            ["-" if row["size"] is None else row["size"] for row in rows],
+            ]
+    return DataTable.from_columns(columns, header = header)
+
+def write_json(filename):
+    """
+    Writes the spans and the per figure summary to filename
+    """
+    with open(filename, "w") as f:
+        json.dump({"records" : records(), "summary" : summary()}, f, indent = 1)
+
+def write_chrome_trace(filename):
+    """
+    Writes the spans in the Chrome trace event format (chrome://tracing, https://ui.perfetto.dev)
+    """
+    events = []
+    for record in records():
+        args = {"figure" : record["figure"]}
+        if record["size"] is not None:
+            args["size"] = record["size"]
+        events.append({
+            "name" : record["name"],
+            "cat" : "plotting_device",
+            "ph" : "X",
+            "ts" : 1e6*record["start"],
+            "dur" : 1e6*record["duration"],
+            "pid" : record["pid"],
+            "tid" : record["thread"],
+            "args" : args,
+            })
+    with open(filename, "w") as f:
+        json.dump({"traceEvents" : events, "displayTimeUnit" : "ms"}, f)
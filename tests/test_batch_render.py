@@ -0,0 +1,73 @@
+import os
+import pytest
+
+matplotlib = pytest.importorskip("matplotlib")
+
+from plotting_device import Plot
+from plotting_device import batch_render
+from plotting_device import plot_functions as pf
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+
+def specs(tmp_path, n_figures = 3):
+    plot_kwargs = {"filename" : os.path.join(TEST_DATA, "test1.dat"), "columns_x" : [1, 0, 2], "columns_y" : [3, 4, 5, 6]}
+    p2 = Plot(os.path.join(TEST_DATA, "test2.dat"), columns_x = [1, 0, 2], columns_y = [3, 4, 5, 6])
+    return [{
+        "output" : str(tmp_path / "figure_{0}.png".format(i)),
+        "draw" : [
+            {"plot" : plot_kwargs, "method" : "gnu_errorbar", "axis" : 0},
+            {"plot" : p2, "method" : "draw_boxxyerrorbar", "axis" : 0, "style" : {"color" : "red"}},
+            {"plot" : p2, "method" : "gnu_line", "axis" : 1, "kwargs" : {"draw_labels" : False}},
+            ],
+        "relimit" : {1 : {"line_one" : True}},
+        } for i in range(n_figures)]
+
+@pytest.mark.filterwarnings("ignore:findfont")
+@pytest.mark.parametrize("kwargs", [{"workers" : 1}, {"threads" : True, "workers" : 2}])
+def test_in_process_leaves_global_state(tmp_path, kwargs):
+    backend = matplotlib.get_backend()
+    rc = {key : matplotlib.rcParams[key] for key in pf.STYLE}
+    results = batch_render.render_all(specs(tmp_path), **kwargs)
+    assert [result["error"] for result in results] == [None]*3
+    assert all(os.path.getsize(result["output"]) > 0 for result in results)
+    assert {key : matplotlib.rcParams[key] for key in pf.STYLE} == rc
+    assert matplotlib.get_backend() == backend
+    assert "plt" not in batch_render._worker
+
+def test_errors_do_not_stop_the_batch(tmp_path):
+    broken = specs(tmp_path, 2)
+    broken[0]["draw"][0]["plot"] = {"filename" : str(tmp_path / "missing.dat")}
+    results = batch_render.render_all(broken, workers = 1)
+    assert results[0]["error"].startswith("FileNotFoundError")
+    assert results[1]["error"] is None
+    assert [result["output"] for result in results] == [spec["output"] for spec in broken]
+
+@pytest.mark.filterwarnings("ignore:findfont")
+def test_pooled_profiling_spans(tmp_path):
+    from plotting_device import profiling
+    profiling.reset()
+    profiling.enable()
+    try:
+        # Spans recorded in the parent before the pool is forked
+        for _ in range(3):
+            Plot(os.path.join(TEST_DATA, "test3.dat"))
+        figures = specs(tmp_path, 4)
+        before = profiling.records()
+        results = batch_render.render_all(figures, workers = 2)
+        records = profiling.records()
+    finally:
+        profiling.disable()
+        profiling.reset()
+    assert [result["error"] for result in results] == [None]*4
+    assert records[:len(before)] == before
+    new = records[len(before):]
+    assert all(record["pid"] != os.getpid() for record in new)
+    assert all(record["figure"] in [result["output"] for result in results] for record in new)
+    # Every figure: one canvas, one save and the file read by the worker
+    for result in results:
+        names = [record["name"] for record in new if record["figure"] == result["output"]]
+        assert names.count("figure.canvas") == 1
+        assert names.count("figure.save") == 1
+        assert names.count("plot.load") == 1
+    # 3 above, the plot made by specs and one per figure
+    assert sum(record["name"] == "plot.load" for record in records) == 3 + 1 + 4
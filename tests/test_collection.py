@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+from plotting_device.PlotCollection import PlotCollection
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+
+def write_files(tmp_path, n_files, broken = ()):
+    """ n_files small files, different from each other, those in broken have no data """
+    filenames = []
+    for i in range(n_files):
+        path = tmp_path / "run_{0:02d}.dat".format(i)
+        if i in broken:
+            path.write_text("# nothing here\n")
+        else:
+            data = np.arange(28, dtype = float).reshape(4, 7) + 100*i
+            data[:, 2] = data[:, 0] + 10.0
+            np.savetxt(path, data)
+        filenames.append(str(path))
+    return filenames
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_order(tmp_path, workers):
+    # Reversed so the order of the collection can't come from sorting
+    filenames = write_files(tmp_path, 6)[::-1]
+    collection = PlotCollection.from_files(filenames, workers = workers)
+    assert collection.errors == {}
+    assert collection.filenames == filenames
+    for filename, plot in zip(filenames, collection):
+        np.testing.assert_array_equal(plot.y, Plot(filename).y)
+
+def test_from_glob(tmp_path):
+    filenames = write_files(tmp_path, 3)
+    collection = PlotCollection.from_glob(str(tmp_path / "run_*.dat"), workers = 2)
+    assert collection.filenames == filenames
+    assert len(collection) == 3
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_errors_keep_legends_and_colors(tmp_path, workers):
+    filenames = write_files(tmp_path, 5, broken = (1, 3))
+    filenames.append(str(tmp_path / "missing.dat"))
+    legends = ["legend {0}".format(i) for i in range(6)]
+    colors = ["C{0}".format(i) for i in range(6)]
+    collection = PlotCollection.from_files(filenames, workers = workers, legends = legends, colors = colors)
+
+    assert collection.filenames == [filenames[i] for i in (0, 2, 4)]
+    assert [plot.legend for plot in collection] == ["legend 0", "legend 2", "legend 4"]
+    assert [plot.color for plot in collection] == ["C0", "C2", "C4"]
+    for plot in collection:
+        np.testing.assert_array_equal(plot.y, Plot(plot.filename).y)
+
+    assert sorted(collection.errors) == sorted([filenames[1], filenames[3], filenames[5]])
+    assert "No data found" in collection.errors[filenames[1]]
+    assert collection.errors[filenames[5]].startswith("FileNotFoundError")
+    assert str(collection) == "PlotCollection with 3 plots (3 errors)"
+
+def test_wrong_lengths(tmp_path):
+    filenames = write_files(tmp_path, 2)
+    with pytest.raises(Exception, match = "same length"):
+        PlotCollection.from_files(filenames, legends = ["only one"])
+
+def test_test_data():
+    filenames = [os.path.join(TEST_DATA, name) for name in ["test1.dat", "test2.dat", "test3.dat"]]
+    collection = PlotCollection.from_files(filenames, workers = 2, block_size = 5)
+    assert collection.filenames == filenames
+    for filename, plot in zip(filenames, collection):
+        np.testing.assert_array_equal(plot.ymax, Plot(filename).ymax)
@@ -0,0 +1,171 @@
+import io
+import numpy as np
+import pytest
+
+from plotting_device import NewNumber, NewNumberArray, DataTable
+
+# The writers of the original (row by row) DataTable, the columnar one must give the same bytes
+
+def baseline_latex(header, ncols, rows, align = "c", v_sep = "", h_sep = "", environment = "tabular"):
+    def str_row(row):
+        return [str(item).replace("%", "\\%") for item in row]
+    environment_c = "{" + environment + "}"
+    if "-" in h_sep or "_" in h_sep:
+        latex_sep = "    \\\\ \\hline\n"
+    else:
+        latex_sep = "     \\\\ {0}\n".format(h_sep)
+    positioning_sp = " {0} ".format(align)
+    if header and h_sep == "":
+        header_sep = "    \\\\ \\hline\n"
+    else:
+        header_sep = latex_sep
+    amp = " & "
+    columns = "{" + v_sep + v_sep.join(ncols*[positioning_sp]) + v_sep + "}"
+    latex_out = "\\begin{0}{1}".format(environment_c, columns) + "\n"
+    if header:
+        latex_out += "\\hline " + amp.join(str_row(header)) + header_sep
+    lines = [amp.join(str_row(row)) for row in rows]
+    lines.append("\\end{0}".format(environment_c))
+    return latex_out + latex_sep.join(lines)
+
+def baseline_html(header, rows, align = "center"):
+    table_style = "border-collapse: separate; border-spacing: 1px; width:95%; margin-left:auto; margin-right:auto;"
+    cell_start = '<td style="{0}">'.format("text-align: {0};".format(align))
+    cell_end = "</td>"
+    cell_separator = cell_end + "\n\t\t" + cell_start
+    row_start = "\t<tr>\n\t\t" + cell_start
+    row_end = cell_end + "\n\t</tr>"
+    lines = ['<table style="{0}">'.format(table_style)]
+    if header:
+        lines.append(row_start + cell_separator.join("<strong>{0}</strong>".format(i) for i in header) + row_end)
+    for row in rows:
+        lines.append(row_start + cell_separator.join(str(i) for i in row) + row_end)
+    lines.append("</table>")
+    return "\n".join(lines)
+
+HEADER = ["process", "events", "efficiency", "cut"]
+NAN = float("nan")
+
+def mixed_rows():
+    """ Rows with str, int, float, numpy scalars, percent signs and latex in them """
+    return [
+        ["ttbar", 120, 0.5, "pT > 20%"],
+        ["W+jets", np.int64(7), np.float64(0.125), "$\\eta < 2.5$"],
+        ["Z", 3, 1e-7, None],
+        ["H", np.float32(0.1), 2.0/3.0, True],
+        ["other", -0, NAN, [1, 2]],
+        ]
+
+def streamed(table, writer, chunk_rows):
+    output = io.StringIO()
+    getattr(table, writer)(output, chunk_rows = chunk_rows)
+    return output.getvalue()
+
+def assert_same_output(table, header, rows):
+    assert table.data_raw == [list(row) for row in rows]
+    latex = baseline_latex(header, len(rows[0]) if rows else table.ncols, rows)
+    html = baseline_html(header, rows)
+    assert table.str_latex() == latex
+    assert table.str_html() == html
+    for chunk_rows in [1, 2, 1000]:
+        assert streamed(table, "write_latex", chunk_rows) == latex
+        assert streamed(table, "write_html", chunk_rows) == html
+    for h_sep in ["-", "\\cline{1-2}"]:
+        assert table.str_latex(align = "l", v_sep = "|", h_sep = h_sep) == \
+                baseline_latex(header, table.ncols, rows, align = "l", v_sep = "|", h_sep = h_sep)
+
+def test_add_row():
+    table = DataTable(header = HEADER)
+    for row in mixed_rows():
+        table.add_row(row)
+    assert_same_output(table, HEADER, mixed_rows())
+
+def test_add_row_with_row_header():
+    table = DataTable(header = "process&events&efficiency&cut")
+    for row in mixed_rows():
+        table.add_row(row[1:], row_header = row[0])
+    assert_same_output(table, HEADER, mixed_rows())
+
+def test_add_rows_and_add_row_mixed():
+    rows = mixed_rows()
+    table = DataTable(header = HEADER)
+    table.add_rows(rows[:2])
+    table.add_row(rows[2])
+    table.add_rows(rows[3:])
+    table.add_row(rows[0])
+    assert_same_output(table, HEADER, rows + [rows[0]])
+
+def test_numeric_chunks():
+    # Chunks with different dtypes are not promoted (ints stay ints)
+    ints = np.arange(6).reshape(3, 2)
+    floats = np.array([[0.1, 2.5], [1e-3, 3.0]])
+    singles = np.array([[0.1, 0.2]], dtype = np.float32)
+    table = DataTable(ncols = 2)
+    table.add_rows(ints)
+    table.add_rows(floats)
+    table.add_rows(singles)
+    table.add_row([1, 2])
+    rows = [list(i) for i in ints] + [list(i) for i in floats] + [list(i) for i in singles] + [[1, 2]]
+    assert table.str_latex() == baseline_latex(None, 2, rows)
+    assert table.str_html() == baseline_html(None, rows)
+    assert table.column(0).tolist() == [0, 2, 4, 0.1, 1e-3, np.float32(0.1), 1]
+
+def test_from_columns():
+    rows = mixed_rows()
+    columns = [list(i) for i in zip(*rows)]
+    assert_same_output(DataTable.from_columns(columns, header = HEADER), HEADER, rows)
+    table = DataTable.from_columns(dict(zip(HEADER, columns)))
+    assert table.header == HEADER
+    assert_same_output(table, HEADER, rows)
+
+def test_from_data():
+    rows = mixed_rows()
+    assert_same_output(DataTable(data = [HEADER] + rows), HEADER, rows)
+    assert_same_output(DataTable(data = rows, header = HEADER), HEADER, rows)
+
+def test_pending_rows():
+    # Rows added with add_row are kept aside until the table is read or columns are added
+    table = DataTable(header = HEADER)
+    table.add_row(mixed_rows()[0])
+    table.add_row(mixed_rows()[1])
+    assert len(table._pending) == 2
+    assert len(table) == 2
+    table.add_columns([["Z"], [3], [1e-7], [None]])
+    assert table._pending == []
+    table.add_row(mixed_rows()[3])
+    assert len(table) == 4
+    assert_same_output(table, HEADER, mixed_rows()[:4])
+    assert table._pending == []
+
+def test_empty_tables():
+    assert DataTable(header = HEADER).str_latex() == baseline_latex(HEADER, 4, [])
+    assert DataTable(header = HEADER).str_html() == baseline_html(HEADER, [])
+    assert DataTable(ncols = 3).str_latex() == baseline_latex(None, 3, [])
+
+def test_newnumbers():
+    # str(NewNumber) in plain text, the latex and html variants otherwise
+    number = NewNumber(1.234, 0.0567)
+    table = DataTable(ncols = 2)
+    table.add_row(["a", number])
+    table.add_columns([["b"], NewNumberArray([12.0], [0.0])])
+    assert table.data_raw[0][1] is number
+    assert str(table.data_raw[1][1]) == "12.0"
+    assert table.str_latex() == baseline_latex(None, 2, [["a", "$1.23 \\pm 0.06$"], ["b", "12.0"]])
+    assert table.str_html() == baseline_html(None, [["a", "1.23 &plusmn; 0.06"], ["b", "12.0"]])
+
+def test_data_raw_is_read_only():
+    table = DataTable(header = HEADER, data = mixed_rows())
+    with pytest.raises(AttributeError):
+        table.data_raw = []
+    rows = table.data_raw
+    rows.append(["extra", 1, 1.0, ""])
+    rows[0][0] = "changed"
+    assert len(table) == len(mixed_rows())
+    assert table.data_raw[0][0] == "ttbar"
+
+def test_wrong_sizes():
+    table = DataTable(header = HEADER)
+    with pytest.raises(Exception, match = "do not match"):
+        table.add_row([1, 2])
+    with pytest.raises(Exception, match = "same number of rows"):
+        table.add_columns([[1], [2], [3, 4], [5]])
@@ -0,0 +1,84 @@
+import os
+import copy
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+
+def masked_integral(plot, xmin, xmax):
+    """ What get_integral_envelope did bin by bin: (y, ymax, ymin, error) """
+    inside = (plot.xmin >= xmin) & (plot.xmax <= xmax)
+    width = (plot.xmax - plot.xmin)[inside]
+    return (np.sum(plot.y[inside]*width), np.sum(plot.ymax[inside]*width), np.sum(plot.ymin[inside]*width),
+            np.sqrt(np.sum(plot.stat_err[inside]**2)))
+
+def masked_total(plot, xmin, xmax):
+    inside = (plot.x >= xmin) & (plot.x <= xmax)
+    return np.sum(plot.y[inside]), np.sqrt(np.sum(plot.stat_err[inside]**2))
+
+def wide_range_plot():
+    """ 500 bins around 1e9 followed by 500 bins around 1e-6 """
+    rng = np.random.default_rng(5)
+    edges = 10.0*np.arange(1001)
+    y = np.concatenate([rng.uniform(0.5e9, 1.5e9, 500), rng.uniform(0.5e-6, 1.5e-6, 500)])
+    x_data = [(edges[:-1] + edges[1:])/2.0, edges[:-1], edges[1:]]
+    return Plot(x_data = x_data, y_data = [y, 1.1*y, 0.9*y, 0.01*y])
+
+@pytest.mark.parametrize("name", ["test1.dat", "test2.dat", "test3.dat"])
+def test_windows_match_masked_sums(name):
+    plot = Plot(os.path.join(TEST_DATA, name))
+    rng = np.random.default_rng(1)
+    bounds = np.sort(rng.uniform(plot.xmin[0] - 10.0, plot.xmax[-1] + 10.0, (50, 2)), axis = 1)
+    batch = plot.get_integral_envelopes(bounds[:, 0], bounds[:, 1])
+    totals = plot.get_totals(bounds[:, 0], bounds[:, 1])
+    for i, (low, up) in enumerate(bounds):
+        np.testing.assert_allclose([j[i] for j in batch], masked_integral(plot, low, up), rtol = 1e-12, atol = 1e-12)
+        np.testing.assert_allclose([j[i] for j in totals], masked_total(plot, low, up), rtol = 1e-12, atol = 1e-12)
+
+def test_wide_dynamic_range():
+    plot = wide_range_plot()
+    y, dy = plot.get_integral(7000, 7100)
+    np.testing.assert_allclose((y, dy), [masked_integral(plot, 7000, 7100)[i] for i in (0, 3)], rtol = 1e-12)
+    assert y > 0.0 and dy > 0.0
+    total, dtotal = plot.get_total(7000, 7100)
+    np.testing.assert_allclose((total, dtotal), masked_total(plot, 7000, 7100), rtol = 1e-12)
+    # Every window, in one batch
+    lows = np.arange(0.0, 9000.0, 370.0)
+    ups = lows + 1230.0
+    batch = plot.get_integral_envelopes(lows, ups)
+    totals = plot.get_totals(lows, ups)
+    for i, (low, up) in enumerate(zip(lows, ups)):
+        np.testing.assert_allclose([j[i] for j in batch], masked_integral(plot, low, up), rtol = 1e-12)
+        np.testing.assert_allclose([j[i] for j in totals], masked_total(plot, low, up), rtol = 1e-12)
+
+def test_empty_window():
+    plot = Plot(os.path.join(TEST_DATA, "test1.dat"))
+    assert plot.get_integral(plot.xmin[3] + 1.0, plot.xmax[3] - 1.0) == (0.0, 0.0)
+    assert plot.get_integrals([plot.xmax[-1] + 1.0], [plot.xmax[-1] + 2.0])[0][0] == 0.0
+
+def test_in_place_edits():
+    plot = Plot(os.path.join(TEST_DATA, "test1.dat"))
+    integral = plot.get_integral()[0]
+    total = plot.get_total()[0]
+    plot.y *= 2
+    plot.invalidate()
+    np.testing.assert_allclose(plot.get_integral()[0], 2*integral, rtol = 1e-12)
+    np.testing.assert_allclose(plot.get_total()[0], 2*total, rtol = 1e-12)
+
+def test_mutators_invalidate():
+    plot = Plot(os.path.join(TEST_DATA, "test1.dat"))
+    integral = plot.get_integral()[0]
+    doubled = plot.treat_y(lambda y: 2*y)
+    np.testing.assert_allclose(doubled.get_integral()[0], 2*integral, rtol = 1e-12)
+    np.testing.assert_allclose(plot.get_integral()[0], integral, rtol = 1e-12)
+    rebinned = copy.copy(plot)
+    rebinned.rebin(2)
+    np.testing.assert_allclose(rebinned.get_integral()[0], masked_integral(rebinned, rebinned.xmin[0], rebinned.xmax[-1])[0], rtol = 1e-12)
+    np.testing.assert_allclose(plot.get_integral()[0], integral, rtol = 1e-12)
+
+def test_single_point():
+    plot = Plot(x_data = [[5.0]], y_data = [[3.0], [3.5], [2.5], [0.1]])
+    assert plot.get_integral() == (3.0, 0.1)
+    assert plot.get_integral(100, 200) == (3.0, 0.1)
@@ -0,0 +1,107 @@
+import os
+import copy
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+from plotting_device.LazyPlot import LazyPlot
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+ARRAYS = ["x", "xmin", "xmax", "y", "ymin", "ymax", "stat_err"]
+
+def data_plots():
+    return [Plot(os.path.join(TEST_DATA, name), columns_x = [1, 0, 2], columns_y = [3, 4, 5, 6])
+            for name in ["test1.dat", "test2.dat", "test3.dat"]]
+
+def with_empty_bins(plot, bins):
+    """ Copy of plot with y (and its envelope and error) set to 0 in bins """
+    empty = copy.deepcopy(plot)
+    for name in ["y", "ymin", "ymax", "stat_err"]:
+        array = np.array(getattr(empty, name))
+        array[bins] = 0.0
+        setattr(empty, name, array)
+    return empty
+
+def assert_same_plot(lazy, eager):
+    assert isinstance(lazy, LazyPlot)
+    for name in ARRAYS:
+        np.testing.assert_allclose(getattr(lazy, name), getattr(eager, name), rtol = 1e-14, atol = 0.0, err_msg = name)
+
+EXPRESSIONS = {
+        "sum" : lambda p1, p2, p3: p1 + p2,
+        "difference" : lambda p1, p2, p3: p1 - p2,
+        "ratio" : lambda p1, p2, p3: p1/p2,
+        "sum of three" : lambda p1, p2, p3: p1 + p2 + p3,
+        "ratio of sums" : lambda p1, p2, p3: (p1 + p2)/(p2 - p3),
+        "ratio of ratios" : lambda p1, p2, p3: (p1/p2)/(p3/p2),
+        "by a number" : lambda p1, p2, p3: (p1 - p3)/2.5,
+        "by a number with error" : lambda p1, p2, p3: (p1 + p2)/(3.0, 0.2),
+        }
+
+@pytest.mark.parametrize("name", list(EXPRESSIONS))
+def test_expressions(name):
+    expression = EXPRESSIONS[name]
+    p1, p2, p3 = data_plots()
+    assert_same_plot(expression(p1.lazy(), p2, p3), expression(p1, p2, p3))
+    # The lazy operand can be anywhere in the expression
+    assert_same_plot(expression(p1, p2.lazy(), p3.lazy()), expression(p1, p2, p3))
+
+def test_labels():
+    p1, p2, _ = data_plots()
+    p1.set_label_parameters(legend = "one", xlabel = "x")
+    p2.set_label_parameters(legend = "two")
+    p1.set_plot_parameters(color = "red", fmt = "o")
+    for lazy, eager in [(p1.lazy()/p2, p1/p2), (p1.lazy() + p2, p1 + p2)]:
+        for label in ["legend", "xlabel", "ylabel", "color", "fmt"]:
+            assert getattr(lazy, label) == getattr(eager, label), label
+
+@pytest.mark.parametrize("bins", [[0], [3, 4], [-1]])
+def test_ratio_drops_empty_bins(bins):
+    p1, p2, p3 = data_plots()
+    p2 = with_empty_bins(p2, bins)
+    assert_same_plot(p1.lazy()/p2, p1/p2)
+    assert len((p1.lazy()/p2).y) == len(p1.y) - len(bins)
+    # Also when the ratio is not the last operation, the bins are dropped at the end
+    lazy = (p1.lazy()/p2 + p3/p1)
+    eager_mask = p2.y != 0.0
+    reference = (p1/p2).y + (p3/p1).y[eager_mask]
+    np.testing.assert_allclose(lazy.y, reference, rtol = 1e-14)
+
+def test_rebin():
+    p1, p2, _ = data_plots()
+    eager = p1/p2
+    eager.rebin(2)
+    lazy = p1.lazy()/p2
+    lazy.rebin(2)
+    assert_same_plot(lazy, eager)
+    assert lazy.rebinned == eager.rebinned == 2
+
+    # Rebinning the operands first
+    q1, q2, _ = data_plots()
+    for plot in (q1, q2):
+        plot.rebin(2)
+    assert_same_plot(q1.lazy() + q2, q1 + q2)
+
+def test_envelope():
+    p1, p2, p3 = data_plots()
+    lazy = (p1.lazy() + p2)/p3
+    eager = (p1 + p2)/p3
+    assert np.all(lazy.ymin <= lazy.y) and np.all(lazy.y <= lazy.ymax)
+    for xmin, xmax in [(None, None), (30.0, 150.0), (45.0, 45.0)]:
+        assert lazy.get_integral_envelope(xmin, xmax) == pytest.approx(eager.get_integral_envelope(xmin, xmax), rel = 1e-14)
+        assert lazy.get_total(xmin, xmax) == pytest.approx(eager.get_total(xmin, xmax), rel = 1e-14)
+
+def test_evaluated_once():
+    p1, p2, _ = data_plots()
+    lazy = p1.lazy() + p2
+    assert str(lazy) == "Lazy plot (sum)"
+    result = lazy.evaluate()
+    assert lazy.evaluate() is result
+    assert isinstance(result, Plot)
+
+def test_incompatible():
+    p1, p2, _ = data_plots()
+    p2.rebin(2)
+    lazy = p1.lazy() + p2
+    with pytest.raises(Exception, match = "not compatible"):
+        lazy.evaluate()
@@ -0,0 +1,87 @@
+import operator
+import numpy as np
+import pytest
+
+from plotting_device import NewNumber, NewNumberArray
+
+OPERATIONS = [operator.add, operator.sub, operator.mul, operator.truediv]
+
+def operands(n = 200, seed = 5):
+    """ Two NewNumberArray with zeros (in values and errors), negative values and mixed magnitudes """
+    rng = np.random.default_rng(seed)
+    def values():
+        v = rng.normal(0.0, 1.0, n)*10.0**rng.uniform(-3, 3, n)
+        v[:10] = [0.0, -1.0, 1.0, -2.5, 2.5, -1e3, 1e-3, 0.0, -0.0, 7.0]
+        return v
+    def errors():
+        e = np.abs(rng.normal(0.0, 1.0, n))*10.0**rng.uniform(-4, 2, n)
+        e[5:15] = 0.0
+        return e
+    a = NewNumberArray(values(), errors())
+    b = NewNumberArray(values(), errors())
+    # Nothing is divided by 0
+    b.x[b.x == 0.0] = -3.0
+    return a, b
+
+def scalars(array):
+    return [NewNumber(x, dx) for x, dx in zip(array.x.tolist(), array.dx.tolist())]
+
+def assert_matches(result, expected):
+    assert isinstance(result, NewNumberArray)
+    assert len(result) == len(expected)
+    np.testing.assert_allclose(result.x, [i.x for i in expected], rtol = 1e-15, atol = 0.0)
+    np.testing.assert_allclose(result.dx, [i.dx for i in expected], rtol = 1e-15, atol = 0.0)
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_array_with_array(operation):
+    a, b = operands()
+    expected = [operation(i, j) for i, j in zip(scalars(a), scalars(b))]
+    assert_matches(operation(a, b), expected)
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+@pytest.mark.parametrize("number", [NewNumber(2.5, 0.3), NewNumber(-4.0, 0.5), NewNumber(-1.5, 0.0)])
+def test_array_with_newnumber(operation, number):
+    a, b = operands()
+    # array op NewNumber, and NewNumber op array (NewNumber defers to the array)
+    assert_matches(operation(a, number), [operation(i, number) for i in scalars(a)])
+    assert_matches(operation(number, b), [operation(number, j) for j in scalars(b)])
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+@pytest.mark.parametrize("factor", [3.0, -2.0, -1, 0.5])
+def test_array_with_factor(operation, factor):
+    a, _ = operands()
+    assert_matches(operation(a, factor), [operation(i, factor) for i in scalars(a)])
+    # Reflected: the factor has no error, same as NewNumber(factor, 0)
+    _, b = operands()
+    assert_matches(operation(factor, b), [operation(NewNumber(factor, 0.0), j) for j in scalars(b)])
+
+@pytest.mark.parametrize("operation", [operator.add, operator.sub, operator.mul])
+def test_multiplication_by_zero(operation):
+    a, _ = operands()
+    assert_matches(operation(a, 0.0), [operation(i, 0.0) for i in scalars(a)])
+    zero = NewNumber(0.0, 0.0)
+    assert_matches(operation(a, zero), [operation(i, zero) for i in scalars(a)])
+
+def test_with_numpy_arrays():
+    a, b = operands()
+    factors = b.x
+    for operation in OPERATIONS:
+        expected = [operation(i, NewNumber(f, 0.0)) for i, f in zip(scalars(a), factors.tolist())]
+        assert_matches(operation(a, factors), expected)
+        expected = [operation(NewNumber(f, 0.0), i) for i, f in zip(scalars(b), a.x.tolist())]
+        assert_matches(operation(a.x, b), expected)
+
+def test_chained():
+    a, b = operands()
+    c = NewNumberArray(np.linspace(1.0, 2.0, len(a)), 0.01)
+    result = (a*b - c)/(b + 2.0)
+    expected = [(i*j - k)/(j + 2.0) for i, j, k in zip(scalars(a), scalars(b), scalars(c))]
+    np.testing.assert_allclose(result.x, [i.x for i in expected], rtol = 1e-13)
+    np.testing.assert_allclose(result.dx, [i.dx for i in expected], rtol = 1e-13)
+
+def test_negation():
+    a, _ = operands()
+    negative = -a
+    np.testing.assert_array_equal(negative.x, -a.x)
+    np.testing.assert_array_equal(negative.dx, a.dx)
+    assert_matches(negative, [NewNumber(0.0, 0.0) - i for i in scalars(a)])
@@ -0,0 +1,142 @@
+import os
+import numpy as np
+import pytest
+
+from plotting_device import parse_cache, dat_reader
+
+@pytest.fixture
+def cache(tmp_path):
+    saved = dict(parse_cache._config)
+    parse_cache.enable(str(tmp_path / "cache"), max_size = 10**9)
+    yield tmp_path / "cache"
+    parse_cache._config.update(saved)
+
+class Loader:
+    """ dat_reader.read_columns that counts how many times the file is parsed """
+    def __init__(self, usecols = range(4), comments = ("#", "@")):
+        self.usecols = usecols
+        self.comments = comments
+        self.calls = 0
+    def __call__(self, filename):
+        self.calls += 1
+        return dat_reader.read_columns(filename, self.usecols, comments = self.comments)
+
+def write_file(path, n_rows = 20, offset = 0.0):
+    data = np.arange(4*n_rows, dtype = float).reshape(n_rows, 4) + offset
+    with open(path, "w") as f:
+        f.write("# header\n@ more header\n")
+        np.savetxt(f, data)
+    return str(path)
+
+def load(filename, loader, columns_x = [0, 1, 2], columns_y = [3]):
+    return parse_cache.load(filename, columns_x, columns_y, list(loader.comments), loader)
+
+def entries(cache):
+    return sorted(os.listdir(cache)) if os.path.isdir(cache) else []
+
+def test_hit(cache, tmp_path):
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    first = load(filename, loader)
+    second = load(filename, loader)
+    assert loader.calls == 1
+    assert isinstance(second, np.memmap)
+    np.testing.assert_array_equal(first, second)
+    assert len(entries(cache)) == 1
+
+def test_disabled(cache, tmp_path):
+    parse_cache.disable()
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    load(filename, loader)
+    load(filename, loader)
+    assert loader.calls == 2
+    assert entries(cache) == []
+
+def test_source_changes(cache, tmp_path):
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    load(filename, loader)
+    # Same size, different modification time
+    stat = os.stat(filename)
+    write_file(tmp_path / "a.dat", offset = 1.0)
+    os.utime(filename, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(filename).st_size == stat.st_size
+    np.testing.assert_array_equal(load(filename, loader)[0], np.arange(20)*4 + 1.0)
+    assert loader.calls == 2
+    # Different size, same modification time
+    mtime = os.stat(filename).st_mtime_ns
+    write_file(tmp_path / "a.dat", n_rows = 30)
+    os.utime(filename, ns = (mtime, mtime))
+    assert load(filename, loader).shape == (4, 30)
+    assert loader.calls == 3
+
+def test_different_columns_and_comments(cache, tmp_path):
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    load(filename, loader)
+    load(filename, loader, columns_x = [1, 0, 2])
+    load(filename, loader, columns_y = [3, 2])
+    other_comments = Loader(comments = ("#", "@", "%"))
+    load(filename, other_comments)
+    assert loader.calls == 3
+    assert other_comments.calls == 1
+    assert len(entries(cache)) == 4
+    # And every one of them is a hit now
+    load(filename, loader, columns_x = [1, 0, 2])
+    assert loader.calls == 3
+
+def test_eviction_order(cache, tmp_path):
+    loader = Loader()
+    files = [write_file(tmp_path / "{0}.dat".format(i)) for i in range(4)]
+    for i, filename in enumerate(files[:3]):
+        load(filename, loader)
+    paths = [os.path.join(cache, name) for name in entries(cache)]
+    by_file = {}
+    for i, filename in enumerate(files[:3]):
+        prefix = parse_cache._path_hash(filename)
+        by_file[i] = [p for p in paths if os.path.basename(p).startswith(prefix)][0]
+    # 0 is the oldest, then 1, then 2
+    for i, path in by_file.items():
+        os.utime(path, (1000.0 + i, 1000.0 + i))
+    # Using 0 makes it the most recent one
+    load(files[0], loader)
+    assert loader.calls == 3
+    size = os.path.getsize(by_file[0])
+    parse_cache._config["max_size"] = 3*size
+    load(files[3], loader)
+    assert not os.path.exists(by_file[1])
+    assert os.path.exists(by_file[0]) and os.path.exists(by_file[2])
+    assert len(entries(cache)) == 3
+
+def test_new_entry_is_never_evicted(cache, tmp_path):
+    parse_cache._config["max_size"] = 1
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    load(filename, loader)
+    assert len(entries(cache)) == 1
+    load(filename, loader)
+    assert loader.calls == 1
+
+def test_invalidate_and_clear(cache, tmp_path):
+    a, b = write_file(tmp_path / "a.dat"), write_file(tmp_path / "b.dat")
+    loader = Loader()
+    load(a, loader)
+    load(a, loader, columns_x = [1, 0, 2])
+    load(b, loader)
+    parse_cache.invalidate(a)
+    assert len(entries(cache)) == 1
+    load(a, loader)
+    assert loader.calls == 4
+    parse_cache.clear()
+    assert entries(cache) == []
+
+def test_corrupted_entry(cache, tmp_path):
+    filename = write_file(tmp_path / "a.dat")
+    loader = Loader()
+    load(filename, loader)
+    path = os.path.join(cache, entries(cache)[0])
+    with open(path, "wb") as f:
+        f.write(b"not a npy file")
+    np.testing.assert_array_equal(load(filename, loader), dat_reader.read_columns(filename, range(4)))
+    assert loader.calls == 2
@@ -0,0 +1,31 @@
+import os
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+
+# The example that used to live at the end of Plot.py
+XCOL = [1, 0, 2]
+YCOL = [3, 4]
+
+def test_example(capsys):
+    filename1, filename2 = [os.path.join(TEST_DATA, name) for name in ["test1.dat", "test2.dat"]]
+    plot1 = Plot(filename1, XCOL, YCOL)
+    plot2 = Plot(filename2, XCOL, YCOL)
+    raw = np.loadtxt(filename2)
+    total, error = plot2.get_total()
+    assert total == pytest.approx(np.sum(raw[:, 3]), rel = 1e-14)
+    assert error == pytest.approx(np.sqrt(np.sum(raw[:, 4]**2)), rel = 1e-14)
+
+    plot1.output_columns()
+    lines = capsys.readouterr().out.splitlines()
+    raw = np.loadtxt(filename1)
+    assert len(lines) == len(raw)
+    # xmin x xmax y ymax ymin stat_err
+    printed = np.array([[float(i) for i in line.split()] for line in lines])
+    np.testing.assert_array_equal(printed[:, :4], raw[:, :4])
+    np.testing.assert_allclose(printed[:, 4], raw[:, 3] + raw[:, 4], rtol = 1e-14)
+    np.testing.assert_allclose(printed[:, 5], raw[:, 3] - raw[:, 4], rtol = 1e-14)
+    np.testing.assert_array_equal(printed[:, 6], raw[:, 4])
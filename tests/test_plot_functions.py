@@ -0,0 +1,48 @@
+import os
+import pytest
+
+matplotlib = pytest.importorskip("matplotlib")
+
+from plotting_device import plot_functions as pf
+
+def figures(n):
+    return [pf.draw_canvas(None, nrows = 1)[0] for _ in range(n)]
+
+def test_save_list_of_figures(tmp_path):
+    filenames = [str(tmp_path / "a.png"), str(tmp_path / "b.png")]
+    pf.save_to_file(figures(2), filenames)
+    assert all(os.path.getsize(filename) > 0 for filename in filenames)
+
+@pytest.mark.parametrize("filename", ["ab", "plots.pdf"])
+def test_save_list_with_one_filename(tmp_path, filename):
+    with pytest.raises(Exception, match = "list of filenames"):
+        pf.save_to_file(figures(2), str(tmp_path / filename))
+    assert os.listdir(tmp_path) == []
+
+def test_save_wrong_number_of_filenames(tmp_path):
+    with pytest.raises(Exception, match = "2 figures and 1 filenames"):
+        pf.save_to_file(figures(2), [str(tmp_path / "a.png")])
+
+def test_style_context_restores_rc():
+    import threading
+    from matplotlib import rcParams, RcParams
+    before = {key : rcParams[key] for key in pf.STYLE}
+    style = dict(RcParams(pf.STYLE))
+    entered = threading.Barrier(3, timeout = 30)
+    leave = threading.Event()
+    def user():
+        with pf.style_context():
+            entered.wait()
+            leave.wait(30)
+    threads = [threading.Thread(target = user) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        entered.wait()
+        # Applied for the whole process while any thread is inside
+        assert {key : rcParams[key] for key in pf.STYLE} == style
+    finally:
+        leave.set()
+        for thread in threads:
+            thread.join()
+    assert {key : rcParams[key] for key in pf.STYLE} == before
@@ -0,0 +1,92 @@
+import math
+import decimal as dec
+import numpy as np
+import pytest
+
+from plotting_device import NewNumber, NewNumberArray
+from plotting_device.NewNumber import quantize
+
+ROUNDING = {True : dec.ROUND_UP, False : dec.ROUND_DOWN}
+
+def reference(x, decimals, away_from_zero):
+    """ What NewNumber.ceil/floor did with Decimal, None when Decimal can't do it """
+    f_n = dec.Decimal(str(pow(10, -max(decimals, 0))))
+    try:
+        return float(dec.Decimal(float(x)).quantize(f_n, rounding = ROUNDING[away_from_zero]))
+    except dec.InvalidOperation:
+        return None
+
+def same(a, b):
+    """ Equal, with the same sign for zeros, nan equal to nan """
+    if math.isnan(b):
+        return math.isnan(a)
+    return a == b and math.copysign(1.0, a) == math.copysign(1.0, b)
+
+def values():
+    rng = np.random.default_rng(11)
+    special = [0.1, 0.15, 0.25, 0.35, 2.675, 1.005, 0.5, 1.0, 9.995, 123.456, 1e-7, 5e-324, 0.0, -0.0]
+    near_exact = [2.0**52, 2.0**52 - 0.5, 2.0**52 + 1.0, 2.0**53, 4503599627370495.5, 1e15 + 0.3, 1e16]
+    base = special + near_exact + list(rng.normal(0.0, 1.0, 300)) + list(10.0**rng.uniform(-10, 10, 300))
+    return base + [-i for i in base]
+
+DECIMALS = list(range(-3, 31))
+
+@pytest.mark.parametrize("away_from_zero", [True, False])
+def test_scalars_match_decimal(away_from_zero):
+    for x in values():
+        for decimals in DECIMALS:
+            expected = reference(x, decimals, away_from_zero)
+            if expected is None:
+                with pytest.raises(dec.InvalidOperation):
+                    quantize(x, decimals, away_from_zero)
+            else:
+                assert same(quantize(x, decimals, away_from_zero), expected), (x, decimals)
+
+@pytest.mark.parametrize("away_from_zero", [True, False])
+def test_arrays_match_decimal(away_from_zero):
+    x = np.array(values())
+    for decimals in DECIMALS:
+        expected = [reference(i, decimals, away_from_zero) for i in x]
+        valid = np.array([i is not None for i in expected])
+        if not np.all(valid):
+            with pytest.raises(dec.InvalidOperation):
+                quantize(x, decimals, away_from_zero)
+            x_valid = x[valid]
+        else:
+            x_valid = x
+        result = quantize(x_valid, decimals, away_from_zero)
+        assert all(same(a, b) for a, b in zip(result.tolist(), [i for i in expected if i is not None])), decimals
+
+def test_array_decimals():
+    x = np.array(values())
+    rng = np.random.default_rng(12)
+    # Up to 10 decimals, so every value fits in the 28 digits of Decimal
+    decimals = rng.integers(-3, 11, len(x))
+    result = quantize(x, decimals, True)
+    expected = [reference(a, int(b), True) for a, b in zip(x, decimals)]
+    assert all(same(a, b) for a, b in zip(result.tolist(), expected))
+    # Scalar x against an array of decimals
+    result = quantize(2.675, np.arange(0, 25), False)
+    assert result.tolist() == [reference(2.675, i, False) for i in range(25)]
+
+def test_numpy_scalars():
+    for x in [np.float64(2.675), np.float32(0.15), np.int64(7)]:
+        assert quantize(x, 2, True) == reference(x, 2, True)
+        assert quantize(x, np.int64(2), False) == reference(x, 2, False)
+
+def test_not_finite():
+    assert math.isnan(quantize(float("nan"), 3, True))
+    assert math.isnan(quantize(np.array([float("nan")]), 3, False)[0])
+    for x in [float("inf"), -float("inf")]:
+        with pytest.raises(dec.InvalidOperation):
+            quantize(x, 3, True)
+        with pytest.raises(dec.InvalidOperation):
+            quantize(np.array([x]), 3, True)
+
+def test_ceil_floor():
+    number = NewNumber(2.675, 0.0151)
+    assert (number.ceil(2).x, number.ceil(2).dx) == (2.68, 0.02)
+    assert (number.floor(2).x, number.floor(2).dx) == (2.67, 0.01)
+    array = NewNumberArray([2.675, -0.15], [0.0151, 0.001])
+    np.testing.assert_array_equal(array.ceil(1).x, [2.7, -0.2])
+    np.testing.assert_array_equal(array.floor(1).x, [2.6, -0.1])
@@ -0,0 +1,146 @@
+import os
+import copy
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+from plotting_device.SparsePlot import SparsePlot
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+
+def data_plot(name = "test1.dat"):
+    return Plot(os.path.join(TEST_DATA, name), columns_x = [1, 0, 2], columns_y = [3, 4, 5, 6])
+
+def binned_plot(edges, y, variations = 2):
+    """ Plot with bins edges[i], edges[i+1], ymax = 1.1*y, ymin = 0.8*y and stat_err = 0.1*y """
+    edges = np.asarray(edges, dtype = float)
+    y = np.asarray(y, dtype = float)
+    x_data = [(edges[:-1] + edges[1:])/2.0, edges[:-1], edges[1:]]
+    return Plot(x_data = x_data, y_data = [y, 1.1*y, 0.8*y, 0.1*y])
+
+def expected_rebin(plot, groups):
+    """ The rebinned arrays computed bin by bin, groups is a list of lists of bins """
+    width = plot.xmax - plot.xmin
+    result = {name : [] for name in ["xmin", "xmax", "y", "ymin", "ymax", "stat_err"]}
+    for group in groups:
+        w = width[group]
+        result["xmin"].append(plot.xmin[group[0]])
+        result["xmax"].append(plot.xmax[group[-1]])
+        for name in ["y", "ymin", "ymax"]:
+            result[name].append(np.sum(getattr(plot, name)[group]*w)/np.sum(w))
+        result["stat_err"].append(np.sqrt(np.sum((plot.stat_err[group]*w)**2))/np.sum(w))
+    return result
+
+def assert_rebinned(plot, expected):
+    for name, values in expected.items():
+        np.testing.assert_allclose(getattr(plot, name), values, rtol = 1e-13, err_msg = name)
+    np.testing.assert_allclose(plot.x, (plot.xmin + plot.xmax)/2.0, rtol = 1e-13)
+
+def test_rebin_two():
+    plot = data_plot()
+    # Same as the original implementation: plain averages for equal bins, errors in quadrature
+    n = len(plot.y)//2
+    y = (plot.y[0:2*n:2] + plot.y[1:2*n:2])/2.0
+    stat_err = np.sqrt(plot.stat_err[0:2*n:2]**2 + plot.stat_err[1:2*n:2]**2)/2.0
+    rebinned = copy.deepcopy(plot)
+    rebinned.rebin(2)
+    np.testing.assert_allclose(rebinned.y, y, rtol = 1e-13)
+    np.testing.assert_allclose(rebinned.stat_err, stat_err, rtol = 1e-13)
+    assert_rebinned(rebinned, expected_rebin(plot, [[2*i, 2*i + 1] for i in range(n)]))
+    assert rebinned.rebinned == 2
+
+def test_variable_width_nrebin():
+    edges = [0.0, 1.0, 3.0, 4.0, 8.0, 9.0, 10.0, 20.0]
+    plot = binned_plot(edges, [1.0, 2.0, 5.0, 3.0, 4.0, 6.0, 0.5])
+    reference = copy.deepcopy(plot)
+    plot.rebin(3)
+    assert_rebinned(plot, expected_rebin(reference, [[0, 1, 2], [3, 4, 5]]))
+
+def test_edges():
+    edges = [0.0, 1.0, 3.0, 4.0, 8.0, 9.0, 10.0, 20.0]
+    plot = binned_plot(edges, [1.0, 2.0, 5.0, 3.0, 4.0, 6.0, 0.5])
+    reference = copy.deepcopy(plot)
+    plot.rebin(edges = [0.0, 3.0, 4.0, 9.0, 10.0, 20.0])
+    assert_rebinned(plot, expected_rebin(reference, [[0, 1], [2], [3, 4], [5], [6]]))
+    # The new binning is the reference for nrebin
+    assert plot.rebinned == 1
+    plot.rebin(2)
+    assert_rebinned(plot, expected_rebin(reference, [[0, 1, 2], [3, 4, 5]]))
+    partial = copy.deepcopy(reference)
+    partial.rebin(edges = [1.0, 4.0, 20.0])
+    assert_rebinned(partial, expected_rebin(reference, [[1, 2], [3, 4, 5, 6]]))
+
+@pytest.mark.parametrize("edges", [[0.0, 2.0, 20.0], [0.0], [4.0, 3.0, 20.0], [-5.0, 1.0]])
+def test_wrong_edges(edges):
+    plot = binned_plot([0.0, 1.0, 3.0, 4.0, 8.0], [1.0, 2.0, 5.0, 3.0])
+    with pytest.raises(Exception, match = "edges for rebin"):
+        plot.rebin(edges = edges)
+
+def test_repeated_rebins():
+    plot = data_plot()
+    once = copy.deepcopy(plot)
+    once.rebin(4)
+    twice = copy.deepcopy(plot)
+    twice.rebin(2)
+    twice.rebin(4)
+    assert twice.rebinned == 4
+    for name in ["xmin", "xmax", "y", "ymin", "ymax", "stat_err"]:
+        np.testing.assert_allclose(getattr(twice, name), getattr(once, name), rtol = 1e-13, err_msg = name)
+    # Already rebinned for 4, nothing to do
+    twice.rebin(2)
+    assert len(twice.y) == len(once.y)
+    with pytest.raises(Exception, match = "rebinned for n=4"):
+        twice.rebin(6)
+    with pytest.raises(Exception, match = "Not enough bins"):
+        twice.rebin(64)
+
+def test_variations():
+    plot = data_plot()
+    plot.rebin(2)
+    # The envelope of the rebinned variations is the rebinned envelope
+    recomputed = copy.deepcopy(plot)
+    recomputed.recompute_envelope()
+    for name in ["y", "ymin", "ymax", "stat_err"]:
+        np.testing.assert_allclose(getattr(recomputed, name), getattr(plot, name), rtol = 1e-13, err_msg = name)
+
+def test_derived_plots():
+    p1, p2 = data_plot("test1.dat"), data_plot("test2.dat")
+    total = p1 + p2
+    total.rebin(2)
+    for plot in (p1, p2):
+        plot.rebin(2)
+    np.testing.assert_allclose(total.y, (p1 + p2).y, rtol = 1e-13)
+
+    ratio = data_plot("test1.dat")/data_plot("test2.dat")
+    reference = copy.deepcopy(ratio)
+    ratio.rebin(2)
+    n = len(reference.y)//2
+    assert_rebinned(ratio, expected_rebin(reference, [[2*i, 2*i + 1] for i in range(n)]))
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_gap_after_ratio(sparse):
+    # The denominator is empty in the third bin, the ratio doesn't have it
+    edges = np.arange(9, dtype = float)
+    numerator = binned_plot(edges, [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0])
+    denominator = binned_plot(edges, [2.0, 2.0, 0.0, 2.0, 2.0, 2.0, 2.0, 2.0])
+    if sparse:
+        numerator = SparsePlot(numerator)
+    ratio = numerator/denominator
+    assert len(ratio.to_dense().y if sparse else ratio.y) == 7
+    # rebin(2) joins 0-1, 1-2 then 3-4, 4-5 ... rebin(3) joins 1-2 with 3-4
+    with pytest.raises(Exception, match = "gap"):
+        ratio.rebin(3)
+    with pytest.raises(Exception, match = "gap"):
+        ratio.rebin(edges = [0.0, 4.0])
+    # Groups that don't cross the gap are fine
+    ratio.rebin(edges = [3.0, 5.0, 7.0])
+    dense = ratio.to_dense() if sparse else ratio
+    np.testing.assert_allclose(dense.y, [2.25, 3.25])
+
+def test_points():
+    # Points rather than bins (no width) are averaged
+    plot = Plot(x_data = [[1.0, 2.0, 3.0, 4.0]], y_data = [[1.0, 2.0, 3.0, 5.0]])
+    plot.xmin = plot.x.copy()
+    plot.xmax = plot.x.copy()
+    plot.rebin(2)
+    np.testing.assert_allclose(plot.y, [1.5, 4.0])
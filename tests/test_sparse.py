@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+from plotting_device.SparsePlot import SparsePlot
+
+ARRAYS = ["x", "xmin", "xmax", "y", "ymin", "ymax", "stat_err"]
+
+def sparse_plot(n_bins = 200, occupancy = 0.2, seed = 1):
+    """ Mostly empty plot with bins of width 2 (x at the center of the bins) """
+    rng = np.random.default_rng(seed)
+    edges = 2.0*np.arange(n_bins + 1)
+    y = np.where(rng.uniform(size = n_bins) < occupancy, rng.uniform(1.0, 10.0, n_bins), 0.0)
+    x_data = [(edges[:-1] + edges[1:])/2.0, edges[:-1], edges[1:]]
+    return Plot(x_data = x_data, y_data = [y, 1.1*y, 0.9*y, 0.1*y])
+
+def one_bin_plot(y):
+    """ Three bins of width 2, only the middle one can be occupied """
+    x_data = [[1.0, 3.0, 5.0], [0.0, 2.0, 4.0], [2.0, 4.0, 6.0]]
+    values = [0.0, y, 0.0]
+    return Plot(x_data = x_data, y_data = [values, values, values])
+
+def assert_same_plot(plot, reference):
+    for name in ARRAYS:
+        np.testing.assert_allclose(np.atleast_1d(getattr(plot, name)), np.atleast_1d(getattr(reference, name)),
+                rtol = 1e-14, err_msg = name)
+
+WINDOWS = [(None, None), (10, 20), (0.5, 7.0), (3, 3.5), (-10, 1000)]
+
+@pytest.mark.parametrize("dense", [sparse_plot(), one_bin_plot(3.0), one_bin_plot(0.0)])
+def test_integrals_match_dense(dense):
+    sparse = SparsePlot(dense)
+    reference = sparse.to_dense()
+    for xmin, xmax in WINDOWS:
+        assert sparse.get_integral_envelope(xmin, xmax) == pytest.approx(reference.get_integral_envelope(xmin, xmax))
+        assert sparse.get_integral(xmin, xmax) == pytest.approx(dense.get_integral(xmin, xmax))
+        assert sparse.get_total(xmin, xmax) == pytest.approx(reference.get_total(xmin, xmax))
+    lows, ups = np.array([0.0, 10.0, 50.0]), np.array([400.0, 20.0, 52.0])
+    for result, expected in zip(sparse.get_integral_envelopes(lows, ups), reference.get_integral_envelopes(lows, ups)):
+        np.testing.assert_allclose(result, expected, rtol = 1e-12)
+    for result, expected in zip(sparse.get_totals(lows, ups), reference.get_totals(lows, ups)):
+        np.testing.assert_allclose(result, expected, rtol = 1e-12)
+
+def test_one_occupied_bin():
+    sparse = SparsePlot(one_bin_plot(3.0))
+    assert sparse.get_integral() == (6.0, 0.0)
+    assert sparse.get_integral(10, 20) == (0.0, 0.0)
+    assert sparse.get_total() == (3.0, 0.0)
+
+def test_no_occupied_bins():
+    sparse = SparsePlot(one_bin_plot(0.0))
+    assert len(sparse.x) == 0
+    assert sparse.get_integral() == (0.0, 0.0)
+    assert sparse.get_total() == (0.0, 0.0)
+
+@pytest.mark.parametrize("operation", ["sum", "difference", "ratio"])
+def test_algebra_matches_dense(operation):
+    a, b = sparse_plot(seed = 1), sparse_plot(seed = 2)
+    sa, sb = SparsePlot(a), SparsePlot(b)
+    if operation == "sum":
+        dense, sparse = a + b, sa + sb
+    elif operation == "difference":
+        dense, sparse = a - b, sa - sb
+    else:
+        dense, sparse = a/b, sa/sb
+    assert len(sparse.bin_low) == len(dense.x)
+    assert_same_plot(sparse.to_dense(), dense)
+
+def test_rebin_matches_dense():
+    dense = sparse_plot()
+    sparse = SparsePlot(dense)
+    dense.rebin(4)
+    sparse.rebin(4)
+    assert_same_plot(sparse.to_dense(), dense)
+    assert sparse.get_integral(16, 80) == pytest.approx(dense.get_integral(16, 80))
+
+def test_docstrings():
+    assert Plot.__doc__.strip().startswith("In its more general representation")
+    assert not Plot.sparse and SparsePlot.sparse
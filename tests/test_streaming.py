@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pytest
+
+from plotting_device import Plot
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "test_data")
+ARRAYS = ["x", "xmin", "xmax", "y", "ymin", "ymax", "stat_err"]
+
+def write_file(path, n_rows = 10):
+    """ n_rows rows in the test_data layout with comment and blank lines in the middle """
+    rng = np.random.default_rng(3)
+    lines = ["# xmin x xmax y ymax ymin stat_err", "@ header"]
+    for i in range(n_rows):
+        y = rng.uniform(0.1, 10.0)
+        lines.append("{0} {1} {2} {3!r} {4!r} {5!r} {6!r}".format(10*i, 10*i + 5, 10*i + 10, y, 1.02*y, 0.97*y, 0.01*y))
+        if i == 2:
+            lines.append("# a comment in the middle")
+        if i == 4:
+            lines.append("")
+            lines.append("@ another comment")
+            lines.append("   # an indented comment")
+        if i == 6:
+            lines.append("   ")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+def assert_same_plot(reference, streamed):
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(streamed, name), getattr(reference, name), err_msg = name)
+
+@pytest.mark.parametrize("block_size", [1, 3, 4, 10, 1000])
+def test_streaming_matches_bulk(tmp_path, block_size):
+    # 10 rows: blocks of 3 and 4 leave a partial last block
+    filename = write_file(tmp_path / "data.dat")
+    reference = Plot(filename)
+    assert len(reference.x) == 10
+    assert_same_plot(reference, Plot(filename, block_size = block_size))
+
+@pytest.mark.parametrize("columns_y", [[3], [3, 6], [3, 4, 5], [3, 4, 5, 6]])
+def test_streaming_columns(tmp_path, columns_y):
+    filename = write_file(tmp_path / "data.dat")
+    reference = Plot(filename, columns_y = columns_y)
+    assert_same_plot(reference, Plot(filename, columns_y = columns_y, block_size = 3))
+
+@pytest.mark.parametrize("name", ["test1.dat", "test2.dat", "test3.dat"])
+def test_streaming_test_data(name):
+    filename = os.path.join(TEST_DATA, name)
+    assert_same_plot(Plot(filename), Plot(filename, block_size = 7))
+
+@pytest.mark.filterwarnings("ignore:loadtxt")
+@pytest.mark.parametrize("block_size", [None, 2])
+@pytest.mark.parametrize("content", ["", "# only\n@ comments\n\n"])
+def test_no_data(tmp_path, block_size, content):
+    filename = tmp_path / "empty.dat"
+    filename.write_text(content)
+    with pytest.raises(Exception, match = "No data found"):
+        Plot(str(filename), block_size = block_size)
+
+def test_reader_chunks(tmp_path):
+    from plotting_device import dat_reader
+    filename = write_file(tmp_path / "data.dat", n_rows = 50)
+    reference = np.loadtxt(filename, comments = ["#", "@"], usecols = [1, 0, 3], unpack = True, ndmin = 2)
+    for chunk_bytes in [7, 64, 1000, 1 << 24]:
+        np.testing.assert_array_equal(dat_reader.read_columns(filename, [1, 0, 3], chunk_bytes = chunk_bytes), reference)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from plotting_device import NewNumber, NewNumberArray, DataTable
+from plotting_device.NewNumberArray import format_uncertainties
+
+# (x, dx, expected string): one significant digit of the error, two if it starts with 1, no decimals above 1
+CASES = [
+        (1.23456, 0.0123, "1.235 +/- 0.012"),
+        (1.23456, 0.0923, "1.23 +/- 0.09"),
+        (1.23456, 0.0999, "1.23 +/- 0.10"),
+        (-0.5, 0.013, "-0.500 +/- 0.013"),
+        (1e-9, 1.9e-11, "0.000000001000 +/- 0.000000000019"),
+        # On both sides of a power of 10
+        (1.0, 0.0009999999999999998, "1.0000 +/- 0.0010"),
+        (1.0, 0.001, "1.0000 +/- 0.0010"),
+        (1.0, 0.0010000000000000002, "1.0000 +/- 0.0010"),
+        (1.0, 9.999999999999998, "1 +/- 10"),
+        (123.456, 1.5, "123.5 +/- 1.5"),
+        (123.456, 2.7, "123 +/- 3"),
+        (1234.56, 15.3, "1235 +/- 15"),
+        (123.456, 950.0, "123 +/- 950"),
+        (1.23456, 0.0, "1.23456"),
+        (-2.0, 0.0, "-2.0"),
+        ]
+
+def test_strings():
+    x, dx, expected = [list(i) for i in zip(*CASES)]
+    assert [str(NewNumber(a, b)) for a, b in zip(x, dx)] == expected
+    assert format_uncertainties(x, dx) == expected
+    assert NewNumberArray(x, dx).to_strings() == expected
+    latex = ["${0}$".format(i.replace(" +/- ", " \\pm ")) if " +/- " in i else i for i in expected]
+    assert format_uncertainties(x, dx, mode = "latex") == latex
+    html = [i.replace(" +/- ", " &plusmn; ") for i in expected]
+    assert format_uncertainties(x, dx, mode = "html") == html
+
+def test_zero_errors():
+    x = np.array([1.5, -2.25, 0.0])
+    assert format_uncertainties(x, np.zeros(3)) == [str(NewNumber(i, 0.0)) for i in x]
+
+def test_edge_of_power_of_10():
+    dx = 9.999999999999999e-09
+    assert str(NewNumber(1.0, dx)) == format_uncertainties([1.0], [dx])[0] == "1.000000000 +/- 0.000000010"
+
+def test_table_cells():
+    x = np.array([1.0, 2.0, 3.0])
+    dx = np.array([0.012, np.nextafter(1e-3, 0.0), 0.5])
+    table = DataTable.from_columns([[NewNumber(a, b) for a, b in zip(x, dx)]], header = ["y"])
+    latex = table.str_latex()
+    for a, b in zip(x, dx):
+        assert str(NewNumber(a, b)).replace(" +/- ", " \\pm ") in latex